@@ -0,0 +1,12 @@
+"""
+Throughput and latency benchmarks for the wrapper, run against local
+simulated controllers (rsee_controller.simulator), so no hardware or DLL
+is needed:
+
+    python -m benchmarks --ops 2000 --output baseline.json
+    python -m benchmarks --ops 2000 --compare baseline.json
+
+Results are JSON with ops/sec and latency percentiles per case. With
+--compare, cases that regressed beyond --threshold are listed and the exit
+status is 1.
+"""
@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+
+from .cases import CASES, Bench
+from .harness import compare, environment, summarize
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmark rsee_controller against simulated controllers.')
+    parser.add_argument('cases', nargs='*', help='cases to run (default: all): ' + ', '.join(CASES))
+    parser.add_argument('--ops', type=int, default=1000, help='operations per case')
+    parser.add_argument('--controllers', type=int, default=8, help='simulated controllers for fan-out')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated reply latency, seconds')
+    parser.add_argument('--warmup', type=int, default=50, help='untimed operations before each case')
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative change in ops/sec or p99 counted as a regression')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error('unknown case(s): ' + ', '.join(unknown))
+
+    results = {}
+    with Bench(args.controllers, args.latency) as bench:
+        for name in args.cases or CASES:
+            if args.warmup:
+                CASES[name](bench, args.warmup)
+            results[name] = summarize(CASES[name](bench, args.ops))
+            print('{:<24} {:>12.1f} ops/s  p50 {:>9.1f} us  p99 {:>9.1f} us'.format(
+                name, results[name]['ops_per_sec'], results[name]['p50_us'], results[name]['p99_us']),
+                file=sys.stderr)
+
+    report = {
+        'meta': dict(environment(), ops=args.ops, controllers=args.controllers, latency=args.latency),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for name, metric, before, now in regressions:
+            print('REGRESSION {} {}: {:.1f} -> {:.1f}'.format(name, metric, before, now), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
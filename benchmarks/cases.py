@@ -0,0 +1,143 @@
+"""
+Benchmark cases. Each takes the Bench context and a number of operations
+and returns a Timings.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from rsee_controller import RseeController, SocketTransport
+from rsee_controller.aio import AsyncRseeController
+from rsee_controller.simulator import SimulatorThread
+
+from .harness import Timings
+
+CASES = {}
+
+
+def case(func):
+    CASES[func.__name__] = func
+    return func
+
+
+class _NullTransport:
+    """Answers PM-D-8TE calls without I/O, isolating the cost of the Python layers."""
+
+    def RseeController_PM_D_8TE_BRTSetChannel(self, com_handle, socket_handle, channel, value):
+        return 1
+
+    def RseeController_PM_D_8TE_BRTSetAll(self, com_handle, socket_handle, values):
+        return 1
+
+
+class Bench:
+    """Simulated controllers plus a connected controller for each of them."""
+
+    def __init__(self, controllers=8, latency=0.0):
+        self.sim = SimulatorThread(controllers, latency=latency)
+        self.controller = RseeController(transport=SocketTransport())
+        self.handles = []
+
+    def __enter__(self):
+        self.sim.start()
+        self.handles = [self.controller.connect_net(host, port) for host, port in self.sim.addresses]
+        if not all(self.handles):
+            raise ConnectionError('Cannot connect to the simulated controllers')
+        return self
+
+    def __exit__(self, *exc):
+        for handle in self.handles:
+            self.controller.close_net(handle)
+        self.sim.stop()
+
+    @property
+    def handle(self):
+        return self.handles[0]
+
+
+def _channel_cycle():
+    state = {'channel': 0}
+
+    def next_channel():
+        state['channel'] = state['channel'] % 8 + 1
+        return state['channel']
+    return next_channel
+
+
+# --- Single controller ---
+@case
+def set_channel_sequential(bench, ops):
+    """One BRTSetChannel per operation, cycling through the channels."""
+    ctl, h, next_channel = bench.controller, bench.handle, _channel_cycle()
+    return Timings().measure(lambda: ctl.pmd_8te_brt_set_channel(h, next_channel(), 128), ops)
+
+
+@case
+def set_all(bench, ops):
+    """One BRTSetAll per operation."""
+    ctl, h, values = bench.controller, bench.handle, [128] * 8
+    return Timings().measure(lambda: ctl.pmd_8te_brt_set_all(h, values), ops)
+
+
+@case
+def read_after_write(bench, ops):
+    """A BRTSetChannel followed by a BRTReadChannel of the same channel."""
+    ctl, h, next_channel = bench.controller, bench.handle, _channel_cycle()
+
+    def op():
+        channel = next_channel()
+        ctl.pmd_8te_brt_set_channel(h, channel, 64)
+        ctl.pmd_8te_brt_read_channel(h, channel)
+    return Timings().measure(op, ops)
+
+
+# --- Fan-out over every controller ---
+@case
+def fanout_threads(bench, ops):
+    """A BRTSetAll to every controller per round, from a thread pool."""
+    ctl, handles, values = bench.controller, bench.handles, [128] * 8
+    rounds = max(1, ops // len(handles))
+    with ThreadPoolExecutor(max_workers=len(handles)) as pool:
+        def op():
+            list(pool.map(lambda h: ctl.pmd_8te_brt_set_all(h, values), handles))
+        return Timings(len(handles)).measure(op, rounds)
+
+
+@case
+def fanout_asyncio(bench, ops):
+    """A BRTSetAll to every controller per round, gathered on an event loop."""
+    handles, values = bench.handles, [128] * 8
+    rounds = max(1, ops // len(handles))
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    actl = AsyncRseeController(bench.controller, max_workers=len(handles))
+
+    async def fan_out():
+        return await asyncio.gather(*(actl.pmd_8te_brt_set_all(h, values) for h in handles))
+    try:
+        return Timings(len(handles)).measure(lambda: loop.run_until_complete(fan_out()), rounds)
+    finally:
+        actl.close()
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+# --- Wrapper overhead vs transport ---
+@case
+def overhead_transport(bench, ops):
+    """BRTSetChannel called on the transport directly, skipping the wrapper."""
+    func, h, next_channel = bench.controller.dll.RseeController_PM_D_8TE_BRTSetChannel, bench.handle, _channel_cycle()
+    return Timings().measure(lambda: func(None, h, next_channel(), 128), ops)
+
+
+@case
+def overhead_stubs(bench, ops):
+    """BRTSetChannel through a pre-bound stub."""
+    stub, next_channel = bench.controller.stubs('pmd_8te', bench.handle).brt_set_channel, _channel_cycle()
+    return Timings().measure(lambda: stub(next_channel(), 128), ops)
+
+
+@case
+def overhead_wrapper_only(bench, ops):
+    """The wrapper method over a transport that does no I/O: pure Python overhead."""
+    ctl, next_channel = RseeController(transport=_NullTransport()), _channel_cycle()
+    return Timings().measure(lambda: ctl.pmd_8te_brt_set_channel(1, next_channel(), 128), ops * 10)
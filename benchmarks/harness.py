@@ -0,0 +1,81 @@
+import platform
+import sys
+import time
+
+timer = time.perf_counter
+
+
+class Timings:
+    """Per-operation latencies of one benchmark case."""
+
+    def __init__(self, ops_per_sample=1):
+        """
+        Args:
+            ops_per_sample (int): Operations covered by each recorded sample,
+                                  e.g. the number of controllers in a fan-out round.
+        """
+        self.ops_per_sample = ops_per_sample
+        self.samples = []
+        self.elapsed = 0.0
+
+    def measure(self, func, repeat):
+        """Times `repeat` calls of func()."""
+        samples = self.samples
+        start = timer()
+        for _ in range(repeat):
+            t0 = timer()
+            func()
+            samples.append(timer() - t0)
+        self.elapsed += timer() - start
+        return self
+
+
+def percentile(sorted_samples, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(q / 100.0 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+def summarize(timings):
+    samples = sorted(timings.samples)
+    ops = len(samples) * timings.ops_per_sample
+    return {
+        'ops': ops,
+        'seconds': timings.elapsed,
+        'ops_per_sec': ops / timings.elapsed if timings.elapsed else 0.0,
+        'mean_us': sum(samples) / len(samples) * 1e6 if samples else 0.0,
+        'p50_us': percentile(samples, 50) * 1e6,
+        'p90_us': percentile(samples, 90) * 1e6,
+        'p99_us': percentile(samples, 99) * 1e6,
+        'max_us': samples[-1] * 1e6 if samples else 0.0,
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'argv': sys.argv[1:],
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Returns the regressions of current against baseline, as a list of
+    (case, metric, baseline value, current value). A case regresses when
+    ops/sec drops, or p99 latency rises, by more than `threshold`.
+    """
+    regressions = []
+    for case, now in sorted(current['results'].items()):
+        before = baseline.get('results', {}).get(case)
+        if before is None:
+            continue
+        if now['ops_per_sec'] < before['ops_per_sec'] * (1 - threshold):
+            regressions.append((case, 'ops_per_sec', before['ops_per_sec'], now['ops_per_sec']))
+        if now['p99_us'] > before['p99_us'] * (1 + threshold):
+            regressions.append((case, 'p99_us', before['p99_us'], now['p99_us']))
+    return regressions
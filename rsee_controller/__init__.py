@@ -1,2 +1,20 @@
+import sys
 
 from .wrapper import RseeController
+from .transport import SocketTransport
+from .serialport import SerialTransport
+from .pool import ConnectionPool
+from .fleet import Device, Fleet, Profile
+
+
+# AsyncRseeController pulls in asyncio, so it is only imported when first used.
+def __getattr__(name):
+    if name == 'AsyncRseeController':
+        from .aio import AsyncRseeController
+        return AsyncRseeController
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ needs Python 3.7.
+    from .aio import AsyncRseeController
@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from .wrapper import RseeController
+
+# Python 3.6 has no get_running_loop; there get_event_loop returns the running loop in a coroutine
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+# Methods that stay synchronous on self.controller: they configure it, or
+# return objects bound to it (batch, stubs)
+_LOCAL = ('batch', 'stubs')
+
+_COM_PARAMS = ('com_handle',)
+_NET_PARAMS = ('net_handle', 'socket_handle')
+
+
+class AsyncRseeController:
+    """
+    Awaitable counterpart of RseeController for driving many controllers
+    from one event loop.
+
+    Every device command of RseeController (connect/close calls and the
+    family methods) is available as a coroutine with the same name and
+    arguments; configure the controller itself (enable_*, batch, stubs)
+    through `self.controller`. Calls run on a bounded thread pool, which
+    overlaps the blocking round trips of different controllers (ctypes and
+    sockets both release the GIL while they wait), while at most
+    `max_in_flight` calls per controller handle run at once.
+
+        async with AsyncRseeController(transport=SocketTransport()) as ctl:
+            handles = await asyncio.gather(*(ctl.connect_net(ip, port) for ip, port in addrs))
+            await asyncio.gather(*(ctl.pmd_8te_set_brightness(0, h, 1, 255) for h in handles))
+    """
+    def __init__(self, controller=None, max_workers=64, max_in_flight=1, **kwargs):
+        """
+        Args:
+            controller (RseeController, optional): The controller to drive.
+                                                  If None, one is created from kwargs.
+            max_workers (int): Size of the thread pool, i.e. how many blocking
+                               calls can be outstanding across all controllers.
+            max_in_flight (int): Concurrent calls allowed per controller handle.
+        """
+        self.controller = controller if controller is not None else RseeController(**kwargs)
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='rsee')
+        self._limits = {}
+
+    def _limit(self, key):
+        sem = self._limits.get(key)
+        if sem is None:
+            sem = self._limits[key] = asyncio.Semaphore(self.max_in_flight)
+        return sem
+
+    async def run(self, key, func, *args, **kwargs):
+        """
+        Runs a blocking callable on the pool. Calls sharing a key (a
+        controller handle, or None for no limit) respect max_in_flight.
+        """
+        loop = _running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        if key is None:
+            return await loop.run_in_executor(self._executor, call)
+        async with self._limit(key):
+            return await loop.run_in_executor(self._executor, call)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+def _handle_key(signature, args, kwargs):
+    """Returns (com_handle, net_handle) for a call, or None if it takes no handle."""
+    bound = signature.bind_partial(*args, **kwargs).arguments
+    com = net = None
+    for name in _COM_PARAMS:
+        com = bound.get(name, com)
+    for name in _NET_PARAMS:
+        net = bound.get(name, net)
+    if com is None and net is None:
+        return None
+    return com or 0, net or 0
+
+
+def _make_method(name, func):
+    signature = inspect.signature(func)
+    params = list(signature.parameters)[1:]
+    takes_handle = any(n in params for n in _COM_PARAMS + _NET_PARAMS)
+    signature = signature.replace(parameters=list(signature.parameters.values())[1:])
+
+    async def method(self, *args, **kwargs):
+        key = _handle_key(signature, args, kwargs) if takes_handle else None
+        return await self.run(key, getattr(self.controller, name), *args, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = 'AsyncRseeController.' + name
+    method.__doc__ = func.__doc__
+    return method
+
+
+def command_methods(controller_class):
+    """The names of the RseeController device command methods, in a stable order."""
+    return sorted(name for name, member in inspect.getmembers(controller_class, inspect.isfunction)
+                  if not name.startswith(('_', 'enable_', 'disable_')) and name not in _LOCAL)
+
+
+for _name in command_methods(RseeController):
+    setattr(AsyncRseeController, _name, _make_method(_name, getattr(RseeController, _name)))
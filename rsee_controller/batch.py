@@ -0,0 +1,182 @@
+import threading
+import time
+
+from . import protocol as p
+
+BRT = 'brt'
+PLS = 'pls'
+_LIMITS = {BRT: p.BRT_MAX, PLS: p.PLS_MAX}
+_SET_ALL = {BRT: 'RseeController_PM_D_8TE_BRTSetAll', PLS: 'RseeController_PM_D_8TE_PLSSetAll'}
+_SET_CHANNEL = {BRT: 'RseeController_PM_D_8TE_BRTSetChannel', PLS: 'RseeController_PM_D_8TE_PLSSetChannel'}
+
+
+class WriteBatch:
+    """
+    Buffers PM-D-8TE per-channel brightness and pulse writes for one handle
+    and sends them as BRTSetAll/PLSSetAll frames.
+
+    A later write to a channel replaces an earlier one. SetAll needs all
+    eight values, so a flush uses one SetAll frame when every channel was
+    written or its current value is known (passed in, from an earlier
+    SetAll in this batch, or from the controller's shadow cache), and
+    per-channel frames otherwise.
+
+    While used as a context manager (see RseeController.batch) the
+    controller's own per-channel setters for this handle are deferred into
+    the batch, and reads or mode changes on the handle flush it first.
+
+    With max_delay, a timer thread flushes writes that are still pending
+    max_delay seconds after the first of them, even if no further write
+    comes. Its result is kept in `last_result`.
+    """
+    def __init__(self, controller, socket_handle, com_handle=None, max_pending=p.CHANNELS,
+                 max_delay=None, brightness=None, pulse=None):
+        """
+        Args:
+            controller (RseeController): The controller that sends the frames.
+            socket_handle (int): The controller's net handle.
+            com_handle (int, optional): The com handle, for serial connections.
+            max_pending (int): Flush once this many channels of one kind are pending.
+            max_delay (float, optional): Flush once the oldest pending write is
+                                         this many seconds old.
+            brightness (list, optional): The 8 current brightness values.
+            pulse (list, optional): The 8 current pulse widths.
+        """
+        self.controller = controller
+        self.socket_handle = socket_handle
+        self.com_handle = com_handle
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.last_result = None
+        self._pending = {BRT: {}, PLS: {}}
+        self._known = {
+            BRT: self._current(BRT, brightness),
+            PLS: self._current(PLS, pulse),
+        }
+        self._since = None
+        self._timer = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _current(kind, values):
+        if values is None:
+            return None
+        values = list(values)
+        if len(values) != p.CHANNELS or not all(0 <= v <= _LIMITS[kind] for v in values):
+            raise ValueError('Current {} values must be {} integers in 0-{}'.format(
+                kind, p.CHANNELS, _LIMITS[kind]))
+        return values
+
+    @property
+    def key(self):
+        return self.com_handle or 0, self.socket_handle
+
+    @property
+    def pending(self):
+        """Number of buffered channel writes."""
+        return len(self._pending[BRT]) + len(self._pending[PLS])
+
+    def brt_set_channel(self, channel, value):
+        return self._write(BRT, channel, value)
+
+    def pls_set_channel(self, channel, time):
+        return self._write(PLS, channel, time)
+
+    def brt_set_all(self, values):
+        return self._write_all(BRT, values)
+
+    def pls_set_all(self, values):
+        return self._write_all(PLS, values)
+
+    def _write(self, kind, channel, value):
+        with self._lock:
+            if not 1 <= channel <= p.CHANNELS or not 0 <= value <= _LIMITS[kind]:
+                return p.RC_BAD_ARGUMENT
+            pending = self._pending[kind]
+            pending[channel] = value
+            now = time.monotonic()
+            if self._since is None:
+                self._since = now
+                if self.max_delay is not None:
+                    self._timer = threading.Timer(self.max_delay, self._flush_due)
+                    self._timer.daemon = True
+                    self._timer.start()
+            due = len(pending) >= self.max_pending or (
+                self.max_delay is not None and now - self._since >= self.max_delay)
+            if due:
+                return self.flush()
+        return p.RC_OK
+
+    def _write_all(self, kind, values):
+        with self._lock:
+            values = list(values[:p.CHANNELS])
+            if len(values) < p.CHANNELS or not all(0 <= v <= _LIMITS[kind] for v in values):
+                return p.RC_BAD_ARGUMENT
+            self._pending[kind].update(zip(range(1, p.CHANNELS + 1), values))
+            return self.flush()
+
+    def _flush_due(self):
+        with self._lock:
+            # A flush after the timer fired may have emptied the batch already
+            if self._since is not None and time.monotonic() - self._since >= self.max_delay:
+                self.flush()
+
+    def flush(self):
+        """
+        Sends all pending writes. Returns 1 if every frame was acknowledged,
+        otherwise the first failing return code.
+        """
+        result = p.RC_OK
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            for kind in (BRT, PLS):
+                pending = self._pending[kind]
+                if not pending:
+                    continue
+                rc = self._send(kind, pending)
+                pending.clear()
+                if result == p.RC_OK:
+                    result = rc
+            self._since = None
+            self.last_result = result
+        return result
+
+    def _send(self, kind, pending):
+        dll = self.controller.dll
+        known = self._known[kind]
+        if known is None and self.controller.cache is not None:
+            known = self._known[kind] = self.controller.cache.values(self.socket_handle, kind, self.com_handle)
+        if len(pending) > 1 and (known is not None or len(pending) == p.CHANNELS):
+            values = [pending[ch] if ch in pending else known[ch - 1] for ch in range(1, p.CHANNELS + 1)]
+            rc = getattr(dll, _SET_ALL[kind])(self.com_handle, self.socket_handle,
+                                             self.controller.INT_ARRAY_8(*values))
+            self._known[kind] = values if rc == p.RC_OK else None
+            return rc
+
+        set_channel = getattr(dll, _SET_CHANNEL[kind])
+        result = p.RC_OK
+        for channel, value in sorted(pending.items()):
+            rc = set_channel(self.com_handle, self.socket_handle, channel, value)
+            if rc == p.RC_OK:
+                if known is not None:
+                    known[channel - 1] = value
+            else:
+                self._known[kind] = known = None
+                if result == p.RC_OK:
+                    result = rc
+        return result
+
+    def __enter__(self):
+        batches = self.controller._batches
+        if self.key in batches:
+            raise ValueError('A write batch is already open for handle {}'.format(self.socket_handle))
+        batches[self.key] = self
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.flush()
+        finally:
+            self.controller._batches.pop(self.key, None)
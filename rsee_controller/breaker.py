@@ -0,0 +1,274 @@
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from . import protocol as p
+from .prototypes import device_getter, returns_reading
+from .transport import TransportLayer
+
+_PREFIX = 'RseeController_'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Functions returning a handle, which fail with 0 rather than a return code
+_HANDLE_RESULT = ('ConnectNet', 'OpenCom')
+
+
+def _failure_codes(function):
+    """Results that mean the device did not answer properly."""
+    if function in _HANDLE_RESULT:
+        return (0,)
+    if returns_reading(function):
+        # 0 is a valid reading
+        return (p.RC_BAD_REPLY, p.RC_TIMEOUT)
+    return (p.RC_NO_REPLY, p.RC_BAD_REPLY, p.RC_TIMEOUT, False)
+
+
+class _Device:
+    """Breaker and round-trip state of one device."""
+
+    __slots__ = ('state', 'failures', 'trips', 'open_until', 'backoff', 'srtt', 'rttvar', 'timeout_backoff',
+                 'stuck', 'probing')
+
+    def __init__(self, backoff):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.backoff = backoff
+        self.srtt = None
+        self.rttvar = 0.0
+        self.timeout_backoff = 1
+        self.stuck = 0
+        self.probing = False
+
+
+class CallBreaker(TransportLayer):
+    """
+    Per-call deadlines, adaptive timeouts and a per-device circuit breaker.
+
+    Each call runs on a worker thread and is abandoned when its deadline
+    passes, returning RC_TIMEOUT (or 0 for ConnectNet/OpenCom) instead of
+    blocking for the DLL's internal timeout. The deadline adapts to the
+    device's observed round trips (smoothed RTT + 4 deviations, within
+    [min_timeout, max_timeout]) unless set with deadline(). Each timeout
+    doubles the device's timeout, up to max_timeout, until a call answers
+    in time, and an abandoned call that answers late still counts as a
+    round trip, so a device that became slower is not locked out. While an
+    abandoned call is still blocked, further calls to that device fail at
+    once with RC_TIMEOUT.
+
+    After `failure_threshold` consecutive failures a device's circuit
+    opens and its calls fail fast with RC_CIRCUIT_OPEN. After
+    `reset_timeout` one call is let through as a probe: success closes the
+    circuit, failure reopens it for twice as long (up to max_reset_timeout).
+    Devices are labelled as in Instrumentation, e.g. 'net:5'. Install it
+    with RseeController.enable_breaker.
+    """
+    def __init__(self, failure_threshold=3, reset_timeout=1.0, max_reset_timeout=30.0,
+                 min_timeout=0.05, max_timeout=2.0, enforce=True, max_workers=32):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open a device's circuit.
+            reset_timeout (float): Seconds before the first probe of an open circuit.
+            max_reset_timeout (float): Longest wait between probes.
+            min_timeout (float): Lower bound of the adaptive per-call timeout.
+            max_timeout (float): Upper bound, and the timeout before any round trip is seen.
+            enforce (bool): Run calls on worker threads so deadlines interrupt the caller.
+                            If False, calls run inline and slow calls only count as failures.
+            max_workers (int): Worker threads for enforced calls.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.enforce = enforce
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='rsee-call') if enforce else None
+
+    def __getattr__(self, name):
+        func = TransportLayer.__getattr__(self, name)
+        function = name[len(_PREFIX):]
+        if function.startswith('Close'):
+            # Closing a handle is local cleanup; never block or refuse it
+            return func
+        wrapped = self.__dict__[name] = self._wrap(function, func)
+        return wrapped
+
+    # --- Deadlines ---
+    @contextlib.contextmanager
+    def deadline(self, seconds):
+        """Overrides the adaptive timeout for calls made by this thread in the block."""
+        previous = getattr(self._local, 'deadline', None)
+        self._local.deadline = seconds
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def timeout(self, device):
+        """The adaptive timeout of a device, in seconds."""
+        with self._lock:
+            dev = self._devices.get(device)
+            return self._timeout(dev)
+
+    def _timeout(self, dev):
+        if dev is None or dev.srtt is None:
+            return self.max_timeout
+        timeout = max(self.min_timeout, dev.srtt + 4 * dev.rttvar) * dev.timeout_backoff
+        return min(self.max_timeout, timeout)
+
+    # --- Calls ---
+    def _wrap(self, function, func):
+        device_of = device_getter(function)
+        failures = _failure_codes(function)
+        timed_out = 0 if function in _HANDLE_RESULT else p.RC_TIMEOUT
+        refused = 0 if function in _HANDLE_RESULT else p.RC_CIRCUIT_OPEN
+
+        def call(*args):
+            device = device_of(args)
+            dev, code, timeout = self._admit(device)
+            if code is not None:
+                return timed_out if code == p.RC_TIMEOUT else refused
+            deadline = getattr(self._local, 'deadline', None)
+            if deadline is not None:
+                timeout = deadline
+            start = time.monotonic()
+            if self._executor is None:
+                result = func(*args)
+                elapsed = time.monotonic() - start
+                answered = result not in failures
+                self._record(dev, answered and elapsed <= timeout, elapsed, answered and elapsed > timeout)
+                return result
+            future = self._executor.submit(func, *args)
+            try:
+                result = future.result(timeout)
+            except FutureTimeout:
+                with self._lock:
+                    dev.stuck += 1
+                future.add_done_callback(lambda f: self._late(dev, f, start, failures))
+                self._record(dev, False, None, True)
+                return timed_out
+            self._record(dev, result not in failures, time.monotonic() - start)
+            return result
+        call.__name__ = _PREFIX + function
+        return call
+
+    def _admit(self, device):
+        """Returns (device state, refusal code or None, timeout)."""
+        now = time.monotonic()
+        with self._lock:
+            dev = self._devices.get(device)
+            if dev is None:
+                dev = self._devices[device] = _Device(self.reset_timeout)
+            if dev.state == OPEN and now < dev.open_until:
+                return dev, p.RC_CIRCUIT_OPEN, 0.0
+            if dev.stuck:
+                # Still blocked in an earlier call: as good as another timeout
+                self._failed(dev)
+                return dev, p.RC_CIRCUIT_OPEN if dev.state == OPEN else p.RC_TIMEOUT, 0.0
+            if dev.state == OPEN:
+                dev.state = HALF_OPEN
+                dev.probing = True
+            elif dev.state == HALF_OPEN:
+                if dev.probing:
+                    return dev, p.RC_CIRCUIT_OPEN, 0.0
+                dev.probing = True
+            return dev, None, self._timeout(dev)
+
+    def _late(self, dev, future, start, failures):
+        """An abandoned call finished: its round trip is still a sample."""
+        elapsed = time.monotonic() - start
+        with self._lock:
+            dev.stuck -= 1
+            if future.exception() is None and future.result() not in failures:
+                self._sample(dev, elapsed)
+
+    @staticmethod
+    def _sample(dev, elapsed):
+        """Smoothed RTT and deviation, as for TCP retransmission timeouts. The caller holds the lock."""
+        if dev.srtt is None:
+            dev.srtt, dev.rttvar = elapsed, elapsed / 2
+        else:
+            dev.rttvar = 0.75 * dev.rttvar + 0.25 * abs(dev.srtt - elapsed)
+            dev.srtt = 0.875 * dev.srtt + 0.125 * elapsed
+
+    def _record(self, dev, ok, elapsed, timed_out=False):
+        with self._lock:
+            dev.probing = False
+            if elapsed is not None and (ok or timed_out):
+                self._sample(dev, elapsed)
+            if ok:
+                dev.timeout_backoff = 1
+                dev.failures = 0
+                dev.state = CLOSED
+                dev.backoff = self.reset_timeout
+                return
+            if timed_out and self._timeout(dev) < self.max_timeout:
+                # Back off like a retransmission timeout until a call answers in time
+                dev.timeout_backoff *= 2
+            self._failed(dev)
+
+    def _failed(self, dev):
+        """Counts a failure and opens the circuit if due. The caller holds the lock."""
+        dev.failures += 1
+        if dev.state == HALF_OPEN:
+            dev.backoff = min(self.max_reset_timeout, dev.backoff * 2)
+        elif dev.failures < self.failure_threshold:
+            return
+        if dev.state != OPEN:
+            dev.trips += 1
+        dev.state = OPEN
+        dev.open_until = time.monotonic() + dev.backoff
+
+    # --- Queries ---
+    def state(self, device):
+        """'closed', 'open' or 'half_open' for a device label such as 'net:5'."""
+        with self._lock:
+            dev = self._devices.get(device)
+            return CLOSED if dev is None else dev.state
+
+    def available(self, device):
+        """Whether a call to the device would be attempted now rather than refused."""
+        with self._lock:
+            dev = self._devices.get(device)
+            if dev is None:
+                return True
+            if dev.stuck:
+                return False
+            return dev.state == CLOSED or (dev.state == OPEN and time.monotonic() >= dev.open_until)
+
+    def states(self):
+        """Returns {device: state, trips, failures, srtt, timeout, retry_in, stuck}."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                device: {
+                    'state': dev.state,
+                    'trips': dev.trips,
+                    'failures': dev.failures,
+                    'srtt': dev.srtt,
+                    'timeout': self._timeout(dev),
+                    'retry_in': max(0.0, dev.open_until - now) if dev.state == OPEN else 0.0,
+                    'stuck': dev.stuck,
+                }
+                for device, dev in self._devices.items()
+            }
+
+    def reset(self, device=None):
+        """Closes one device's circuit, or every circuit, and forgets its history."""
+        with self._lock:
+            if device is None:
+                self._devices.clear()
+            else:
+                self._devices.pop(device, None)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,254 @@
+"""
+Brings up a production line from a fleet description file.
+
+    # line.toml
+    [defaults]
+    port = 8899
+    mode = "constant"
+    on = true
+
+    [[controllers]]
+    name = "cam1"
+    ip = "192.168.1.100"
+    brightness = [255, 255, 255, 255, 0, 0, 0, 0]
+
+    [[controllers]]
+    name = "bar"
+    serial = "/dev/ttyUSB0"
+    baud = 19200
+    family = "pms"
+    brightness = [128, 128, 128, 128, 128, 128, 128, 128]
+
+    fleet, report = bring_up(controller, load_config('line.toml'))
+
+The same structure can be written as JSON. Settings in [defaults] apply to
+every controller that does not set them itself.
+"""
+import json
+import time
+from concurrent.futures import wait
+from functools import partial
+
+from . import protocol as p
+from .fleet import FAMILIES, Device, Fleet, Profile
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+KEYS = ('name', 'ip', 'port', 'serial', 'baud', 'family', 'mode', 'on', 'brightness', 'pulse')
+MODES = {'constant': False, 'strobe': True}
+
+
+def load_config(path):
+    """Reads a fleet description from a .toml or .json file."""
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise ImportError('Reading TOML needs Python 3.11 or the tomli package')
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def _entries(config):
+    """Merges the defaults into each controller entry and checks it."""
+    defaults = config.get('defaults', {})
+    entries = []
+    for i, controller in enumerate(config.get('controllers', [])):
+        entry = dict(defaults, **controller)
+        unknown = set(entry) - set(KEYS)
+        if unknown:
+            raise ValueError('Unknown controller setting(s): {}'.format(', '.join(sorted(unknown))))
+        if ('ip' in entry) == ('serial' in entry):
+            raise ValueError('Controller {} needs either ip or serial'.format(entry.get('name', i)))
+        entry.setdefault('name', entry.get('ip') or entry.get('serial'))
+        entry.setdefault('family', 'pmd_8te')
+        if entry['family'] not in FAMILIES:
+            raise ValueError('Unsupported family for {}: {!r}'.format(entry['name'], entry['family']))
+        if entry.get('mode') is not None and entry['mode'] not in MODES:
+            raise ValueError("mode must be 'constant' or 'strobe'")
+        for key in ('brightness', 'pulse'):
+            if entry.get(key) is not None and len(entry[key]) != p.CHANNELS:
+                raise ValueError('{} of {} needs {} values'.format(key, entry['name'], p.CHANNELS))
+        entries.append(entry)
+    names = [entry['name'] for entry in entries]
+    if len(set(names)) != len(names):
+        raise ValueError('Controller names must be unique')
+    return entries
+
+
+class DeviceStartup:
+    """
+    Startup of one controller: seconds spent connecting and applying its
+    initial state, and the first failing return code (1 if all went well).
+    A controller still starting at the deadline has timed_out set and no
+    timings or code.
+    """
+    __slots__ = ('name', 'device', 'connect', 'apply', 'code', 'timed_out', 'error')
+
+    def __init__(self, name, device=None, connect=0.0, apply=0.0, code=None, timed_out=False, error=None):
+        self.name = name
+        self.device = device
+        self.connect = connect
+        self.apply = apply
+        self.code = code
+        self.timed_out = timed_out
+        self.error = error
+
+    @property
+    def total(self):
+        return self.connect + self.apply
+
+    @property
+    def ok(self):
+        return self.code == p.RC_OK and not self.timed_out
+
+    def __repr__(self):
+        return 'DeviceStartup({!r}, connect={:.4f}, apply={:.4f}, code={!r}, timed_out={!r})'.format(
+            self.name, self.connect, self.apply, self.code, self.timed_out)
+
+
+class StartupReport:
+    """
+    Per-controller startup timings, in configuration order.
+
+    `late` collects the startups of timed-out controllers as they finish in
+    the background, with their real timings. Their connections are closed,
+    since the fleet does not include them.
+    """
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+        self.late = []
+
+    @property
+    def ok(self):
+        return all(r.ok for r in self.results)
+
+    @property
+    def failures(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def slowest(self):
+        return max(self.results, key=lambda r: r.total) if self.results else None
+
+    def summary(self):
+        """
+        Returns the device and failure counts, the wall time, the slowest
+        controller and the summed device time, i.e. the startup time if the
+        controllers had been brought up one after another.
+        """
+        slowest = self.slowest
+        return {
+            'devices': len(self.results),
+            'failures': len(self.failures),
+            'timed_out': sum(1 for r in self.results if r.timed_out),
+            'late': len(self.late),
+            'elapsed': self.elapsed,
+            'slowest': slowest.name if slowest else None,
+            'slowest_seconds': slowest.total if slowest else 0.0,
+            'sequential_seconds': sum(r.total for r in self.results),
+        }
+
+    def table(self):
+        """The timings as a text table, slowest first."""
+        lines = ['{:<24} {:>9} {:>9} {:>9}  {}'.format('controller', 'connect', 'apply', 'total', 'result')]
+        for r in sorted(self.results, key=lambda r: -r.total):
+            if r.timed_out:
+                lines.append('{:<24} {:>9} {:>9} {:>9}  timed out'.format(r.name, '-', '-', '-'))
+                continue
+            result = 'ok' if r.ok else r.error or 'rc {}'.format(r.code)
+            lines.append('{:<24} {:>8.1f}ms {:>7.1f}ms {:>7.1f}ms  {}'.format(
+                r.name, r.connect * 1e3, r.apply * 1e3, r.total * 1e3, result))
+        return '\n'.join(lines)
+
+    def __iter__(self):
+        return iter(self.results)
+
+
+def _bring_up_one(controller, entry):
+    start = time.monotonic()
+    try:
+        if 'serial' in entry:
+            handle = controller.connect_serial(entry['serial'], entry.get('baud', 19200))
+            device = Device(entry['name'], 0, handle, entry['family'])
+        else:
+            handle = controller.connect_net(entry['ip'], entry.get('port', 8899))
+            device = Device(entry['name'], handle, None, entry['family'])
+    except Exception as e:
+        return DeviceStartup(entry['name'], connect=time.monotonic() - start, error=e)
+    connected = time.monotonic()
+    if not handle:
+        return DeviceStartup(entry['name'], connect=connected - start, code=p.RC_NO_REPLY, error='connection failed')
+
+    mode = entry.get('mode')
+    profile = Profile(MODES[mode] if mode is not None else None, entry.get('on'),
+                      entry.get('brightness'), entry.get('pulse'))
+    code = p.RC_OK
+    error = None
+    try:
+        for step in profile.steps(controller, device):
+            rc = step()
+            if rc != p.RC_OK:
+                code = rc
+                break
+    except Exception as e:
+        code, error = None, e
+    return DeviceStartup(entry['name'], device, connected - start, time.monotonic() - connected, code, error=error)
+
+
+def _close_late(controller, entry, report, future):
+    """Done callback of a bring-up that missed the deadline: records it and closes its connection."""
+    if future.cancelled():
+        return
+    startup = future.result()
+    device = startup.device
+    try:
+        if device is not None and 'serial' in entry:
+            controller.close_serial(entry['serial'], device.com_handle)
+        elif device is not None:
+            controller.close_net(device.socket_handle)
+    except Exception:
+        pass
+    report.late.append(startup)
+
+
+def bring_up(controller, config, max_workers=16, deadline=None):
+    """
+    Connects every controller of a fleet description and applies its initial
+    mode, on/off state and channel values, all controllers concurrently.
+    PM-D-8TE values are sent with SetAll frames.
+    Args:
+        controller (RseeController): The controller used for every call.
+        config (dict): A fleet description, e.g. from load_config().
+        max_workers (int): Controllers brought up at once.
+        deadline (float, optional): Seconds allowed for the whole bring-up; later
+                                    controllers are reported as timed out, and
+                                    closed once they finish (see StartupReport.late).
+    Returns (fleet, report): a Fleet of the controllers that connected, in
+    configuration order, and the StartupReport.
+    """
+    entries = _entries(config)
+    start = time.monotonic()
+    fleet = Fleet(controller, [], max_workers)
+    futures = {fleet.submit(_bring_up_one, controller, entry): i for i, entry in enumerate(entries)}
+    done, not_done = wait(futures, deadline)
+    results = [None] * len(entries)
+    for future in done:
+        results[futures[future]] = future.result()
+    for future in not_done:
+        results[futures[future]] = DeviceStartup(entries[futures[future]]['name'], timed_out=True)
+    report = StartupReport(results, time.monotonic() - start)
+    for future in not_done:
+        # Running calls cannot be interrupted; they finish in the background.
+        if not future.cancel():
+            future.add_done_callback(partial(_close_late, controller, entries[futures[future]], report))
+    fleet.devices = [r.device for r in results if r.device is not None and not r.timed_out]
+    return fleet, report
@@ -0,0 +1,213 @@
+import threading
+import time
+
+from . import protocol as p
+from .transport import TransportLayer
+
+
+class _Registers:
+    """Last known PM-D-8TE state of one controller, with the time each value was seen."""
+
+    __slots__ = ('brt', 'brt_at', 'pls', 'pls_at', 'mode', 'mode_at')
+
+    def __init__(self):
+        self.brt = [None] * p.CHANNELS
+        self.brt_at = [0.0] * p.CHANNELS
+        self.pls = [None] * p.CHANNELS
+        self.pls_at = [0.0] * p.CHANNELS
+        self.mode = None
+        self.mode_at = 0.0
+
+    def clear_channels(self):
+        self.brt = [None] * p.CHANNELS
+        self.pls = [None] * p.CHANNELS
+
+
+class ShadowCache(TransportLayer):
+    """
+    Per-handle shadow registers for PM-D-8TE brightness, pulse width and
+    mode (which also carries on/off).
+
+    Writes that would not change a cached value are dropped and reported as
+    successful, and reads are answered from the cache while the value is
+    younger than `ttl`. A handle's entries are invalidated when it is
+    (re)connected or closed, its channel values on ChangeMode, and
+    everything on a failed write. Install it with RseeController.enable_cache.
+    """
+    def __init__(self, ttl=1.0):
+        """
+        Args:
+            ttl (float, optional): Seconds a cached value stays valid. None never expires.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.suppressed_writes = 0
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, at, now):
+        return self.ttl is None or now - at < self.ttl
+
+    def _registers(self, key):
+        regs = self._devices.get(key)
+        if regs is None:
+            regs = self._devices[key] = _Registers()
+        return regs
+
+    def invalidate(self, socket_handle=None, com_handle=None):
+        """Forgets one handle, or every handle if none is given."""
+        with self._lock:
+            if socket_handle is None and com_handle is None:
+                self._devices.clear()
+            else:
+                self._devices.pop((com_handle or 0, socket_handle or 0), None)
+
+    def values(self, socket_handle, kind, com_handle=None):
+        """Returns all 8 cached 'brt' or 'pls' values, or None unless every one is fresh."""
+        now = time.monotonic()
+        with self._lock:
+            regs = self._devices.get((com_handle or 0, socket_handle))
+            if regs is None:
+                return None
+            values, stamps = (regs.brt, regs.brt_at) if kind == 'brt' else (regs.pls, regs.pls_at)
+            if any(v is None or not self._fresh(t, now) for v, t in zip(values, stamps)):
+                return None
+            return list(values)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'suppressed_writes': self.suppressed_writes,
+                'handles': len(self._devices),
+            }
+
+    # --- Channel registers ---
+    def _set_channel(self, func, values_attr, com_handle, socket_handle, channel, value):
+        if not 1 <= channel <= p.CHANNELS:
+            # No register to cache; the device judges the channel
+            return func(com_handle, socket_handle, channel, value)
+        key = (com_handle or 0, socket_handle)
+        now = time.monotonic()
+        with self._lock:
+            regs = self._devices.get(key)
+            if regs is not None:
+                i = channel - 1
+                if getattr(regs, values_attr)[i] == value and self._fresh(getattr(regs, values_attr + '_at')[i], now):
+                    self.suppressed_writes += 1
+                    return p.RC_OK
+        rc = func(com_handle, socket_handle, channel, value)
+        with self._lock:
+            if rc == p.RC_OK:
+                regs = self._registers(key)
+                getattr(regs, values_attr)[channel - 1] = value
+                getattr(regs, values_attr + '_at')[channel - 1] = time.monotonic()
+            elif rc != p.RC_BAD_ARGUMENT:
+                self._devices.pop(key, None)
+        return rc
+
+    def _set_all(self, func, values_attr, com_handle, socket_handle, array):
+        key = (com_handle or 0, socket_handle)
+        values = list(array[:p.CHANNELS])
+        now = time.monotonic()
+        with self._lock:
+            regs = self._devices.get(key)
+            if regs is not None and getattr(regs, values_attr) == values and all(
+                    self._fresh(t, now) for t in getattr(regs, values_attr + '_at')):
+                self.suppressed_writes += 1
+                return p.RC_OK
+        rc = func(com_handle, socket_handle, array)
+        with self._lock:
+            if rc == p.RC_OK:
+                regs = self._registers(key)
+                setattr(regs, values_attr, values)
+                setattr(regs, values_attr + '_at', [time.monotonic()] * p.CHANNELS)
+            elif rc != p.RC_BAD_ARGUMENT:
+                self._devices.pop(key, None)
+        return rc
+
+    def _read_channel(self, func, values_attr, com_handle, socket_handle, channel):
+        if not 1 <= channel <= p.CHANNELS:
+            return func(com_handle, socket_handle, channel)
+        key = (com_handle or 0, socket_handle)
+        now = time.monotonic()
+        with self._lock:
+            regs = self._devices.get(key)
+            if regs is not None:
+                value = getattr(regs, values_attr)[channel - 1]
+                if value is not None and self._fresh(getattr(regs, values_attr + '_at')[channel - 1], now):
+                    self.hits += 1
+                    return value
+            self.misses += 1
+        value = func(com_handle, socket_handle, channel)
+        if value >= 0:
+            with self._lock:
+                regs = self._registers(key)
+                getattr(regs, values_attr)[channel - 1] = value
+                getattr(regs, values_attr + '_at')[channel - 1] = time.monotonic()
+        return value
+
+    def RseeController_PM_D_8TE_BRTSetChannel(self, com_handle, socket_handle, channel, value):
+        return self._set_channel(self.inner.RseeController_PM_D_8TE_BRTSetChannel, 'brt',
+                                 com_handle, socket_handle, channel, value)
+
+    def RseeController_PM_D_8TE_BRTSetAll(self, com_handle, socket_handle, values):
+        return self._set_all(self.inner.RseeController_PM_D_8TE_BRTSetAll, 'brt',
+                             com_handle, socket_handle, values)
+
+    def RseeController_PM_D_8TE_BRTReadChannel(self, com_handle, socket_handle, channel):
+        return self._read_channel(self.inner.RseeController_PM_D_8TE_BRTReadChannel, 'brt',
+                                  com_handle, socket_handle, channel)
+
+    def RseeController_PM_D_8TE_PLSSetChannel(self, com_handle, socket_handle, channel, value):
+        return self._set_channel(self.inner.RseeController_PM_D_8TE_PLSSetChannel, 'pls',
+                                 com_handle, socket_handle, channel, value)
+
+    def RseeController_PM_D_8TE_PLSSetAll(self, com_handle, socket_handle, values):
+        return self._set_all(self.inner.RseeController_PM_D_8TE_PLSSetAll, 'pls',
+                             com_handle, socket_handle, values)
+
+    def RseeController_PM_D_8TE_PLSReadChannel(self, com_handle, socket_handle, channel):
+        return self._read_channel(self.inner.RseeController_PM_D_8TE_PLSReadChannel, 'pls',
+                                  com_handle, socket_handle, channel)
+
+    # --- Mode ---
+    def RseeController_PM_D_8TE_ChangeMode(self, com_handle, socket_handle, mode):
+        key = (com_handle or 0, socket_handle)
+        now = time.monotonic()
+        with self._lock:
+            regs = self._devices.get(key)
+            if regs is not None and regs.mode == mode and self._fresh(regs.mode_at, now):
+                self.suppressed_writes += 1
+                return p.RC_OK
+        rc = self.inner.RseeController_PM_D_8TE_ChangeMode(com_handle, socket_handle, mode)
+        with self._lock:
+            if rc == p.RC_OK:
+                regs = self._registers(key)
+                regs.clear_channels()
+                regs.mode = mode
+                regs.mode_at = time.monotonic()
+            elif rc != p.RC_BAD_ARGUMENT:
+                self._devices.pop(key, None)
+        return rc
+
+    # --- Connections ---
+    def RseeController_ConnectNet(self, ip_address, port):
+        handle = self.inner.RseeController_ConnectNet(ip_address, port)
+        self.invalidate(socket_handle=handle)
+        return handle
+
+    def RseeController_CloseNet(self, net_handle):
+        self.invalidate(socket_handle=net_handle)
+        return self.inner.RseeController_CloseNet(net_handle)
+
+    def RseeController_OpenCom(self, port_name, baud_rate, overlapped):
+        handle = self.inner.RseeController_OpenCom(port_name, baud_rate, overlapped)
+        self.invalidate(com_handle=handle)
+        return handle
+
+    def RseeController_CloseCom(self, port_name, com_handle):
+        self.invalidate(com_handle=com_handle)
+        return self.inner.RseeController_CloseCom(port_name, com_handle)
@@ -0,0 +1,255 @@
+"""
+Finds PM-D-4TE/8TE controllers on the network and keeps a registry of them.
+
+    controllers = find_controllers('controllers.json', ['192.168.1.0/24'], ports=[8899])
+
+The first run scans the address ranges; later runs only re-probe the
+cached controllers, in parallel, and scan again when any of them (or more
+than allowed) does not answer. Controllers that miss a run stay in the
+registry with the time they were last seen.
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import time
+
+from . import protocol as p
+
+# Info text prefix -> device family, as used by Fleet and the wrapper
+MODELS = (
+    ('PM-D-8TE', 'pmd_8te'),
+    ('PM-D-4TE', 'pmd_8te'),
+)
+
+REGISTRY_VERSION = 1
+
+
+def family_of(info):
+    """The device family of a ReadInfo text, or '' if it is not recognised."""
+    for prefix, family in MODELS:
+        if info.startswith(prefix):
+            return family
+    return ''
+
+
+class Controller:
+    """A controller that answered the info probe."""
+
+    __slots__ = ('ip', 'port', 'family', 'info', 'latency', 'seen')
+
+    def __init__(self, ip, port, family='', info='', latency=0.0, seen=0.0):
+        self.ip = ip
+        self.port = port
+        self.family = family
+        self.info = info
+        self.latency = latency
+        self.seen = seen
+
+    @property
+    def name(self):
+        return '{}:{}'.format(self.ip, self.port)
+
+    def to_dict(self):
+        return {'ip': self.ip, 'port': self.port, 'family': self.family, 'info': self.info, 'seen': self.seen}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['ip'], int(d['port']), d.get('family', ''), d.get('info', ''), seen=d.get('seen', 0.0))
+
+    def __repr__(self):
+        return 'Controller({!r}, {}, family={!r}, info={!r})'.format(self.ip, self.port, self.family, self.info)
+
+
+def addresses(targets):
+    """
+    Expands targets into IP strings. A target is an address ('192.168.1.100'),
+    a network ('192.168.1.0/24', hosts only) or a last-octet range
+    ('192.168.1.10-50').
+    """
+    for target in targets:
+        if '/' in target:
+            for host in ipaddress.ip_network(target, strict=False).hosts():
+                yield str(host)
+        elif '-' in target:
+            base, last = target.rsplit('-', 1)
+            first = ipaddress.ip_address(base)
+            for i in range(int(str(first).rsplit('.', 1)[1]), int(last) + 1):
+                yield '{}.{}'.format(str(first).rsplit('.', 1)[0], i)
+        else:
+            yield str(ipaddress.ip_address(target))
+
+
+async def probe(ip, port, connect_timeout=0.3, info_timeout=0.3, info_idle=0.05):
+    """
+    Connects to ip:port and sends the ReadInfo frame. Returns a Controller
+    if the info text names a known model (see MODELS), otherwise None.
+    """
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), connect_timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    data = b''
+    try:
+        writer.write(p.INFO_FRAME)
+        # The reply has no terminator; it ends when the line goes quiet.
+        wait = info_timeout
+        while len(data) < p.INFO_MAX:
+            try:
+                chunk = await asyncio.wait_for(reader.read(p.INFO_MAX - len(data)), wait)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            data += chunk
+            wait = info_idle
+    except OSError:
+        pass
+    finally:
+        writer.close()
+    info = data.decode('ascii', 'replace').strip('\0 \r\n')
+    family = family_of(info)
+    if not family:
+        # Silent, or another service that sends a banner
+        return None
+    return Controller(ip, port, family, info, loop.time() - start, time.time())
+
+
+async def scan_async(candidates, concurrency=256, **probe_args):
+    """Probes (ip, port) pairs with at most `concurrency` connections open. Returns the Controllers found."""
+    candidates = iter(candidates)
+    found = []
+
+    async def worker():
+        for ip, port in candidates:
+            controller = await probe(ip, port, **probe_args)
+            if controller is not None:
+                found.append(controller)
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    found.sort(key=lambda c: (ipaddress.ip_address(c.ip), c.port))
+    return found
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def discover(targets, ports=(8899,), concurrency=256, connect_timeout=0.3, info_timeout=0.3):
+    """
+    Scans every port of every target address concurrently.
+    Args:
+        targets (list): Addresses, networks or ranges; see addresses().
+        ports (list): TCP ports to try on each address.
+        concurrency (int): Probes in flight at once.
+        connect_timeout (float): Seconds to wait for a TCP connection.
+        info_timeout (float): Seconds to wait for the info reply.
+    Returns the Controllers that answered, sorted by address.
+    """
+    candidates = ((ip, port) for ip in addresses(targets) for port in ports)
+    return _run(scan_async(candidates, concurrency, connect_timeout=connect_timeout, info_timeout=info_timeout))
+
+
+class Registry:
+    """
+    A JSON file of known controllers: ip, port, family, info and when each
+    was last seen, plus when the registry was last checked.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.controllers = []
+        self.checked = 0.0
+
+    def load(self):
+        """Reads the file. A missing or unreadable file gives an empty registry."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.controllers = []
+            return self
+        if data.get('version') != REGISTRY_VERSION:
+            self.controllers = []
+            return self
+        self.controllers = [Controller.from_dict(d) for d in data.get('controllers', [])]
+        self.checked = data.get('checked', 0.0)
+        return self
+
+    def save(self):
+        """Writes the file atomically."""
+        data = {'version': REGISTRY_VERSION, 'checked': self.checked,
+                'controllers': [c.to_dict() for c in self.controllers]}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def validate(self, concurrency=64, connect_timeout=0.3, info_timeout=0.3):
+        """Re-probes the registered controllers in parallel. Returns those that answered."""
+        candidates = [(c.ip, c.port) for c in self.controllers]
+        return _run(scan_async(candidates, concurrency, connect_timeout=connect_timeout, info_timeout=info_timeout))
+
+    def answered_last_check(self):
+        """The registered controllers that answered when the registry was last checked."""
+        return [c for c in self.controllers if c.seen >= self.checked]
+
+    def merge(self, found, forget_after=None):
+        """
+        Updates the registry with controllers that answered. Registered
+        controllers that did not answer keep their entry and last-seen time.
+        Args:
+            found (list): Controllers from validate() or discover().
+            forget_after (float, optional): Drop entries not seen for this many seconds.
+        """
+        merged = {c.name: c for c in self.controllers}
+        merged.update((c.name, c) for c in found)
+        controllers = list(merged.values())
+        if forget_after is not None:
+            oldest = time.time() - forget_after
+            controllers = [c for c in controllers if c.seen >= oldest]
+        controllers.sort(key=lambda c: (ipaddress.ip_address(c.ip), c.port))
+        self.controllers = controllers
+        return self
+
+
+def find_controllers(path, targets, ports=(8899,), min_controllers=None, concurrency=256,
+                     connect_timeout=0.3, info_timeout=0.3, forget_after=None):
+    """
+    Returns the controllers that answered, using the registry cache when it is good.
+
+    The cached controllers are re-probed in parallel. If fewer than
+    min_controllers answer (or there is no cache) the targets are scanned
+    too. The answers are merged into the registry: controllers that did not
+    answer keep their entry, with the time they were last seen. A controller
+    that stays down therefore causes one rescan, not one on every startup.
+    Args:
+        path (str): The registry file.
+        targets (list): Addresses, networks or ranges to scan; see addresses().
+        ports (list): TCP ports to try on each address.
+        min_controllers (int, optional): Cached controllers that must answer to skip
+                                         the scan; None means as many as answered
+                                         at the previous check.
+        concurrency (int): Probes in flight at once.
+        connect_timeout (float): Seconds to wait for a TCP connection.
+        info_timeout (float): Seconds to wait for the info reply.
+        forget_after (float, optional): Drop registry entries not seen for this many seconds.
+    """
+    registry = Registry(path).load()
+    checked = time.time()
+    found = []
+    if registry.controllers:
+        found = registry.validate(concurrency, connect_timeout, info_timeout)
+    needed = len(registry.answered_last_check()) if min_controllers is None else min_controllers
+    if not registry.controllers or len(found) < needed:
+        answered = {c.name: c for c in found}
+        answered.update((c.name, c) for c in discover(targets, ports, concurrency, connect_timeout, info_timeout))
+        found = sorted(answered.values(), key=lambda c: (ipaddress.ip_address(c.ip), c.port))
+    registry.merge(found, forget_after)
+    registry.checked = checked
+    registry.save()
+    return found
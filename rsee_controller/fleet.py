@@ -0,0 +1,278 @@
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+from . import protocol as p
+
+FAMILIES = ('pmd_8te', 'pms')
+
+
+def _int32_view(buf):
+    """A flat int32 memoryview of a C-contiguous int32 buffer. Raises ValueError for any other buffer."""
+    view = memoryview(buf)
+    if view.itemsize != 4 or view.format.lstrip('@=<') not in ('i', 'l') or not view.c_contiguous:
+        raise ValueError('out must be a C-contiguous int32 buffer, got format {!r} with itemsize {}'.format(
+            view.format, view.itemsize))
+    return view.cast('B').cast('i')
+
+
+class Device:
+    """One controller of a fleet: a name, its handles and its family ('pmd_8te' or 'pms')."""
+
+    __slots__ = ('name', 'socket_handle', 'com_handle', 'family')
+
+    def __init__(self, name, socket_handle=None, com_handle=None, family='pmd_8te'):
+        if family not in FAMILIES:
+            raise ValueError("Unsupported fleet family: {!r}".format(family))
+        self.name = name
+        self.socket_handle = socket_handle
+        self.com_handle = com_handle
+        self.family = family
+
+    def __repr__(self):
+        return 'Device({!r}, socket_handle={!r}, com_handle={!r}, family={!r})'.format(
+            self.name, self.socket_handle, self.com_handle, self.family)
+
+
+class Profile:
+    """
+    A lighting recipe. Fields left as None are not sent.
+
+    PM-D-8TE units get the mode, on/off state and brightness or pulse
+    values as SetAll frames. PM-S units get `strobe` as SetMode and the
+    brightness values per channel; they have no on/off or pulse setting.
+    """
+    def __init__(self, strobe=None, on=None, brightness=None, pulse=None):
+        """
+        Args:
+            strobe (bool, optional): True for strobe mode, False for constant light.
+            on (bool, optional): Overall output on or off.
+            brightness (list, optional): Brightness of each channel.
+            pulse (list, optional): Pulse width of each channel.
+        """
+        self.strobe = strobe
+        self.on = on
+        self.brightness = brightness
+        self.pulse = pulse
+
+    def steps(self, controller, device):
+        """Returns the calls that apply this profile to one device, in order."""
+        com, net = device.com_handle, device.socket_handle
+        steps = []
+        if device.family == 'pmd_8te':
+            if self.strobe is not None:
+                steps.append(lambda: controller.pmd_8te_set_strobe_mode(com, net, self.strobe))
+            if self.on is not None:
+                steps.append(lambda: controller.pmd_8te_set_onoff_mode(com, net, self.on))
+            if self.brightness is not None:
+                steps.append(lambda: controller.pmd_8te_brt_set_all(net, self.brightness, com))
+            if self.pulse is not None:
+                steps.append(lambda: controller.pmd_8te_pls_set_all(net, self.pulse, com))
+        elif device.family == 'pms':
+            if self.strobe is not None:
+                steps.append(lambda: controller.pms_set_mode(net, self.strobe, com))
+            for channel, value in enumerate(self.brightness or (), start=1):
+                steps.append(lambda channel=channel, value=value: controller.pms_set_channel(net, channel, value, com))
+        return steps
+
+
+class DeviceResult:
+    """
+    Outcome of applying a profile to one device.
+    code is the first failing return code (1 if every call succeeded, None
+    if the device was not reached before the deadline), latency the seconds
+    spent on the device and attempts the number of tries.
+    """
+    __slots__ = ('name', 'code', 'latency', 'timed_out', 'attempts', 'error')
+
+    def __init__(self, name, code=None, latency=0.0, timed_out=False, attempts=1, error=None):
+        self.name = name
+        self.code = code
+        self.latency = latency
+        self.timed_out = timed_out
+        self.attempts = attempts
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.code == p.RC_OK and not self.timed_out
+
+    def __repr__(self):
+        return 'DeviceResult({!r}, code={!r}, latency={:.4f}, timed_out={!r}, attempts={})'.format(
+            self.name, self.code, self.latency, self.timed_out, self.attempts)
+
+
+class FleetResult:
+    """Per-device results of one Fleet.apply, in device order."""
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return all(r.ok for r in self.results)
+
+    @property
+    def failures(self):
+        return [r for r in self.results if not r.ok]
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+
+class Fleet:
+    """
+    Applies one profile to many controllers in parallel.
+
+    Each device's calls run in order on a bounded thread pool, so the
+    changeover takes about as long as the slowest device rather than the
+    sum over all of them. Devices still running at the deadline are
+    reported as timed out and a hung one never delays the others.
+
+        fleet = Fleet(controller, [Device('cam1', h1), Device('cam2', h2)])
+        result = fleet.apply(Profile(strobe=False, on=True, brightness=[255] * 8), deadline=2.0)
+    """
+    def __init__(self, controller, devices, max_workers=16):
+        """
+        Args:
+            controller (RseeController): The controller used for every call.
+            devices (list): Device entries.
+            max_workers (int): Devices worked on at once.
+        """
+        self.controller = controller
+        self.devices = list(devices)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='rsee-fleet')
+
+    def _apply_one(self, device, steps, deadline_at, attempt):
+        start = time.monotonic()
+        try:
+            for step in steps:
+                if deadline_at is not None and time.monotonic() >= deadline_at:
+                    return DeviceResult(device.name, None, time.monotonic() - start, True, attempt)
+                rc = step()
+                if rc != p.RC_OK:
+                    return DeviceResult(device.name, rc, time.monotonic() - start, attempts=attempt)
+        except Exception as e:
+            return DeviceResult(device.name, None, time.monotonic() - start, attempts=attempt, error=e)
+        return DeviceResult(device.name, p.RC_OK, time.monotonic() - start, attempts=attempt)
+
+    def apply_steps(self, device, steps, deadline_at=None):
+        """
+        Runs one device's calls in order on the fleet's pool, stopping at the
+        first that does not return RC_OK.
+        Args:
+            device (Device): The device the calls address, for the result.
+            steps (list): Callables returning a return code, e.g. from Profile.steps().
+            deadline_at (float, optional): A time.monotonic() value; steps due after it
+                                           are not sent and the result is timed out.
+        Returns a Future of the device's DeviceResult.
+        """
+        return self._executor.submit(self._apply_one, device, steps, deadline_at, 1)
+
+    def apply(self, profile, deadline=None, retries=0, devices=None):
+        """
+        Sends a profile to every device.
+        Args:
+            profile (Profile): The recipe to apply.
+            deadline (float, optional): Seconds allowed for the whole fleet.
+            retries (int): Extra attempts for devices that failed, within the deadline.
+                           Timed-out devices are not retried.
+            devices (list, optional): A subset of devices; defaults to the whole fleet.
+        Returns a FleetResult.
+        """
+        devices = self.devices if devices is None else list(devices)
+        start = time.monotonic()
+        deadline_at = None if deadline is None else start + deadline
+        results = {}
+        pending = devices
+        for attempt in range(1, retries + 2):
+            futures = {self._executor.submit(self._apply_one, d, profile.steps(self.controller, d),
+                                             deadline_at, attempt): d for d in pending}
+            timeout = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+            done, not_done = wait(futures, timeout)
+            for future in done:
+                results[id(futures[future])] = future.result()
+            for future in not_done:
+                # Running calls cannot be interrupted; they finish in the background.
+                future.cancel()
+                device = futures[future]
+                results[id(device)] = DeviceResult(device.name, None, time.monotonic() - start, True, attempt)
+            pending = [d for d in pending if not results[id(d)].ok and not results[id(d)].timed_out]
+            if not pending or (deadline_at is not None and time.monotonic() >= deadline_at):
+                break
+        return FleetResult([results[id(d)] for d in devices], time.monotonic() - start)
+
+    def read_matrix(self, kind='brt', out=None, deadline=None):
+        """
+        Reads every channel of every device in parallel into one
+        (devices x 8) int32 matrix, one row per device in fleet order.
+        PM-D-8TE rows use the multi-channel reads; PM-S rows use per-channel
+        reads ('brt' only; their 'pls' rows hold RC_BAD_ARGUMENT). A failed
+        channel holds a negative return code, and the rows of devices still
+        running at the deadline hold RC_TIMEOUT.
+        Args:
+            kind (str): 'brt' for brightness or 'pls' for pulse width.
+            out (optional): A C-contiguous int32 buffer of len(devices) * 8 values,
+                            e.g. np.empty((n, 8), np.int32). A new array('i') if None.
+            deadline (float, optional): Seconds allowed for the whole fleet.
+        Returns (FleetResult, matrix), where the matrix is out or the new array.
+        """
+        if kind not in ('brt', 'pls'):
+            raise ValueError("kind must be 'brt' or 'pls'")
+        start = time.monotonic()
+        if out is None:
+            out = array('i', bytes(4 * p.CHANNELS * len(self.devices)))
+        flat = _int32_view(out)
+        if len(flat) < p.CHANNELS * len(self.devices):
+            raise ValueError('out holds {} values, {} needed'.format(len(flat), p.CHANNELS * len(self.devices)))
+        ctl = self.controller
+
+        def read_row(device, row):
+            com, net = device.com_handle, device.socket_handle
+            if device.family == 'pms':
+                return ctl.read_all_channels('pms', net, com, out=row)[0]
+            if kind == 'pls':
+                return ctl.pmd_8te_read_all_pulse(net, row, com)[0]
+            return ctl.pmd_8te_read_all_brightness(net, row, com)[0]
+
+        results = [None] * len(self.devices)
+        futures = {}
+        rows = {}
+        for i, device in enumerate(self.devices):
+            if device.family == 'pms' and kind == 'pls':
+                results[i] = DeviceResult(device.name, p.RC_BAD_ARGUMENT)
+                flat[i * p.CHANNELS:(i + 1) * p.CHANNELS] = array('i', [p.RC_BAD_ARGUMENT] * p.CHANNELS)
+                continue
+            # Workers fill private rows: one that misses the deadline must not
+            # write into out after this call has returned.
+            row = rows[i] = array('i', bytes(4 * p.CHANNELS))
+            futures[self._executor.submit(self._apply_one, device, [partial(read_row, device, row)], None, 1)] = i
+        done, not_done = wait(futures, deadline)
+        for future in done:
+            i = futures[future]
+            results[i] = future.result()
+            flat[i * p.CHANNELS:(i + 1) * p.CHANNELS] = rows[i]
+        for future in not_done:
+            future.cancel()
+            i = futures[future]
+            results[i] = DeviceResult(self.devices[i].name, None, time.monotonic() - start, True)
+            flat[i * p.CHANNELS:(i + 1) * p.CHANNELS] = array('i', [p.RC_TIMEOUT] * p.CHANNELS)
+        return FleetResult(results, time.monotonic() - start), out
+
+    def submit(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on the fleet's worker pool and returns its Future."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
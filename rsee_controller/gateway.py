@@ -0,0 +1,602 @@
+"""
+A gateway process that owns the controller connections and serves the
+RseeController methods to other processes over a Unix-domain socket.
+
+    python -m rsee_controller.gateway --socket /run/rsee.sock --transport socket
+
+    client = GatewayClient('/run/rsee.sock')
+    h = client.connect_net('192.168.1.100', 8899)     # shared with every other client
+    client.pmd_8te_brt_set_channel(h, 1, 255)
+
+Frames are a 4-byte length and a 4-byte request id followed by the payload:
+
+    request   method id (uint16), then the args and kwargs as values
+    response  status (uint8, 0 ok / 1 error), then the result or (type, message)
+    hello     sent by the gateway on connect with request id 0: the method names
+
+Values are tagged: N None, T/F bool, i int64, d double, b bytes, s str,
+a int32 array, l tuple, D dict.
+"""
+import argparse
+import asyncio
+import builtins
+import contextlib
+import inspect
+import itertools
+import os
+import socket
+import stat
+import struct
+import threading
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import protocol as p
+
+FRAME = struct.Struct('<II')
+_INT64 = struct.Struct('<q')
+_DOUBLE = struct.Struct('<d')
+_COUNT = struct.Struct('<I')
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+_METHOD = struct.Struct('<H')
+
+# Wrapper methods not served: they configure the gateway's own controller
+# or return objects bound to it.
+_LOCAL = ('batch', 'stubs')
+_HANDLE_PARAMS = ('com_handle', 'socket_handle', 'net_handle')
+# Connection calls, answered from the gateway's shared connections
+_CONNECT = ('connect_net', 'open_com', 'connect_serial')
+_CLOSE = ('close_net', 'close_com', 'close_serial')
+# Results that mean a connection is no longer usable
+_LOST = (p.RC_BAD_HANDLE, p.RC_BAD_REPLY, p.RC_TIMEOUT)
+
+
+def served_methods(controller_class):
+    """The names of the RseeController methods a gateway serves, in a stable order."""
+    return sorted(name for name, member in inspect.getmembers(controller_class, callable)
+                  if not name.startswith(('_', 'enable_', 'disable_')) and name not in _LOCAL)
+
+
+# --- Encoding ---
+def pack_value(value, out):
+    """Appends one tagged value to the bytearray out."""
+    if value is None:
+        out += b'N'
+    elif value is True:
+        out += b'T'
+    elif value is False:
+        out += b'F'
+    elif isinstance(value, int):
+        out += b'i'
+        out += _INT64.pack(value)
+    elif isinstance(value, float):
+        out += b'd'
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, (bytes, bytearray)):
+        out += b'b'
+        out += _COUNT.pack(len(value))
+        out += value
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out += b's'
+        out += _COUNT.pack(len(data))
+        out += data
+    elif isinstance(value, dict):
+        out += b'D'
+        out += _COUNT.pack(len(value))
+        for key, item in value.items():
+            pack_value(key, out)
+            pack_value(item, out)
+    elif isinstance(value, tuple) or isinstance(value, list) and not _int32_list(value):
+        # Tuples such as (rc, value) results keep their items' own types
+        out += b'l'
+        out += _COUNT.pack(len(value))
+        for item in value:
+            pack_value(item, out)
+    else:
+        # Int arrays: int32 lists, array('i'), ctypes arrays, NumPy rows
+        values = value if isinstance(value, array) and value.typecode == 'i' else array('i', value)
+        out += b'a'
+        out += _COUNT.pack(len(values))
+        out += values.tobytes()
+
+
+def _int32_list(values):
+    return all(isinstance(v, int) and not isinstance(v, bool) and _INT32_MIN <= v <= _INT32_MAX for v in values)
+
+
+def unpack_value(buf, offset=0):
+    """Decodes one tagged value at buf[offset]. Returns (value, next offset)."""
+    tag = buf[offset:offset + 1]
+    offset += 1
+    if tag == b'N':
+        return None, offset
+    if tag == b'T':
+        return True, offset
+    if tag == b'F':
+        return False, offset
+    if tag == b'i':
+        return _INT64.unpack_from(buf, offset)[0], offset + 8
+    if tag == b'd':
+        return _DOUBLE.unpack_from(buf, offset)[0], offset + 8
+    n = _COUNT.unpack_from(buf, offset)[0]
+    offset += 4
+    if tag == b'b':
+        return bytes(buf[offset:offset + n]), offset + n
+    if tag == b's':
+        return bytes(buf[offset:offset + n]).decode('utf-8'), offset + n
+    if tag == b'a':
+        values = array('i')
+        values.frombytes(bytes(buf[offset:offset + 4 * n]))
+        return values, offset + 4 * n
+    if tag == b'l':
+        items = []
+        for _ in range(n):
+            item, offset = unpack_value(buf, offset)
+            items.append(item)
+        return tuple(items), offset
+    if tag == b'D':
+        d = {}
+        for _ in range(n):
+            key, offset = unpack_value(buf, offset)
+            d[key], offset = unpack_value(buf, offset)
+        return d, offset
+    raise ValueError('Unknown value tag {!r}'.format(tag))
+
+
+def _frame(request_id, payload):
+    return FRAME.pack(len(payload), request_id) + payload
+
+
+def _lost(name, result):
+    """
+    Whether a call result says the connection it used is dead. Commands
+    other than reads also count RC_NO_REPLY, since a read may return 0
+    as a value.
+    """
+    rc = result[0] if isinstance(result, tuple) and result else result
+    if not isinstance(rc, int) or isinstance(rc, bool):
+        return False
+    return rc in _LOST or (rc == p.RC_NO_REPLY and 'read' not in name)
+
+
+class _Link:
+    """
+    A shared connection: the call that opens it and its live handle, 0
+    while it is down. `lock` is held while connecting and during calls.
+    """
+    __slots__ = ('method', 'args', 'kwargs', 'port_name', 'handle', 'lock', 'reconnects')
+
+    def __init__(self, method, args, kwargs, port_name):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.port_name = port_name
+        self.handle = 0
+        self.lock = threading.Lock()
+        self.reconnects = 0
+
+
+# --- Server ---
+class Gateway:
+    """
+    Serves one RseeController to any number of local client processes.
+
+    Each client connection may have many requests outstanding; responses
+    carry the request id and come back as soon as each call finishes.
+    Calls are routed by the handles they name: calls to one device run one
+    at a time, in arrival order, on that device's own worker thread, while
+    different devices run in parallel.
+
+    connect_net/open_com/connect_serial return one gateway handle per
+    address, shared by every client. The gateway maps it to the live
+    device handle and reconnects behind it: a call that fails with a
+    transport error, RC_BAD_HANDLE/RC_BAD_REPLY/RC_TIMEOUT or no reply, or a close
+    call from any client, closes the live connection, and the next call
+    on the gateway handle opens a new one.
+    """
+    def __init__(self, controller, path, mode=0o600):
+        """
+        Args:
+            controller (RseeController): The controller whose handles the gateway owns.
+            path (str): The Unix-domain socket path to listen on.
+            mode (int): Permissions of the socket file; the default allows only its owner.
+        """
+        self.controller = controller
+        self.path = path
+        self.mode = mode
+        self.methods = served_methods(type(controller))
+        self.stats = {'clients': 0, 'requests': 0, 'errors': 0}
+        self._signatures = {name: inspect.signature(getattr(controller, name)) for name in self.methods}
+        self._hello = bytearray()
+        pack_value(tuple(self.methods), self._hello)
+        self._links = {}
+        self._link_ids = {}
+        self._links_lock = threading.Lock()
+        self._devices = {}
+        self._general = ThreadPoolExecutor(max_workers=8, thread_name_prefix='rsee-gateway')
+        self._loop = None
+        self._server = None
+        self._thread = None
+        # (st_dev, st_ino) of the socket file we bound
+        self._bound = None
+
+    # --- Calls ---
+    def _device_key(self, name, args, kwargs):
+        """('com', handle) or ('net', handle) for calls that name a device, else None."""
+        try:
+            arguments = self._signatures[name].bind(*args, **kwargs).arguments
+        except TypeError:
+            return None
+        handles = {n: arguments.get(n) for n in _HANDLE_PARAMS if n in arguments}
+        if handles.get('com_handle'):
+            return 'com', handles['com_handle']
+        net = handles.get('socket_handle') or handles.get('net_handle')
+        return ('net', net) if net else None
+
+    def _executor(self, key):
+        if key is None:
+            return self._general
+        executor = self._devices.get(key)
+        if executor is None:
+            executor = self._devices[key] = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rsee-device')
+        return executor
+
+    def _call(self, name, args, kwargs):
+        if name in _CONNECT:
+            return self._connect(name, args, kwargs)
+        method = getattr(self.controller, name)
+        try:
+            bound = self._signatures[name].bind(*args, **kwargs)
+        except TypeError:
+            return method(*args, **kwargs)
+        arguments = bound.arguments
+        # Locks are taken in gateway handle order so two-handle calls cannot deadlock
+        links = [(self._links[link_id], n) for link_id, n in
+                 sorted((arguments.get(n), n) for n in _HANDLE_PARAMS if arguments.get(n) in self._links)]
+        if name in _CLOSE:
+            for link, _ in links:
+                with link.lock:
+                    self._evict(link)
+            return True
+        if not links:
+            return method(*args, **kwargs)
+        with contextlib.ExitStack() as stack:
+            for link, param in links:
+                stack.enter_context(link.lock)
+                arguments[param] = self._live(link)
+                if not arguments[param]:
+                    return p.RC_BAD_HANDLE
+            try:
+                result = method(*bound.args, **bound.kwargs)
+            except OSError:
+                for link, _ in links:
+                    self._evict(link)
+                raise
+            if _lost(name, result):
+                for link, _ in links:
+                    self._evict(link)
+            return result
+
+    def _connect(self, name, args, kwargs):
+        arguments = self._signatures[name].bind(*args, **kwargs).arguments
+        address = (arguments['ip_address'], arguments['port']) if name == 'connect_net' else (arguments['port_name'],)
+        key = (name == 'connect_net',) + tuple(a.decode() if isinstance(a, bytes) else a for a in address)
+        with self._links_lock:
+            link_id = self._link_ids.get(key)
+            if link_id is None:
+                link_id = self._link_ids[key] = len(self._link_ids) + 1
+                self._links[link_id] = _Link(name, args, kwargs, None if name == 'connect_net' else address[0])
+            link = self._links[link_id]
+        # Only callers of the same address wait for this connect
+        with link.lock:
+            return link_id if self._live(link) else 0
+
+    def _live(self, link):
+        """The link's live handle, connecting if it is down. The caller holds link.lock."""
+        if not link.handle:
+            link.handle = getattr(self.controller, link.method)(*link.args, **link.kwargs) or 0
+            if link.handle:
+                link.reconnects += 1
+        return link.handle
+
+    def _evict(self, link):
+        """Closes the link's live handle. The caller holds link.lock."""
+        handle, link.handle = link.handle, 0
+        if not handle:
+            return
+        try:
+            if link.port_name is None:
+                self.controller.close_net(handle)
+            else:
+                self.controller.close_com(link.port_name, handle)
+        except OSError:
+            pass
+
+    def links(self):
+        """Returns {gateway handle: (live handle, connects)} for every shared connection."""
+        return {link_id: (link.handle, link.reconnects) for link_id, link in self._links.items()}
+
+    async def _serve(self, reader, writer):
+        self.stats['clients'] += 1
+        writer.write(_frame(0, self._hello))
+        loop = asyncio.get_event_loop()
+        try:
+            while True:
+                header = await reader.readexactly(FRAME.size)
+                length, request_id = FRAME.unpack(header)
+                payload = await reader.readexactly(length)
+                self.stats['requests'] += 1
+                try:
+                    method = self.methods[_METHOD.unpack_from(payload)[0]]
+                    args, offset = unpack_value(payload, _METHOD.size)
+                    kwargs, _ = unpack_value(payload, offset)
+                except (IndexError, ValueError, struct.error) as e:
+                    self._respond(writer, request_id, e)
+                    continue
+                future = loop.run_in_executor(self._executor(self._device_key(method, args, kwargs)),
+                                              self._call, method, args, kwargs)
+                future.add_done_callback(lambda f, request_id=request_id: self._done(writer, request_id, f))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _done(self, writer, request_id, future):
+        if writer.transport.is_closing():
+            return
+        self._respond(writer, request_id, future.exception(), None if future.exception() else future.result())
+
+    def _respond(self, writer, request_id, error, result=None):
+        payload = bytearray()
+        if error is None:
+            payload += b'\0'
+            try:
+                pack_value(result, payload)
+            except (TypeError, ValueError, OverflowError) as e:
+                error = e
+                payload = bytearray()
+        if error is not None:
+            self.stats['errors'] += 1
+            payload += b'\1'
+            pack_value((type(error).__name__, str(error)), payload)
+        writer.write(_frame(request_id, bytes(payload)))
+
+    # --- Lifecycle ---
+    def _remove_stale(self):
+        """
+        Removes a socket left behind by a gateway that did not shut down
+        cleanly. Raises FileExistsError if the path is anything else or a
+        gateway is still listening on it.
+        """
+        try:
+            st = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+            raise FileExistsError('{} exists and is not our socket'.format(self.path))
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise FileExistsError('a gateway is already listening on {}'.format(self.path))
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # The umask keeps the socket private between bind and chmod
+        umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        os.chmod(self.path, self.mode)
+        st = os.lstat(self.path)
+        self._bound = (st.st_dev, st.st_ino)
+        return sock
+
+    async def start_async(self):
+        self._remove_stale()
+        self._server = await asyncio.start_unix_server(self._serve, sock=self._bind())
+        return self
+
+    def start(self):
+        """Serves on a background thread and returns once the socket is listening."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='rsee-gateway-loop', daemon=True)
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.start_async(), self._loop).result()
+        except BaseException:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._thread = None
+            raise
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        async def close():
+            self._server.close()
+            await self._server.wait_closed()
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+        for executor in list(self._devices.values()) + [self._general]:
+            executor.shutdown(wait=True)
+        for link in self._links.values():
+            with link.lock:
+                self._evict(link)
+        # Only our own socket: another gateway may have replaced it since
+        try:
+            st = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        if (st.st_dev, st.st_ino) == self._bound:
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- Client ---
+class GatewayClient:
+    """
+    A thin stand-in for RseeController that forwards every call to a
+    Gateway. It loads no DLL and holds no device connection, so it starts
+    at once. The wrapper's methods are available under the same names and
+    arguments, except that `out` buffers are not filled remotely, int32
+    arrays and lists come back as array('i'), and other lists as tuples.
+
+    The client is thread safe: calls from several threads share the
+    connection and are answered independently. submit() sends a call
+    without waiting and returns a concurrent.futures.Future.
+    """
+    def __init__(self, path, timeout=None):
+        """
+        Args:
+            path (str): The gateway's socket path.
+            timeout (float, optional): Seconds to wait for each call's result.
+        """
+        self.timeout = timeout
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count(1)
+        request_id, payload = self._read_frame()
+        self.methods = unpack_value(payload)[0]
+        self._method_ids = {name: i for i, name in enumerate(self.methods)}
+        self._reader = threading.Thread(target=self._read_loop, name='rsee-gateway-client', daemon=True)
+        self._reader.start()
+
+    def _recv_exactly(self, n):
+        data = bytearray()
+        while len(data) < n:
+            chunk = self._sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError('gateway closed the connection')
+            data += chunk
+        return data
+
+    def _read_frame(self):
+        length, request_id = FRAME.unpack(self._recv_exactly(FRAME.size))
+        return request_id, self._recv_exactly(length)
+
+    def _read_loop(self):
+        try:
+            while True:
+                request_id, payload = self._read_frame()
+                future = self._pending.pop(request_id, None)
+                if future is None:
+                    continue
+                value, _ = unpack_value(payload, 1)
+                if payload[0] == 0:
+                    future.set_result(value)
+                else:
+                    name, message = value
+                    error = getattr(builtins, name, None)
+                    if not (isinstance(error, type) and issubclass(error, Exception)):
+                        error = RuntimeError
+                    future.set_exception(error(message))
+        except (OSError, ConnectionError) as e:
+            for request_id in list(self._pending):
+                future = self._pending.pop(request_id, None)
+                if future is not None:
+                    future.set_exception(ConnectionError('gateway connection lost: {}'.format(e)))
+
+    def submit(self, method, *args, **kwargs):
+        """Sends one call and returns a Future of its result."""
+        payload = bytearray(_METHOD.pack(self._method_ids[method]))
+        pack_value(args, payload)
+        pack_value(kwargs, payload)
+        future = Future()
+        request_id = next(self._ids)
+        self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self._sock.sendall(_frame(request_id, payload))
+        except BaseException:
+            self._pending.pop(request_id, None)
+            raise
+        return future
+
+    def call(self, method, *args, **kwargs):
+        return self.submit(method, *args, **kwargs).result(self.timeout)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.__dict__.get('_method_ids', ()):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return self.submit(name, *args, **kwargs).result(self.timeout)
+        method.__name__ = name
+        self.__dict__[name] = method
+        return method
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._reader.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def default_path():
+    """$XDG_RUNTIME_DIR/rsee-gateway.sock, private to the user, else /tmp/rsee-gateway.sock."""
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or '/tmp', 'rsee-gateway.sock')
+
+
+def main(argv=None):
+    from .wrapper import RseeController
+    from .transport import SocketTransport
+
+    parser = argparse.ArgumentParser(description='Share Rsee controller connections with local processes.')
+    parser.add_argument('--socket', default=default_path(), help='Unix socket path to listen on')
+    parser.add_argument('--mode', type=lambda s: int(s, 8), default=0o600,
+                        help='socket file permissions in octal (default 600)')
+    parser.add_argument('--transport', choices=('dll', 'socket', 'serial'), default='dll',
+                        help='drive controllers through the DLL, SocketTransport or SerialTransport')
+    parser.add_argument('--dll', default=None, help='path to RseeController.dll')
+    args = parser.parse_args(argv)
+
+    if args.transport == 'socket':
+        controller = RseeController(transport=SocketTransport())
+    elif args.transport == 'serial':
+        from .serialport import SerialTransport
+        controller = RseeController(transport=SerialTransport())
+    else:
+        controller = RseeController(args.dll)
+    gateway = Gateway(controller, args.socket, args.mode).start()
+    print('Rsee gateway listening on {}'.format(args.socket), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Pre-bound call stubs for the per-call hot path.
+
+A stub object serves one controller handle. For each function of one
+device family it holds a functools.partial over the bound function with
+the handle arguments already applied, so a call is a single C-level call
+into ctypes (or the transport): no wrapper method, no attribute lookups
+on the DLL object and no per-call array or string buffer allocation.
+
+    stubs = controller.stubs('pmd_8te', net_handle)
+    stubs.brt_set_channel(1, 255)
+    stubs.brt_set_all(array('i', [255] * 8))
+
+Stubs capture controller.dll when created, so create them after enabling
+transport layers. They bypass write batching, and since they reuse their
+scratch buffers, one stub object should be used by one thread at a time.
+"""
+import ctypes
+import re
+from functools import partial
+
+from .prototypes import HANDLE, INT_ARRAY_8, PROTOTYPES, UINT
+
+_WORD_BREAK = re.compile(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+_INT32_FORMATS = ('i', 'I', 'l', 'L')
+
+
+def as_int_array(values, scratch=None):
+    """
+    Returns values as an INT_ARRAY_8 for the SetAll calls.
+
+    Writable buffers of 32-bit integers (array('i'), NumPy int32) are
+    shared, not copied. Byte buffers (bytes, bytearray, uint8 arrays) are
+    taken as the raw memory of the eight int32 values, never as a sequence
+    of eight small values, and must hold at least 32 bytes. Read-only
+    buffers and other sequences are copied into scratch, or into a new
+    array if none is given.
+    Args:
+        values: 8 integers, as a sequence or buffer-protocol object.
+        scratch (INT_ARRAY_8, optional): Array to reuse for copies.
+    """
+    if isinstance(values, INT_ARRAY_8):
+        return values
+    try:
+        view = memoryview(values)
+    except TypeError:
+        view = None
+    if view is not None and view.itemsize == 1 and (
+            not view.c_contiguous or view.nbytes < ctypes.sizeof(INT_ARRAY_8)):
+        raise ValueError('Byte buffers are raw int32 memory and need {} contiguous bytes, got {}'.format(
+            ctypes.sizeof(INT_ARRAY_8), view.nbytes))
+    if (view is not None and view.c_contiguous and view.nbytes >= ctypes.sizeof(INT_ARRAY_8)
+            and (view.itemsize == 1 or view.itemsize == 4 and view.format[-1] in _INT32_FORMATS)):
+        if not view.readonly:
+            return INT_ARRAY_8.from_buffer(view)
+        if scratch is None:
+            scratch = INT_ARRAY_8()
+        ctypes.memmove(scratch, values if isinstance(values, bytes) else view.tobytes(),
+                       ctypes.sizeof(INT_ARRAY_8))
+        return scratch
+    if scratch is None:
+        return INT_ARRAY_8(*values)
+    # Like INT_ARRAY_8(*values): missing values are 0, extra ones an error
+    ctypes.memset(scratch, 0, ctypes.sizeof(INT_ARRAY_8))
+    for i, value in enumerate(values):
+        scratch[i] = value
+    return scratch
+
+
+def stub_names(family):
+    """Maps each function of a family to its stub name, e.g. BRTSetChannel -> brt_set_channel."""
+    funcs = sorted(PROTOTYPES[family])
+    prefix = funcs[0]
+    for func in funcs[1:]:
+        while not func.startswith(prefix):
+            prefix = prefix[:-1]
+    prefix = prefix[:prefix.rfind('_') + 1]
+    names = {}
+    for func in funcs:
+        name = _WORD_BREAK.sub('_', func[len(prefix):]).lower()
+        # DPS2_6T_Setting and friends
+        names[func] = family + '_' + name if name[0].isdigit() else name
+    return names
+
+
+def _handle_args(argtypes, com_handle, socket_handle):
+    """The leading handle arguments of a function with these argtypes."""
+    if argtypes[0] is not HANDLE:
+        return (socket_handle,)
+    if len(argtypes) > 1 and argtypes[1] is UINT:
+        return (com_handle, socket_handle)
+    return (com_handle,)
+
+
+class _Stubs:
+    __slots__ = ('com_handle', 'socket_handle')
+    family = None
+    # Functions stored as '_' + name, wrapped by a method of the same name
+    wrapped = ()
+
+    def __init__(self, dll, socket_handle=None, com_handle=None):
+        self.com_handle = com_handle
+        self.socket_handle = socket_handle
+        prototypes = PROTOTYPES[self.family]
+        for func, name in stub_names(self.family).items():
+            if name in self.wrapped:
+                name = '_' + name
+            target = getattr(dll, func, None)
+            if target is None:
+                # Not implemented by this transport; the slot stays empty
+                continue
+            handles = _handle_args(prototypes[func][1], com_handle, socket_handle)
+            setattr(self, name, partial(target, *handles))
+
+
+class _PMD8TEStubs(_Stubs):
+    """PM-D-8TE stubs with reusable SetAll arrays and text buffer."""
+
+    __slots__ = ('brt_values', 'pls_values', 'text')
+    wrapped = ('brt_set_all', 'pls_set_all', 'set_ip', 'set_port', 'set_mac', 'read_info')
+
+    def __init__(self, dll, socket_handle=None, com_handle=None):
+        super().__init__(dll, socket_handle, com_handle)
+        self.brt_values = INT_ARRAY_8()
+        self.pls_values = INT_ARRAY_8()
+        self.text = ctypes.create_string_buffer(1024)
+
+    def brt_set_all(self, values=None):
+        """Sends 8 brightness values; with no argument, sends self.brt_values."""
+        if values is None:
+            return self._brt_set_all(self.brt_values)
+        return self._brt_set_all(as_int_array(values, self.brt_values))
+
+    def pls_set_all(self, values=None):
+        """Sends 8 pulse widths; with no argument, sends self.pls_values."""
+        if values is None:
+            return self._pls_set_all(self.pls_values)
+        return self._pls_set_all(as_int_array(values, self.pls_values))
+
+    def set_ip(self, ip_parts):
+        self.text[0] = 0
+        res = self._set_ip(*ip_parts, self.text)
+        return res, self.text.value.decode('ascii', errors='ignore')
+
+    def set_port(self, port):
+        self.text[0] = 0
+        res = self._set_port(port, self.text)
+        return res, self.text.value.decode('ascii', errors='ignore')
+
+    def set_mac(self, mac_parts):
+        self.text[0] = 0
+        res = self._set_mac(*mac_parts, self.text)
+        return res, self.text.value.decode('ascii', errors='ignore')
+
+    def read_info(self):
+        self.text[0] = 0
+        res = self._read_info(self.text)
+        return res, self.text.value.decode('ascii', errors='ignore')
+
+
+def _stub_class(family, base=_Stubs):
+    names = stub_names(family)
+    slots = tuple('_' + name if name in base.wrapped else name for name in names.values())
+    class_name = ''.join(part.upper() if part[0].isdigit() else part.capitalize()
+                         for part in family.split('_')) + 'Stubs'
+    return type(class_name, (base,), {'__slots__': slots, 'family': family})
+
+
+STUB_CLASSES = {family: _stub_class(family, _PMD8TEStubs if family == 'pmd_8te' else _Stubs)
+                for family in PROTOTYPES if family != 'com'}
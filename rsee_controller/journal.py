@@ -0,0 +1,406 @@
+"""
+Binary journal of controller calls in a fixed-size, memory-mapped ring file.
+
+File layout (little endian):
+
+    header   64 bytes    magic, version, record size, capacity, records written,
+                         names size, sessions opened
+    names    16 KiB      function names, NUL separated; a record's function id
+                         is the index of its name
+    records  capacity x 88 bytes, record n at slot n % capacity:
+             t_ns (int64)       time.monotonic in nanoseconds at the call
+             function (uint16)  name index, or SESSION
+             nargs (uint8)      number of argument slots used
+             flags (uint8)      low 5 bits: 1 + position of an argument array that
+                                was expanded into the slots; PARITY: the low bit
+                                of the writing session's number; OPAQUE: some
+                                argument (a string or buffer) was not recorded
+             result (int32)
+             args (18 x int32)
+
+Records are written straight into the mapping, so they survive the process
+crashing. Each time the file is opened for writing a SESSION record holding
+the wall-clock time and the session number is added, which lets readers
+convert t_ns to wall time. It is repeated every quarter of the ring, so the
+oldest surviving records normally still have their session's anchor; the
+PARITY flag tells whether they belong to the first surviving SESSION
+record's session.
+"""
+import ctypes
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .hotpath import as_int_array
+from .prototypes import FAMILY_OF, HANDLE, PROTOTYPES, UINT, device_getter
+from .transport import TransportLayer
+
+MAGIC = b'RSEEJRN1'
+VERSION = 2
+HEADER = struct.Struct('<8sIIQQII')
+COUNT_OFFSET = 24
+SESSIONS_OFFSET = 36
+HEADER_SIZE = 64
+NAMES_SIZE = 16384
+ARGS = 18
+RECORD = struct.Struct('<qHBBi{}i'.format(ARGS))
+SESSION = 0xFFFF
+PARITY = 0x40
+OPAQUE = 0x80
+
+_PREFIX = 'RseeController_'
+# Calls that only open or close handles; replay maps handles instead of repeating them
+_CONNECTION = ('ConnectNet', 'CloseNet', 'OpenCom', 'CloseCom')
+
+try:
+    _now_ns = time.monotonic_ns
+except AttributeError:
+    # Python 3.6
+    def _now_ns():
+        return int(time.monotonic() * 1e9)
+
+
+def _int32(value):
+    """Wraps an int into the int32 range, so 32-bit unsigned handles round-trip."""
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _flatten(args, slots):
+    """
+    Writes a call's integer arguments into slots, expanding one array
+    argument in place. Returns (nargs, flags).
+    """
+    n = 0
+    flags = 0
+    for i, arg in enumerate(args):
+        if arg is None or arg is True or arg is False or isinstance(arg, int):
+            if n < ARGS:
+                slots[n] = _int32(int(arg or 0))
+            n += 1
+        elif (isinstance(arg, (bytes, bytearray, str)) or not hasattr(arg, '__len__')
+              or getattr(arg, '_type_', None) is ctypes.c_char):
+            # Strings and ctypes buffers: the content is not recorded
+            if n < ARGS:
+                slots[n] = 0
+            n += 1
+            flags |= OPAQUE
+        else:
+            flags |= i + 1
+            for value in arg:
+                if n < ARGS:
+                    slots[n] = _int32(int(value))
+                n += 1
+    if n > ARGS:
+        flags |= OPAQUE
+        n = ARGS
+    for i in range(n, ARGS):
+        slots[i] = 0
+    return n, flags
+
+
+def _open(path, capacity):
+    """
+    Opens a journal file, or creates it if it is new or empty. Returns
+    (file, mmap, capacity, names). Any other existing file raises ValueError
+    and is left untouched.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    f = os.fdopen(fd, 'r+b')
+    try:
+        if os.fstat(fd).st_size:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError('{} is not a version {} journal'.format(path, VERSION))
+            magic, version, record_size, existing = HEADER.unpack(header)[:4]
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise ValueError('{} is not a version {} journal'.format(path, VERSION))
+            if os.fstat(fd).st_size < HEADER_SIZE + NAMES_SIZE + existing * RECORD.size:
+                raise ValueError('{} is truncated'.format(path))
+            mm = mmap.mmap(f.fileno(), 0)
+            return f, mm, existing, _read_names(mm)
+        size = HEADER_SIZE + NAMES_SIZE + capacity * RECORD.size
+        f.truncate(size)
+        mm = mmap.mmap(f.fileno(), size)
+        HEADER.pack_into(mm, 0, MAGIC, VERSION, RECORD.size, capacity, 0, NAMES_SIZE, 0)
+        return f, mm, capacity, []
+    except Exception:
+        f.close()
+        raise
+
+
+def _read_names(buf):
+    names = bytes(buf[HEADER_SIZE:HEADER_SIZE + NAMES_SIZE]).split(b'\0\0', 1)[0]
+    return [name.decode('ascii') for name in names.split(b'\0')] if names else []
+
+
+class Journal(TransportLayer):
+    """
+    Records every call that reaches the transport into a ring file of
+    fixed-size binary records: the time, the function, up to 18 integer
+    arguments (SetAll values included) and the return code.
+
+    A record is packed straight into the memory-mapped file, with no log
+    line or object per call, so it is cheap enough for strobe updates. When
+    the ring is full the oldest records are overwritten. Install it with
+    RseeController.enable_journal and read it back with JournalReader.
+    """
+    def __init__(self, path, capacity=65536):
+        """
+        Args:
+            path (str): The journal file. An existing journal is appended to,
+                        keeping its own capacity; a file that is not a journal
+                        raises ValueError.
+            capacity (int): Records kept before the oldest are overwritten.
+        """
+        self.path = path
+        self._file, self._map, self.capacity, names = _open(path, capacity)
+        self._ids = {name: i for i, name in enumerate(names)}
+        self._names_end = HEADER_SIZE + sum(len(name) + 1 for name in names)
+        self._count = struct.unpack_from('<Q', self._map, COUNT_OFFSET)[0]
+        self._slots = [0] * ARGS
+        self._lock = threading.Lock()
+        session = (struct.unpack_from('<I', self._map, SESSIONS_OFFSET)[0] + 1) & 0x7FFFFFFF
+        struct.pack_into('<I', self._map, SESSIONS_OFFSET, session)
+        self._parity = PARITY if session & 1 else 0
+        wall_ns = int(time.time() * 1e9)
+        self._anchor = [_int32(wall_ns & 0xFFFFFFFF), wall_ns >> 32, session] + [0] * (ARGS - 3)
+        self._anchor_ns = _now_ns()
+        self._repeat = max(1, self.capacity // 4)
+        self._write_session()
+
+    def __getattr__(self, name):
+        func = TransportLayer.__getattr__(self, name)
+        wrapped = self.__dict__[name] = self._wrap(name[len(_PREFIX):], func)
+        return wrapped
+
+    def _function_id(self, function):
+        """The id of a function name, adding it to the file's name table if new."""
+        with self._lock:
+            fid = self._ids.get(function)
+            if fid is None:
+                data = function.encode('ascii') + b'\0'
+                if self._names_end + len(data) >= HEADER_SIZE + NAMES_SIZE:
+                    return None
+                self._map[self._names_end:self._names_end + len(data)] = data
+                self._names_end += len(data)
+                fid = self._ids[function] = len(self._ids)
+            return fid
+
+    def _wrap(self, function, func):
+        fid = self._function_id(function)
+        if fid is None:
+            # Name table full; the call is not journaled
+            return func
+
+        def call(*args):
+            t_ns = _now_ns()
+            result = func(*args)
+            self.record(fid, args, result, t_ns)
+            return result
+        call.__name__ = _PREFIX + function
+        return call
+
+    def record(self, fid, args, result, t_ns):
+        """Appends one call record."""
+        with self._lock:
+            slots = self._slots
+            nargs, flags = _flatten(args, slots)
+            self._write(t_ns, fid, nargs, flags | self._parity, _int32(int(result)), slots)
+            if self._count - self._session_at >= self._repeat:
+                self._write_session()
+
+    def _write_session(self):
+        """Writes this session's SESSION record; repeats carry the same times."""
+        self._session_at = self._count
+        self._write(self._anchor_ns, SESSION, 3, 0, 0, self._anchor)
+
+    def _write(self, t_ns, fid, nargs, flags, result, slots):
+        offset = HEADER_SIZE + NAMES_SIZE + (self._count % self.capacity) * RECORD.size
+        RECORD.pack_into(self._map, offset, t_ns, fid, nargs, flags, result, *slots)
+        self._count += 1
+        struct.pack_into('<Q', self._map, COUNT_OFFSET, self._count)
+
+    @property
+    def count(self):
+        """Records written since the file was created, including overwritten ones."""
+        return self._count
+
+    def flush(self):
+        """Writes the mapping to disk."""
+        self._map.flush()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+                self._map.close()
+                self._file.close()
+                self._map = None
+
+
+class Record:
+    """
+    One journaled call. time is wall-clock seconds, or None if the anchor of
+    the session that wrote it was overwritten; t_ns is the monotonic time.
+    """
+
+    __slots__ = ('t_ns', 'time', 'function', 'args', 'result', 'device', 'complete')
+
+    def __init__(self, t_ns, time, function, args, result, device, complete):
+        self.t_ns = t_ns
+        self.time = time
+        self.function = function
+        self.args = args
+        self.result = result
+        self.device = device
+        self.complete = complete
+
+    def __repr__(self):
+        return 'Record({}, {}, {!r}, result={})'.format(
+            '?' if self.time is None else '{:.6f}'.format(self.time), self.function, self.args, self.result)
+
+
+class JournalReader:
+    """
+    Reads a snapshot of a journal file, which may still be being written.
+
+        reader = JournalReader('lights.journal')
+        for record in reader.records(device='net:5', start=t0, end=t1):
+            print(record)
+        reader.replay(controller, reader.records(start=t0), speed=10.0)
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._data = f.read()
+        magic, version, record_size, self.capacity, self.count = HEADER.unpack_from(self._data)[:5]
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError('{} is not a version {} journal'.format(path, VERSION))
+        self.names = _read_names(self._data)
+        self._devices = {}
+
+    def _device(self, function, args):
+        getter = self._devices.get(function)
+        if getter is None:
+            getter = self._devices[function] = device_getter(function)
+        try:
+            return getter(args)
+        except (AttributeError, IndexError):
+            return ''
+
+    def records(self, device=None, start=None, end=None, functions=None):
+        """
+        Yields the surviving records, oldest first.
+        Args:
+            device (str, optional): Only this device label, e.g. 'net:5' or 'com:3'.
+            start (float, optional): Only calls at or after this time.time() value.
+            end (float, optional): Only calls before this time.time() value.
+                                   Records without a known time are left out
+                                   when start or end is given.
+            functions (iterable, optional): Only these functions, e.g. {'PM_D_8TE_BRTSetAll'}.
+        """
+        functions = set(functions) if functions is not None else None
+        first = max(0, self.count - self.capacity)
+        anchor = None
+        leading = None
+        for n in range(first, self.count):
+            offset = HEADER_SIZE + NAMES_SIZE + (n % self.capacity) * RECORD.size
+            fields = RECORD.unpack_from(self._data, offset)
+            t_ns, fid, nargs, flags, result = fields[:5]
+            if fid == SESSION:
+                anchor = _anchor(fields)
+                continue
+            if anchor is not None:
+                wall = anchor + t_ns / 1e9
+            else:
+                # Written before the oldest surviving SESSION record
+                if leading is None:
+                    leading = self._first_session(first)
+                wall = leading[0] + t_ns / 1e9 if leading[1] == flags & PARITY else None
+            if wall is None:
+                if start is not None or end is not None:
+                    continue
+            elif (start is not None and wall < start) or (end is not None and wall >= end):
+                continue
+            function = self.names[fid] if fid < len(self.names) else '?'
+            if functions is not None and function not in functions:
+                continue
+            args = list(fields[5:5 + nargs])
+            array_at = (flags & 0x1F) - 1
+            if array_at >= 0:
+                # Arrays are always the last argument
+                args[array_at:] = [args[array_at:]]
+            label = self._device(function, args)
+            if device is not None and label != device:
+                continue
+            yield Record(t_ns, wall, function, tuple(args), result, label, not flags & OPAQUE)
+
+    def _first_session(self, first):
+        """(anchor, parity flag) of the oldest surviving SESSION record, or (None, None)."""
+        for n in range(first, self.count):
+            offset = HEADER_SIZE + NAMES_SIZE + (n % self.capacity) * RECORD.size
+            fields = RECORD.unpack_from(self._data, offset)
+            if fields[1] == SESSION:
+                return _anchor(fields), PARITY if fields[7] & 1 else 0
+        return None, None
+
+    @staticmethod
+    def replay(target, records, speed=1.0, handles=None, reads=False):
+        """
+        Repeats recorded calls against a controller or transport.
+        Args:
+            target: An RseeController (its current transport stack is used), or
+                    any object exposing the RseeController_* functions.
+            records (iterable): Records, e.g. from records().
+            speed (float, optional): 1.0 keeps the original pacing, 10.0 runs ten
+                                     times faster, None sends as fast as possible.
+            handles (dict, optional): Recorded handle -> live handle.
+            reads (bool): Also repeat read calls.
+        Calls that open or close handles, and calls with unrecorded string or
+        buffer arguments, are skipped. Returns {'calls', 'skipped', 'mismatches',
+        'max_lag'}, where mismatches counts results that differ from the
+        recording and max_lag is the worst lateness in seconds.
+        """
+        dll = getattr(target, 'dll', target)
+        handles = handles or {}
+        report = {'calls': 0, 'skipped': 0, 'mismatches': 0, 'max_lag': 0.0}
+        origin = None
+        for record in records:
+            if not record.complete or record.function in _CONNECTION or (not reads and 'Read' in record.function):
+                report['skipped'] += 1
+                continue
+            if speed:
+                if origin is None:
+                    origin = (record.t_ns, time.monotonic())
+                due = origin[1] + (record.t_ns - origin[0]) / 1e9 / speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    report['max_lag'] = max(report['max_lag'], -delay)
+            # SetAll values are recorded as lists; ctypes prototypes need INT_ARRAY_8
+            args = [as_int_array(arg) if isinstance(arg, list) else arg for arg in record.args]
+            for i in _handle_positions(record.function):
+                args[i] = handles.get(args[i], args[i])
+            result = getattr(dll, _PREFIX + record.function)(*args)
+            report['calls'] += 1
+            if int(result) != record.result:
+                report['mismatches'] += 1
+        return report
+
+
+def _anchor(fields):
+    """Wall-clock minus monotonic seconds, from a SESSION record."""
+    wall_ns = (fields[5] & 0xFFFFFFFF) | (fields[6] << 32)
+    return (wall_ns - fields[0]) / 1e9
+
+
+def _handle_positions(function):
+    """Indexes of the handle arguments of a call: the com handle, then the net handle if any."""
+    family = FAMILY_OF.get(_PREFIX + function)
+    if family is None:
+        # Transport-only PM-D-8TE functions such as PLSReadAll
+        return (0, 1) if function.startswith('PM_D_8TE_') else (0,)
+    argtypes = PROTOTYPES[family][_PREFIX + function][1]
+    return (0, 1) if argtypes[0] is HANDLE and len(argtypes) > 1 and argtypes[1] is UINT else (0,)
@@ -0,0 +1,159 @@
+import bisect
+import threading
+import time
+
+from .prototypes import device_getter, returns_reading
+from .transport import TransportLayer
+
+# Histogram upper bounds in seconds: 2**-17 (7.6 us) to 2**3 (8 s), two per octave
+BUCKETS = tuple(2.0 ** (e / 2) for e in range(-34, 7))
+
+_PREFIX = 'RseeController_'
+
+
+def _result_label(function, result):
+    """'ok' or the return code. Read functions return values, so any value >= 0 is ok."""
+    if result is True or (result >= 0 if returns_reading(function) else result > 0):
+        return 'ok'
+    return str(int(result))
+
+
+class _Series:
+    """Counters and latency histogram of one (device, function) pair."""
+
+    __slots__ = ('buckets', 'results', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.results = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, result, elapsed):
+        self.buckets[bisect.bisect_left(BUCKETS, elapsed)] += 1
+        self.results[result] = self.results.get(result, 0) + 1
+        self.count += 1
+        self.sum += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, capped at the maximum."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class Instrumentation(TransportLayer):
+    """
+    Counts and times every call that reaches the transport, per device
+    and function.
+
+    For each (device, function) it keeps a call count, a breakdown by
+    result ('ok' or the negative return code) and a latency histogram with
+    fixed log-spaced buckets, giving p50/p99/max in constant memory. Install
+    it with RseeController.enable_instrumentation; while it is not installed
+    calls are not wrapped at all.
+    """
+    def __init__(self, hook=None, clock=time.perf_counter):
+        """
+        Args:
+            hook (callable, optional): hook(device, function, result, seconds), called
+                                       after each call, e.g. to emit trace spans.
+            clock (callable): Monotonic clock returning seconds.
+        """
+        self.hook = hook
+        self.clock = clock
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        func = TransportLayer.__getattr__(self, name)
+        wrapped = self.__dict__[name] = self._wrap(name[len(_PREFIX):], func)
+        return wrapped
+
+    def _wrap(self, function, func):
+        device_of = device_getter(function)
+        clock = self.clock
+
+        def call(*args):
+            start = clock()
+            try:
+                result = func(*args)
+            except Exception:
+                self.record(device_of(args), function, 'exception', clock() - start)
+                raise
+            self.record(device_of(args), function, _result_label(function, result), clock() - start)
+            return result
+        call.__name__ = _PREFIX + function
+        return call
+
+    def record(self, device, function, result, elapsed):
+        """Adds one call to the (device, function) series."""
+        key = (device, function)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.add(result, elapsed)
+        if self.hook is not None:
+            self.hook(device, function, result, elapsed)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """
+        Returns {device: {function: stats}} where stats holds calls, results,
+        p50, p99, max and total seconds.
+        """
+        with self._lock:
+            series = [(key, s.count, dict(s.results), s.sum, s.max, s.quantile(0.5), s.quantile(0.99))
+                      for key, s in self._series.items()]
+        snapshot = {}
+        for (device, function), count, results, total, maximum, p50, p99 in series:
+            snapshot.setdefault(device, {})[function] = {
+                'calls': count,
+                'results': results,
+                'p50': p50,
+                'p99': p99,
+                'max': maximum,
+                'total': total,
+            }
+        return snapshot
+
+    def prometheus(self, prefix='rsee'):
+        """Returns the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            series = sorted((key, list(s.buckets), dict(s.results), s.count, s.sum)
+                            for key, s in self._series.items())
+        lines = [
+            '# HELP {}_calls_total Controller calls by device, function and result.'.format(prefix),
+            '# TYPE {}_calls_total counter'.format(prefix),
+        ]
+        for (device, function), _, results, _, _ in series:
+            for result, n in sorted(results.items()):
+                lines.append('{}_calls_total{{device="{}",function="{}",result="{}"}} {}'.format(
+                    prefix, device, function, result, n))
+        lines += [
+            '# HELP {}_call_seconds Controller call latency.'.format(prefix),
+            '# TYPE {}_call_seconds histogram'.format(prefix),
+        ]
+        for (device, function), buckets, _, count, total in series:
+            labels = 'device="{}",function="{}"'.format(device, function)
+            seen = 0
+            for bound, n in zip(BUCKETS, buckets):
+                seen += n
+                lines.append('{}_call_seconds_bucket{{{},le="{:.6g}"}} {}'.format(prefix, labels, bound, seen))
+            lines.append('{}_call_seconds_bucket{{{},le="+Inf"}} {}'.format(prefix, labels, count))
+            lines.append('{}_call_seconds_sum{{{}}} {!r}'.format(prefix, labels, total))
+            lines.append('{}_call_seconds_count{{{}}} {}'.format(prefix, labels, count))
+        return '\n'.join(lines) + '\n'
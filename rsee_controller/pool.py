@@ -0,0 +1,210 @@
+import contextlib
+import threading
+import time
+
+
+def default_probe(controller, com_handle, net_handle):
+    """A cheap liveness check: reading PM-D-8TE channel 1 brightness."""
+    return controller.pmd_8te_read_brightness(com_handle, net_handle, 1) >= 0
+
+
+class _Entry:
+    """One pooled connection. `lock` is held by the current lease."""
+
+    __slots__ = ('address', 'handle', 'lock', 'alive', 'backoff', 'retry_at', 'leases', 'reconnects')
+
+    def __init__(self, address):
+        self.address = address
+        self.handle = 0
+        self.lock = threading.Lock()
+        self.alive = False
+        self.backoff = 0.0
+        self.retry_at = 0.0
+        self.leases = 0
+        self.reconnects = 0
+
+    @property
+    def is_serial(self):
+        return isinstance(self.address, str)
+
+    @property
+    def handles(self):
+        """The (com_handle, net_handle) pair to pass to the wrapper."""
+        return (self.handle, 0) if self.is_serial else (0, self.handle)
+
+
+class ConnectionPool:
+    """
+    Shares controller handles across call sites.
+
+    Connections are keyed by (ip, port) for the network or by serial port
+    name, opened on first use and kept open. A lease gives one caller
+    exclusive use of a handle, since the controllers answer one command at
+    a time. A background thread probes idle connections and reconnects dead
+    ones with exponential backoff; each connection has its own lock, so a
+    dead controller never stalls callers of the others.
+
+        pool = ConnectionPool(controller).start()
+        with pool.lease(('192.168.1.100', 8899)) as (com_handle, net_handle):
+            controller.pmd_8te_set_brightness(com_handle, net_handle, 1, 255)
+    """
+    def __init__(self, controller, probe=default_probe, probe_interval=5.0, backoff=0.1,
+                 max_backoff=10.0, baud_rate=19200):
+        """
+        Args:
+            controller (RseeController): The controller used to connect and probe.
+            probe (callable): probe(controller, com_handle, net_handle) -> bool.
+            probe_interval (float): Seconds between health checks of idle connections.
+            backoff (float): First delay after a failed connect; doubles up to max_backoff.
+            max_backoff (float): Longest delay between reconnect attempts.
+            baud_rate (int): Baud rate for serial connections.
+        """
+        self.controller = controller
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.initial_backoff = backoff
+        self.max_backoff = max_backoff
+        self.baud_rate = baud_rate
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lease_wait_total = 0.0
+        self._lease_wait_max = 0.0
+
+    def _entry(self, address):
+        if not isinstance(address, str):
+            address = tuple(address)
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is None:
+                entry = self._entries[address] = _Entry(address)
+            return entry
+
+    # --- Connections ---
+    def _connect(self, entry):
+        """Opens entry's connection. The caller holds entry.lock."""
+        now = time.monotonic()
+        if now < entry.retry_at:
+            return False
+        if entry.handle:
+            self._close(entry)
+            entry.reconnects += 1
+        if entry.is_serial:
+            handle = self.controller.connect_serial(entry.address, self.baud_rate)
+        else:
+            handle = self.controller.connect_net(*entry.address)
+        if handle:
+            entry.handle = handle
+            entry.alive = True
+            entry.backoff = 0.0
+            entry.retry_at = 0.0
+            return True
+        entry.backoff = min(self.max_backoff, entry.backoff * 2 or self.initial_backoff)
+        entry.retry_at = now + entry.backoff
+        return False
+
+    def _close(self, entry):
+        if entry.is_serial:
+            self.controller.close_serial(entry.address, entry.handle)
+        else:
+            self.controller.close_net(entry.handle)
+        entry.handle = 0
+        entry.alive = False
+
+    @contextlib.contextmanager
+    def lease(self, address, timeout=None):
+        """
+        Leases the connection to `address`, connecting if needed.
+        Args:
+            address: (ip, port) for a network controller, or a serial port name.
+            timeout (float, optional): Longest wait for another lease holder.
+        Yields the (com_handle, net_handle) pair.
+        Raises TimeoutError if the connection stays leased past timeout, and
+        ConnectionError if the controller cannot be reached.
+        """
+        entry = self._entry(address)
+        start = time.monotonic()
+        if not entry.lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError('Connection to {} is still leased'.format(address))
+        try:
+            wait = time.monotonic() - start
+            with self._lock:
+                self._lease_wait_total += wait
+                self._lease_wait_max = max(self._lease_wait_max, wait)
+                entry.leases += 1
+            if not entry.alive and not self._connect(entry):
+                raise ConnectionError('Cannot connect to {}; next attempt in {:.2f}s'.format(
+                    address, max(0.0, entry.retry_at - time.monotonic())))
+            yield entry.handles
+        finally:
+            entry.lock.release()
+
+    def invalidate(self, address):
+        """
+        Marks a connection dead, e.g. after a failed command, so it is reopened.
+        Safe to call inside a lease of the same address: it does not take the
+        entry's lock, since storing a bool is atomic.
+        """
+        self._entry(address).alive = False
+
+    def close(self):
+        """Stops health checks and closes every pooled connection."""
+        self.stop()
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            with entry.lock:
+                if entry.handle:
+                    self._close(entry)
+
+    # --- Health checks ---
+    def start(self):
+        """Starts the background health-check thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rsee-pool-health', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def check(self):
+        """Probes every idle connection once and reconnects dead ones that are due."""
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            # A leased connection is evidently in use; never wait for it.
+            if not entry.lock.acquire(blocking=False):
+                continue
+            try:
+                if entry.alive and not self.probe(self.controller, *entry.handles):
+                    entry.alive = False
+                if not entry.alive:
+                    self._connect(entry)
+            finally:
+                entry.lock.release()
+
+    def _run(self):
+        while not self._stop.wait(self.probe_interval):
+            self.check()
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            leases = sum(e.leases for e in entries)
+            return {
+                'connections': len(entries),
+                'open_handles': sum(1 for e in entries if e.handle),
+                'dead': sum(1 for e in entries if not e.alive),
+                'reconnects': sum(e.reconnects for e in entries),
+                'leases': leases,
+                'lease_wait_total': self._lease_wait_total,
+                'lease_wait_avg': self._lease_wait_total / leases if leases else 0.0,
+                'lease_wait_max': self._lease_wait_max,
+            }
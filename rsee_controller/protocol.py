@@ -0,0 +1,118 @@
+"""
+Frame layout of the PM-D-4TE/8TE ASCII protocol.
+
+These are the same frames RseeController.dll writes to the controller's
+TCP socket or serial port, so any transport built on them is
+interchangeable with the DLL:
+
+    BRTSetChannel   b'S0' + ch + VVV + b'#'    reply: 3 bytes, b'_' first
+    BRTReadChannel  b'S0' + ch + b'#'          reply: 6 bytes, value at [3:6]
+    PLSSetChannel   b'SP0' + ch + VVV + b'#'   reply: 4 bytes, b'_' first
+    PLSReadChannel  b'SP0' + ch + b'#'         reply: 7 bytes, value at [4:7]
+    ChangeMode      b'S' + L|H|P + b'#'        reply: 1 byte, the mode letter
+    ReadInfo        b'SV#'                     reply: free text, up to 220 bytes
+
+`ch` is a single ASCII digit 1-8 and `VVV` a zero padded decimal value.
+The SetAll calls are the eight per-channel frames sent back to back.
+"""
+
+CHANNELS = 8
+BRT_MAX = 255
+PLS_MAX = 999
+INFO_MAX = 220
+
+ACK = 0x5f  # b'_'
+MODE_LETTERS = b'LHP'  # ChangeMode 1, 2, 3
+
+# Return codes used by RseeController.dll for the PM-D-8TE functions.
+RC_OK = 1
+RC_NO_REPLY = 0
+RC_BAD_HANDLE = -1
+RC_BAD_ARGUMENT = -2
+RC_BAD_REPLY = -3
+# Returned by the wrapper's call breaker (breaker.py), never by the DLL.
+RC_TIMEOUT = -4
+RC_CIRCUIT_OPEN = -5
+
+BRT_SET_LEN = 7
+BRT_READ_LEN = 4
+PLS_SET_LEN = 8
+PLS_READ_LEN = 5
+BRT_SET_REPLY = 3
+BRT_READ_REPLY = 6
+PLS_SET_REPLY = 4
+PLS_READ_REPLY = 7
+
+# Three ASCII digits for every value 0-999, so encoding never formats.
+DIGITS = tuple(b'%03d' % i for i in range(1000))
+
+
+def brt_set_frame(channel, value):
+    return b'S0%d%03d#' % (channel, value)
+
+
+def brt_read_frame(channel):
+    return b'S0%d#' % channel
+
+
+def pls_set_frame(channel, value):
+    return b'SP0%d%03d#' % (channel, value)
+
+
+def pls_read_frame(channel):
+    return b'SP0%d#' % channel
+
+
+def mode_frame(mode):
+    return b'S' + MODE_LETTERS[mode - 1:mode] + b'#'
+
+
+INFO_FRAME = b'SV#'
+
+# All eight channel reads in one frame, as the transports send for BRTReadAll
+# and PLSReadAll. The controller answers with the eight read replies back to back.
+BRT_READ_ALL_FRAME = b''.join(brt_read_frame(ch) for ch in range(1, CHANNELS + 1))
+PLS_READ_ALL_FRAME = b''.join(pls_read_frame(ch) for ch in range(1, CHANNELS + 1))
+
+
+def parse_digits(buf, start):
+    """Decodes three ASCII digits at buf[start:start + 3], or returns -1."""
+    value = 0
+    for i in range(start, start + 3):
+        d = buf[i] - 0x30
+        if d < 0 or d > 9:
+            return -1
+        value = value * 10 + d
+    return value
+
+
+def check_set_all(reply, frame, frame_len, reply_len):
+    """
+    Checks the eight acks of a SetAll reply against the frames sent: each must
+    be b'_' followed by its frame's echoed header, e.g. b'_03' for b'S03128#'.
+    Returns RC_OK, or RC_BAD_REPLY if any channel was not acknowledged.
+    """
+    for i in range(CHANNELS):
+        r = i * reply_len
+        f = i * frame_len
+        if reply[r] != ACK or reply[r + 1:r + reply_len] != frame[f + 1:f + reply_len]:
+            return RC_BAD_REPLY
+    return RC_OK
+
+
+def parse_read_all(buf, reply_len, limit, out):
+    """
+    Decodes eight back-to-back read replies of reply_len bytes each, value in
+    the last three bytes, into out[0:8]. A channel with a bad reply gets
+    RC_BAD_REPLY. Returns RC_OK, or RC_BAD_REPLY if any channel was bad.
+    """
+    rc = RC_OK
+    for i in range(CHANNELS):
+        base = i * reply_len
+        value = parse_digits(buf, base + reply_len - 3) if buf[base] == ACK else -1
+        if 0 <= value <= limit:
+            out[i] = value
+        else:
+            out[i] = RC_BAD_REPLY
+            rc = RC_BAD_REPLY
+    return rc
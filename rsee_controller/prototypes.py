@@ -0,0 +1,206 @@
+"""
+Prototype table for the RseeController.dll exports, grouped by device family.
+
+Each entry maps an exported function to (restype, argtypes). LazyDll binds
+a family's prototypes the first time one of its functions is used, so a
+process that only talks to one controller family never binds the rest.
+"""
+import ctypes
+
+HANDLE = ctypes.c_void_p
+BOOL = ctypes.c_bool
+INT = ctypes.c_int
+UINT = ctypes.c_uint
+CHAR_P = ctypes.c_char_p
+INT_ARRAY_8 = INT * 8
+
+_RANGE_ONOFF_6 = [INT, BOOL] * 6
+_RANGE_ONOFF_8 = [INT, BOOL] * 8
+
+PROTOTYPES = {
+    # OpenCom/CloseCom take and return the com handle as an int, as in the C# NPC demo.
+    'com': {
+        'RseeController_OpenCom': (INT, [CHAR_P, INT, BOOL]),
+        'RseeController_CloseCom': (BOOL, [CHAR_P, INT]),
+        'RseeController_ConnectNet': (UINT, [CHAR_P, INT]),
+        'RseeController_CloseNet': (BOOL, [UINT]),
+    },
+    'dps2': {
+        'RseeController_DPS2_SetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_DPS2_6T_Setting': (INT, [HANDLE] + _RANGE_ONOFF_6),
+        'RseeController_DPS2_8T_Setting': (INT, [HANDLE] + _RANGE_ONOFF_8),
+        'RseeController_DPS2_8TE_Setting': (INT, [UINT] + _RANGE_ONOFF_8),
+        'RseeController_DPS2_ReadChannel': (INT, [HANDLE, INT]),
+    },
+    'dps3': {
+        'RseeController_DPS3_BRTSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_DPS3_PLSSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_DPS3_BRTReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_DPS3_PLSReadChannel': (INT, [HANDLE, INT]),
+    },
+    'pmd': {
+        'RseeController_PM_D_BRTSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_PM_D_BRTReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_PM_D_PLSSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_PM_D_PLSReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_PM_D_SetOnoff': (INT, [HANDLE, BOOL]),
+        'RseeController_PM_D_ChangeMode': (INT, [HANDLE, BOOL]),
+    },
+    'pmd_8te': {
+        'RseeController_PM_D_8TE_BRTSetChannel': (INT, [HANDLE, UINT, INT, INT]),
+        'RseeController_PM_D_8TE_BRTSetAll': (INT, [HANDLE, UINT, INT_ARRAY_8]),
+        'RseeController_PM_D_8TE_BRTReadChannel': (INT, [HANDLE, UINT, INT]),
+        'RseeController_PM_D_8TE_PLSSetChannel': (INT, [HANDLE, UINT, INT, INT]),
+        'RseeController_PM_D_8TE_PLSSetAll': (INT, [HANDLE, UINT, INT_ARRAY_8]),
+        'RseeController_PM_D_8TE_PLSReadChannel': (INT, [HANDLE, UINT, INT]),
+        'RseeController_PM_D_8TE_SetIP': (INT, [HANDLE, UINT, INT, INT, INT, INT, CHAR_P]),
+        'RseeController_PM_D_8TE_SetPort': (INT, [HANDLE, UINT, INT, CHAR_P]),
+        'RseeController_PM_D_8TE_SetMac': (INT, [HANDLE, UINT, INT, INT, INT, INT, INT, INT, CHAR_P]),
+        'RseeController_PM_D_8TE_ChangeMode': (INT, [HANDLE, UINT, INT]),
+        'RseeController_PM_D_8TE_ReadInfo': (INT, [HANDLE, UINT, CHAR_P]),
+    },
+    'mdps_24w75': {
+        'RseeController_MDPS_24W75_BRTSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_MDPS_24W75_PLSSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_MDPS_24W75_BRTReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_MDPS_24W75_PLSReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_MDPS_24W75_SetOnoff': (INT, [HANDLE, BOOL]),
+        'RseeController_MDPS_24W75_ChangeMode': (INT, [HANDLE, BOOL]),
+    },
+    'mdps_24w96': {
+        'RseeController_MDPS_24W96_BRTSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_MDPS_24W96_PLSSetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_MDPS_24W96_BRTReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_MDPS_24W96_PLSReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_MDPS_24W96_SetOnoff': (INT, [HANDLE, BOOL]),
+        'RseeController_MDPS_24W96_ChangeMode': (INT, [HANDLE, BOOL]),
+    },
+    'npc': {
+        'RseeController_NPC_SetChannel': (INT, [HANDLE, UINT, INT, INT]),
+        'RseeController_NPC_ReadChannel': (INT, [HANDLE, UINT, INT]),
+        'RseeController_NPC_SetOnoff': (INT, [HANDLE, UINT, INT, BOOL]),
+    },
+    'ahc': {
+        'RseeController_AHC_SetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_AHC_ReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_AHC_SetOnoff': (INT, [HANDLE, BOOL]),
+    },
+    'pmc': {
+        'RseeController_PM_C_SetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_PM_C_ReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_PM_C_SetOnoff': (INT, [HANDLE, BOOL]),
+    },
+    'sps': {
+        'RseeController_SPS_SetChannel': (INT, [HANDLE, INT, INT]),
+        'RseeController_SPS_ReadChannel': (INT, [HANDLE, INT]),
+        'RseeController_SPS_SetMode': (INT, [HANDLE, BOOL]),
+        'RseeController_SPS_SetInt': (INT, [HANDLE, INT]),
+        'RseeController_SPS_ReadInt': (INT, [HANDLE]),
+    },
+    'pms': {
+        'RseeController_PM_S_SetChannel': (INT, [HANDLE, UINT, INT, INT]),
+        'RseeController_PM_S_SetInt': (INT, [HANDLE, UINT, INT]),
+        'RseeController_PM_S_SetMode': (INT, [HANDLE, UINT, BOOL]),
+        'RseeController_PM_S_ReadChannel': (INT, [HANDLE, UINT, INT]),
+        'RseeController_PM_S_ReadInt': (INT, [HANDLE, UINT]),
+    },
+    'cpl_8t': {
+        'RseeController_CPL_8T_SetChannel': (INT, [UINT, INT, INT]),
+        'RseeController_CPL_8T_ReadChannel': (INT, [UINT, INT]),
+        'RseeController_CPL_8T_SetOnoff': (INT, [UINT, BOOL]),
+        'RseeController_CPL_8T_SetCurrent': (INT, [UINT, INT, INT]),
+    },
+}
+
+FAMILY_OF = {name: family for family, funcs in PROTOTYPES.items() for name in funcs}
+
+# Exports that are not in the SDK header. Their prototypes are inferred, not
+# documented, and a wrong guess corrupts the stack instead of failing, so
+# LazyDll only exposes them after an explicit bind_optional().
+OPTIONAL_PROTOTYPES = {
+    # Presumably sends all eight reads and copies the 48-byte reply into the buffer
+    'RseeController_PM_D_8TE_BRTReadAll': (INT, [HANDLE, UINT, CHAR_P]),
+}
+
+
+class LazyDll:
+    """
+    RseeController.dll with per-family lazy prototype binding.
+
+    The first use of any function in a family binds that family's
+    prototypes. Bound function pointers are cached on the instance, so
+    later calls are plain attribute lookups.
+    """
+    def __init__(self, dll_path):
+        self._dll = ctypes.CDLL(dll_path)
+        self.bound_families = set()
+
+    def bind_family(self, family):
+        dll = self._dll
+        for name, (restype, argtypes) in PROTOTYPES[family].items():
+            func = dll[name]
+            func.restype = restype
+            func.argtypes = argtypes
+            self.__dict__[name] = func
+        self.bound_families.add(family)
+
+    def bind_all(self):
+        """Binds every family now, e.g. to surface a missing export at startup."""
+        for family in PROTOTYPES:
+            if family not in self.bound_families:
+                self.bind_family(family)
+
+    def bind_optional(self, name):
+        """
+        Binds an export from OPTIONAL_PROTOTYPES, e.g. after checking it
+        against the DLL version in use. Returns False if the DLL lacks it.
+        """
+        restype, argtypes = OPTIONAL_PROTOTYPES[name]
+        try:
+            func = self._dll[name]
+        except AttributeError:
+            return False
+        func.restype = restype
+        func.argtypes = argtypes
+        self.__dict__[name] = func
+        return True
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name in OPTIONAL_PROTOTYPES:
+            # Optional exports are only reachable once bound
+            raise AttributeError(name)
+        family = FAMILY_OF.get(name)
+        if family is None:
+            # Exports without a prototype keep ctypes' default int conversion.
+            return getattr(self._dll, name)
+        self.bind_family(family)
+        return self.__dict__[name]
+
+
+def returns_reading(function):
+    """
+    Whether `function` (without the RseeController_ prefix) returns the value
+    it read, where 0 is valid, rather than a return code or a length.
+    """
+    return 'Read' in function and not function.endswith(('ReadInfo', 'ReadAll'))
+
+
+def device_getter(function):
+    """
+    Returns a function mapping the args of a call to `function` (an export
+    name without the RseeController_ prefix) to a device label: 'net:5',
+    'com:3', '192.168.1.100:8899' for ConnectNet or the port for OpenCom.
+    """
+    if function == 'ConnectNet':
+        return lambda args: '{}:{}'.format(args[0].decode('ascii', 'replace'), args[1])
+    if function in ('OpenCom', 'CloseCom'):
+        return lambda args: args[0].decode('ascii', 'replace')
+    name = 'RseeController_' + function
+    family = FAMILY_OF.get(name)
+    argtypes = PROTOTYPES[family][name][1] if family else OPTIONAL_PROTOTYPES.get(name, (None, None))[1]
+    if argtypes and argtypes[0] is HANDLE:
+        if len(argtypes) > 1 and argtypes[1] is UINT:
+            return lambda args: 'com:{}'.format(args[0]) if args[0] else 'net:{}'.format(args[1])
+        return lambda args: 'com:{}'.format(args[0])
+    # Functions taking the net handle first, and exports without a prototype
+    return lambda args: 'net:{}'.format(args[0]) if args else ''
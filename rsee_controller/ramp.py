@@ -0,0 +1,259 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import protocol as p
+
+CURVES = {
+    'linear': lambda x: x,
+    'ease': lambda x: x * x * (3 - 2 * x),
+    'ease_in': lambda x: x * x,
+    'ease_out': lambda x: x * (2 - x),
+}
+
+
+class _Channel:
+    """Ramp state of one channel: from `start` at `t0` to `target` over `duration` seconds."""
+
+    __slots__ = ('start', 'target', 't0', 'duration', 'sent')
+
+    def __init__(self, sent=None):
+        self.start = sent
+        self.target = None
+        self.t0 = 0.0
+        self.duration = 0.0
+        self.sent = sent
+
+    def value_at(self, now, curve):
+        if self.target is None:
+            return self.sent
+        if self.duration <= 0 or now >= self.t0 + self.duration:
+            return self.target
+        return int(round(self.start + (self.target - self.start) * curve((now - self.t0) / self.duration)))
+
+    def moving(self, now):
+        return self.target is not None and (self.sent != self.target or now < self.t0 + self.duration)
+
+
+class _Device:
+    __slots__ = ('socket_handle', 'com_handle', 'channels', 'next_at', 'rtt', 'cursor', 'busy')
+
+    def __init__(self, socket_handle, com_handle, values):
+        self.socket_handle = socket_handle
+        self.com_handle = com_handle
+        self.channels = [_Channel(v) for v in (values or [None] * p.CHANNELS)]
+        self.next_at = 0.0
+        self.rtt = 0.0
+        self.cursor = 0
+        self.busy = False
+
+
+class RampEngine:
+    """
+    Fades PM-D-8TE brightness (or pulse width) toward targets that may
+    change at any rate, e.g. from a UI slider.
+
+    set_target only records the newest target per (handle, channel), so a
+    flood of updates never queues: superseded values are dropped. A
+    background thread interpolates toward the targets along `curve` and
+    sends at most one frame per controller per tick: a SetAll when several
+    channels moved and all eight values are known, otherwise the
+    longest-waiting channel. Frames go out on a worker pool, so a slow or
+    hung controller never delays the others: while its frame is still in
+    flight its ticks are skipped and counted as late, and it is updated
+    only as fast as it answers.
+
+        with RampEngine(controller, rate=500) as ramp:
+            ramp.set_target(net_handle, 1, 255)
+    """
+    def __init__(self, controller, kind='brt', rate=None, curve='linear', tick=0.02, retry=0.5, values=None,
+                 max_workers=16):
+        """
+        Args:
+            controller (RseeController): The controller that sends the frames.
+            kind (str): 'brt' for brightness or 'pls' for pulse width.
+            rate (float, optional): Ramp speed in units per second. None jumps straight
+                                    to each target unless set_target gives a duration.
+            curve (str or callable): 'linear', 'ease', 'ease_in', 'ease_out', or a function
+                                     mapping progress in [0, 1] to [0, 1].
+            tick (float): Seconds between frames to one controller.
+            retry (float): Seconds to wait after a failed frame before resending.
+            values (dict, optional): Current values, {socket_handle: 8 values}, used as the
+                                     start of the first ramps and to allow SetAll at once.
+            max_workers (int): Controllers sent to at once.
+        """
+        if kind not in ('brt', 'pls'):
+            raise ValueError("kind must be 'brt' or 'pls'")
+        for handle, current in (values or {}).items():
+            if len(current) != p.CHANNELS:
+                raise ValueError('values of handle {} need {} entries, got {}'.format(
+                    handle, p.CHANNELS, len(current)))
+        self.controller = controller
+        self.kind = kind
+        self.limit = p.BRT_MAX if kind == 'brt' else p.PLS_MAX
+        self.rate = rate
+        self.curve = CURVES[curve] if isinstance(curve, str) else curve
+        self.tick = tick
+        self.retry = retry
+        self.frames = 0
+        self.set_all_frames = 0
+        self.superseded = 0
+        self.failures = 0
+        self.late = 0
+        self.max_workers = max_workers
+        self._executor = None
+        self._initial = dict(values or {})
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_target(self, socket_handle, channel, value, duration=None, com_handle=None):
+        """
+        Sets the newest target of one channel, replacing any earlier one.
+        Args:
+            socket_handle (int): The controller's net handle.
+            channel (int): Channel 1-8.
+            value (int): The target value.
+            duration (float, optional): Seconds to reach it, instead of the engine's rate.
+            com_handle (int, optional): The com handle, for serial connections.
+        """
+        if not 1 <= channel <= p.CHANNELS:
+            raise ValueError('channel must be 1-{}'.format(p.CHANNELS))
+        value = max(0, min(self.limit, int(value)))
+        key = (com_handle or 0, socket_handle)
+        now = time.monotonic()
+        with self._lock:
+            dev = self._devices.get(key)
+            if dev is None:
+                dev = self._devices[key] = _Device(socket_handle, com_handle, self._initial.get(socket_handle))
+            ch = dev.channels[channel - 1]
+            if ch.target is not None and ch.sent != ch.target:
+                self.superseded += 1
+            current = ch.value_at(now, self.curve)
+            ch.start = value if current is None else current
+            ch.target = value
+            ch.t0 = now
+            if duration is not None:
+                ch.duration = duration
+            elif self.rate and current is not None:
+                ch.duration = abs(value - current) / self.rate
+            else:
+                ch.duration = 0.0
+        self._wake.set()
+
+    def _frame(self, dev, now):
+        """Picks the next frame for a device: (channels, values) or None."""
+        desired = [ch.value_at(now, self.curve) for ch in dev.channels]
+        dirty = [i for i, ch in enumerate(dev.channels) if desired[i] is not None and desired[i] != ch.sent]
+        if not dirty:
+            return None
+        if len(dirty) > 1 and None not in desired:
+            return list(range(p.CHANNELS)), desired
+        # Round-robin over dirty channels so none starves
+        i = next((i for i in dirty if i >= dev.cursor), dirty[0])
+        dev.cursor = (i + 1) % p.CHANNELS
+        return [i], desired
+
+    def _send(self, dev, channels, desired):
+        ctl, h, com = self.controller, dev.socket_handle, dev.com_handle
+        if len(channels) > 1:
+            set_all = ctl.pmd_8te_brt_set_all if self.kind == 'brt' else ctl.pmd_8te_pls_set_all
+            return set_all(h, desired, com)
+        set_channel = ctl.pmd_8te_brt_set_channel if self.kind == 'brt' else ctl.pmd_8te_pls_set_channel
+        return set_channel(h, channels[0] + 1, desired[channels[0]], com)
+
+    def step(self):
+        """
+        Queues one frame to each controller that is due and returns without
+        waiting for them. A due controller whose last frame is still in flight
+        is skipped and counted in `late`. Returns True while any ramp is
+        still in progress.
+        """
+        now = time.monotonic()
+        work = []
+        active = False
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='rsee-ramp')
+            for dev in self._devices.values():
+                if any(ch.moving(now) for ch in dev.channels):
+                    active = True
+                    if now < dev.next_at:
+                        continue
+                    if dev.busy:
+                        self.late += 1
+                        continue
+                    frame = self._frame(dev, now)
+                    if frame is not None:
+                        dev.busy = True
+                        work.append((dev, frame))
+            executor = self._executor
+        for dev, (channels, desired) in work:
+            executor.submit(self._complete, dev, channels, desired)
+        return active
+
+    def _complete(self, dev, channels, desired):
+        start = time.monotonic()
+        try:
+            rc = self._send(dev, channels, desired)
+        except Exception:
+            rc = None
+        end = time.monotonic()
+        with self._lock:
+            dev.busy = False
+            dev.rtt = end - start if not dev.rtt else 0.8 * dev.rtt + 0.2 * (end - start)
+            if rc == p.RC_OK:
+                self.frames += 1
+                if len(channels) > 1:
+                    self.set_all_frames += 1
+                for i in channels:
+                    dev.channels[i].sent = desired[i]
+                dev.next_at = start + max(self.tick, dev.rtt)
+            else:
+                self.failures += 1
+                dev.next_at = end + self.retry
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.step():
+                self._stop.wait(self.tick)
+            else:
+                self._wake.wait()
+                self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rsee-ramp', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'set_all_frames': self.set_all_frames,
+                'superseded': self.superseded,
+                'failures': self.failures,
+                'late': self.late,
+                'devices': len(self._devices),
+            }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
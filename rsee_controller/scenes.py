@@ -0,0 +1,225 @@
+import threading
+from collections import OrderedDict
+
+from . import protocol as p
+
+# Per family: the scene fields and how each is sent.
+# 'all' fields are 8 values sent with SetAll, or per channel if only one changed;
+# 'channels' fields are sent per channel; 'whole' fields are one call.
+FIELDS = {
+    'pmd_8te': (
+        ('mode', 'whole', 'pmd_8te_change_mode'),
+        ('brightness', 'all', ('pmd_8te_brt_set_all', 'pmd_8te_brt_set_channel')),
+        ('pulse', 'all', ('pmd_8te_pls_set_all', 'pmd_8te_pls_set_channel')),
+    ),
+    'dps2_8te': (
+        ('settings', 'whole', 'dps2_8te_setting'),
+    ),
+    'cpl_8t': (
+        ('on', 'whole', 'cpl_8t_set_onoff'),
+        ('values', 'channels', 'cpl_8t_set_channel'),
+        ('currents', 'channels', 'cpl_8t_set_current'),
+    ),
+}
+
+
+def _normalize(family, state):
+    """Returns the state as a tuple in FIELDS order, with sequences as tuples."""
+    unknown = set(state) - {name for name, _, _ in FIELDS[family]}
+    if unknown:
+        raise ValueError("Unknown {} scene field(s): {}".format(family, ', '.join(sorted(unknown))))
+    compiled = []
+    for name, kind, _ in FIELDS[family]:
+        value = state.get(name)
+        if value is not None and kind != 'whole':
+            value = tuple(value)
+            if len(value) != p.CHANNELS:
+                raise ValueError("{} {} needs {} values".format(family, name, p.CHANNELS))
+        elif isinstance(value, list):
+            value = tuple(tuple(v) if isinstance(v, list) else v for v in value)
+        compiled.append(value)
+    return tuple(compiled)
+
+
+class Scene:
+    """
+    A named lighting state for one or more device families.
+
+        Scene('inspect', pmd_8te={'mode': 1, 'brightness': [255] * 8},
+                         cpl_8t={'on': True, 'values': [100] * 8})
+
+    Fields left out are not managed by the scene and never sent. The
+    fields are, per family:
+        pmd_8te: mode (ChangeMode argument), brightness, pulse (8 values each)
+        dps2_8te: settings (8 (range, onoff) pairs)
+        cpl_8t: on, values, currents (8 values each)
+    """
+    def __init__(self, name, **families):
+        unknown = set(families) - set(FIELDS)
+        if unknown:
+            raise ValueError("Unknown device family: {}".format(', '.join(sorted(unknown))))
+        self.name = name
+        # Compiled once, so planning only compares tuples
+        self.states = {family: _normalize(family, state) for family, state in families.items()}
+
+    def __repr__(self):
+        return 'Scene({!r}, families={})'.format(self.name, sorted(self.states))
+
+
+class Plan:
+    """
+    The calls that take a device from one scene to another, as
+    (wrapper method, args after the handle) pairs.
+    """
+    __slots__ = ('family', 'ops')
+
+    def __init__(self, family, ops):
+        self.family = family
+        self.ops = tuple(ops)
+
+    @property
+    def frames(self):
+        return len(self.ops)
+
+    def execute(self, controller, socket_handle, com_handle=None):
+        """Sends the plan. Returns 1, or the first failing return code."""
+        for method, args in self.ops:
+            if self.family == 'pmd_8te':
+                rc = getattr(controller, method)(socket_handle, *args, com_handle=com_handle)
+            else:
+                rc = getattr(controller, method)(socket_handle, *args)
+            if rc != p.RC_OK and rc is not True:
+                return rc
+        return p.RC_OK
+
+    def __repr__(self):
+        return 'Plan({!r}, {!r})'.format(self.family, self.ops)
+
+
+def diff(family, old, new):
+    """
+    Returns the ops that change compiled state `old` (None if unknown) to
+    `new`. Changed 8-value fields use one SetAll unless only one channel
+    changed, which costs one per-channel frame either way.
+    """
+    ops = []
+    for i, (name, kind, methods) in enumerate(FIELDS[family]):
+        target = new[i]
+        if target is None:
+            continue
+        current = None if old is None else old[i]
+        if current == target:
+            continue
+        if kind == 'whole':
+            ops.append((methods, (list(target) if isinstance(target, tuple) else target,)))
+            continue
+        changed = [ch for ch in range(p.CHANNELS) if current is None or current[ch] != target[ch]]
+        if kind == 'all' and len(changed) > 1:
+            ops.append((methods[0], (list(target),)))
+        else:
+            method = methods[1] if kind == 'all' else methods
+            ops.extend((method, (ch + 1, target[ch])) for ch in changed)
+    return ops
+
+
+class SceneCompiler:
+    """
+    Plans scene switches as minimal command sequences and caches them.
+
+    Plans are keyed by (family, from scene, to scene) in an LRU of
+    `cache_size` entries; warm() computes them ahead of time so switching
+    only replays a cached plan. apply() tracks each device's current scene
+    and sends the full target scene when it is unknown.
+
+        compiler = SceneCompiler([day, night])
+        compiler.warm()
+        compiler.apply(controller, 'pmd_8te', 'night', net_handle)
+    """
+    def __init__(self, scenes=(), cache_size=256):
+        """
+        Args:
+            scenes (list): Scene objects.
+            cache_size (int): Plans kept in the LRU cache.
+        """
+        self.scenes = {}
+        self.cache_size = cache_size
+        self._plans = OrderedDict()
+        self._current = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        for scene in scenes:
+            self.add(scene)
+
+    def add(self, scene):
+        """
+        Adds or replaces a scene, dropping plans that involve it. Devices on a
+        replaced scene get an unknown state, so their next apply sends a full plan.
+        """
+        with self._lock:
+            replaced = scene.name in self.scenes
+            self.scenes[scene.name] = scene
+            for key in [k for k in self._plans if scene.name in k[1:]]:
+                del self._plans[key]
+            if replaced:
+                for key in [k for k, name in self._current.items() if name == scene.name]:
+                    del self._current[key]
+
+    def plan(self, family, from_scene, to_scene):
+        """
+        Returns the Plan from one scene to another. from_scene None means the
+        device state is unknown, so every field of the target is sent.
+        """
+        key = (family, from_scene, to_scene)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+            new = self.scenes[to_scene].states.get(family)
+            if new is None:
+                raise KeyError("Scene {!r} has no {} state".format(to_scene, family))
+            old = None if from_scene is None else self.scenes[from_scene].states.get(family)
+            plan = self._plans[key] = Plan(family, diff(family, old, new))
+            if len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+            return plan
+
+    def warm(self, family=None):
+        """Plans every switch between scenes, for one family or all of them."""
+        for fam in ([family] if family else FIELDS):
+            names = [name for name, scene in self.scenes.items() if fam in scene.states]
+            for to_scene in names:
+                self.plan(fam, None, to_scene)
+                for from_scene in names:
+                    if from_scene != to_scene:
+                        self.plan(fam, from_scene, to_scene)
+
+    def current(self, family, socket_handle, com_handle=None):
+        """The scene a device was last switched to, or None."""
+        return self._current.get((family, com_handle or 0, socket_handle or 0))
+
+    def forget(self, family, socket_handle, com_handle=None):
+        """Marks a device's state unknown, e.g. after a reconnect."""
+        self._current.pop((family, com_handle or 0, socket_handle or 0), None)
+
+    def apply(self, controller, family, to_scene, socket_handle, com_handle=None):
+        """
+        Switches a device to a scene, sending only what differs from its
+        current scene. On failure the device's state becomes unknown.
+        Returns 1, or the first failing return code.
+        """
+        key = (family, com_handle or 0, socket_handle or 0)
+        plan = self.plan(family, self._current.get(key), to_scene)
+        rc = plan.execute(controller, socket_handle, com_handle)
+        if rc == p.RC_OK:
+            self._current[key] = to_scene
+        else:
+            self._current.pop(key, None)
+        return rc
+
+    def stats(self):
+        with self._lock:
+            return {'plans': len(self._plans), 'hits': self.hits, 'misses': self.misses}
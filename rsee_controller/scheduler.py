@@ -0,0 +1,205 @@
+import threading
+import time
+
+from . import protocol as p
+from .batch import WriteBatch
+
+try:
+    _now_ns = time.perf_counter_ns
+except AttributeError:
+    # Python 3.6
+    def _now_ns():
+        return int(time.perf_counter() * 1e9)
+
+
+class RunReport:
+    """
+    Achieved vs planned timing of one scheduler run. `exceptions` holds
+    (event, exception) for sends that raised; they also count as failures.
+    """
+
+    def __init__(self):
+        self.errors_ns = []
+        self.exceptions = []
+        self.groups = 0
+        self.failures = 0
+        self.duration = 0.0
+
+    def stats(self):
+        """
+        Returns the timing error of each event (start of its own send minus its
+        planned time) as mean/p50/p99/max in microseconds, with event, group
+        and failure counts.
+        """
+        errors = sorted(self.errors_ns)
+        n = len(errors)
+
+        def pct(q):
+            return errors[min(n - 1, int(q * n))] / 1e3 if n else 0.0
+        return {
+            'events': n,
+            'groups': self.groups,
+            'failures': self.failures,
+            'duration': self.duration,
+            'mean_us': sum(errors) / n / 1e3 if n else 0.0,
+            'p50_us': pct(0.5),
+            'p99_us': pct(0.99),
+            'max_us': errors[-1] / 1e3 if n else 0.0,
+        }
+
+
+class StrobeScheduler:
+    """
+    Plays a timeline of pulse-width (or PM-S channel) changes at precise times.
+
+    Events are (t_offset, handle, channel, value) tuples, with t_offset in
+    seconds from the start of the run; a fifth element may name the family
+    ('pmd_8te' or 'pms') to override the scheduler's default. The timeline
+    runs on a dedicated thread, which sleeps through long waits and spins
+    on time.perf_counter_ns for the last `spin` seconds. Events within
+    `window` of each other are sent together, several PM-D-8TE channels of
+    one controller as one PLSSetAll when all its pulse widths are known.
+
+        scheduler = StrobeScheduler(controller, pulse={h: [100] * 8})
+        report = scheduler.run([(0.000, h, 1, 200), (0.020, h, 1, 100)])
+        print(report.stats())
+    """
+    def __init__(self, controller, family='pmd_8te', window=0.0005, spin=0.002, com_handle=None, pulse=None):
+        """
+        Args:
+            controller (RseeController): The controller that sends the events.
+            family (str): 'pmd_8te' (pulse width) or 'pms' (channel value).
+            window (float): Events this close together, in seconds, form one send.
+            spin (float): Seconds before an event to stop sleeping and busy-wait.
+            com_handle (int, optional): The com handle, for serial PM-D-8TE/PM-S.
+            pulse (dict, optional): Current pulse widths, {handle: 8 values}, which
+                                    lets several channel changes go out as one SetAll.
+        """
+        self.controller = controller
+        self.family = family
+        self.window_ns = int(window * 1e9)
+        self.spin_ns = int(spin * 1e9)
+        self.com_handle = com_handle
+        self._pulse = {h: list(values) for h, values in (pulse or {}).items()}
+        self._thread = None
+        self._report = None
+        self._error = None
+
+    def _groups(self, timeline):
+        """Sorts the events and splits them into send windows of (offset_ns, events)."""
+        events = sorted(((int(e[0] * 1e9),) + tuple(e[1:]) for e in timeline), key=lambda e: e[0])
+        groups = []
+        for event in events:
+            if groups and event[0] - groups[-1][0] <= self.window_ns:
+                groups[-1][1].append(event)
+            else:
+                groups.append((event[0], [event]))
+        return groups
+
+    def _send(self, events, start_ns, report):
+        """
+        Sends one window of events, recording each send's timing error
+        against its own events' planned times, and any failures.
+        """
+        by_handle = {}
+        sends = []
+        for event in events:
+            family = event[4] if len(event) > 4 else self.family
+            if family == 'pms':
+                sends.append(('pms', event[1], [event]))
+            elif event[1] not in by_handle:
+                by_handle[event[1]] = [event]
+                sends.append(('pmd_8te', event[1], by_handle[event[1]]))
+            else:
+                by_handle[event[1]].append(event)
+        for family, handle, group in sends:
+            sent = _now_ns()
+            try:
+                rc = self._send_one(family, handle, group)
+            except Exception as e:
+                rc = None
+                report.exceptions.extend((event, e) for event in group)
+            report.errors_ns.extend(sent - (start_ns + event[0]) for event in group)
+            if rc != p.RC_OK:
+                report.failures += 1
+
+    def _send_one(self, family, handle, group):
+        ctl, com = self.controller, self.com_handle
+        if family == 'pms':
+            _, _, channel, value = group[0][:4]
+            return ctl.pms_set_channel(handle, channel, value, com)
+        if len(group) == 1:
+            _, _, channel, value = group[0][:4]
+            rc = ctl.pmd_8te_pls_set_channel(handle, channel, value, com)
+        else:
+            # max_pending above the channel count: send only on flush()
+            batch = WriteBatch(ctl, handle, com, max_pending=p.CHANNELS + 1, pulse=self._pulse.get(handle))
+            for event in group:
+                batch.pls_set_channel(event[2], event[3])
+            rc = batch.flush()
+        known = self._pulse.get(handle)
+        if rc == p.RC_OK:
+            if known is not None:
+                for event in group:
+                    known[event[2] - 1] = event[3]
+        else:
+            self._pulse.pop(handle, None)
+        return rc
+
+    def _run(self, groups, start_ns):
+        report = RunReport()
+        sleep, now_ns, spin_ns = time.sleep, _now_ns, self.spin_ns
+        try:
+            for offset_ns, events in groups:
+                target = start_ns + offset_ns
+                remaining = target - now_ns()
+                if remaining > spin_ns:
+                    sleep((remaining - spin_ns) / 1e9)
+                while now_ns() < target:
+                    pass
+                self._send(events, start_ns, report)
+                report.groups += 1
+        except BaseException as e:
+            # Re-raised by join()
+            self._error = e
+        report.duration = (now_ns() - start_ns) / 1e9
+        self._report = report
+
+    def start(self, timeline, delay=0.001):
+        """
+        Starts playing a timeline on the scheduler thread and returns at once.
+        Args:
+            timeline (list): (t_offset, handle, channel, value[, family]) events.
+            delay (float): Seconds from now to t_offset 0, to let the thread start.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError('A timeline is already running')
+        groups = self._groups(timeline)
+        self._report = None
+        self._error = None
+        start_ns = _now_ns() + int(delay * 1e9)
+        self._thread = threading.Thread(target=self._run, args=(groups, start_ns),
+                                        name='rsee-strobe', daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self, timeout=None):
+        """
+        Waits for the running timeline and returns its RunReport. Re-raises an
+        error that stopped the scheduler thread.
+        Args:
+            timeout (float, optional): Longest wait in seconds. Raises TimeoutError
+                                       if the timeline is still playing then.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                raise TimeoutError('Timeline still playing after {}s'.format(timeout))
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return self._report
+
+    def run(self, timeline, delay=0.001):
+        """Plays a timeline and waits for it. Returns the RunReport."""
+        return self.start(timeline, delay).join()
@@ -0,0 +1,409 @@
+import collections
+import os
+import select
+import threading
+import time
+
+from . import protocol as p
+
+try:
+    import termios
+except ImportError:
+    # Windows: use the DLL's OpenCom instead
+    termios = None
+
+# Bits on the wire per byte: start + 8 data + stop
+_BITS_PER_BYTE = 10
+
+
+class _Request:
+    """One frame waiting for its reply. reply_len None reads free text until the line goes quiet."""
+
+    __slots__ = ('frame', 'reply_len', 'reply', 'ok', 'done', 'deadline')
+
+    def __init__(self, frame, reply_len):
+        self.frame = frame
+        self.reply_len = reply_len
+        self.reply = bytearray()
+        self.ok = False
+        self.done = threading.Event()
+        self.deadline = None
+
+
+class _Port:
+    """
+    An open serial port and the I/O thread that pipelines requests on it.
+
+    Requests are written in order and their replies matched in the same
+    order by length, so several can be in flight at once. The write
+    scheduler keeps at most `window` unanswered bytes on the line, coalesces
+    queued frames into one write, and gives each request a deadline from
+    the bytes queued ahead of it at the line rate plus `timeout`. When a
+    reply is late the replies of everything in flight can no longer be
+    matched, so those requests fail and the port waits for the line to go
+    quiet before writing again.
+    """
+    def __init__(self, fd, name, baud_rate, timeout, window, info_idle):
+        self.fd = fd
+        self.name = name
+        self.byte_time = float(_BITS_PER_BYTE) / baud_rate
+        self.timeout = timeout
+        self.window = window
+        self.info_idle = info_idle
+        self.stats = {'requests': 0, 'writes': 0, 'bytes_out': 0, 'bytes_in': 0,
+                      'timeouts': 0, 'discarded': 0, 'max_in_flight': 0}
+        self._queue = collections.deque()
+        self._in_flight = collections.deque()
+        self._out = bytearray()
+        self._line_free = 0.0
+        self._quiet_until = 0.0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name='rsee-serial', daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, reply_len):
+        request = _Request(bytes(frame), reply_len)
+        with self._lock:
+            if self._closed:
+                request.done.set()
+                return request
+            self._queue.append(request)
+            self.stats['requests'] += 1
+        os.write(self._wake_w, b'\0')
+        return request
+
+    def request(self, frame, reply_len):
+        """Sends a frame and waits for its reply. Returns the reply bytes, or None."""
+        request = self.submit(frame, reply_len)
+        request.done.wait()
+        return request.reply if request.ok else None
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        os.write(self._wake_w, b'\0')
+        self._thread.join()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        os.close(self.fd)
+
+    # --- I/O thread ---
+    def _schedule(self, now):
+        """Moves queued requests onto the line while the window allows."""
+        if now < self._quiet_until:
+            return
+        in_flight = sum(len(r.frame) for r in self._in_flight)
+        with self._lock:
+            while self._queue:
+                request = self._queue[0]
+                if self._in_flight:
+                    # Free-text replies have no length, so they are never pipelined
+                    if request.reply_len is None or self._in_flight[-1].reply_len is None:
+                        break
+                    if in_flight + len(request.frame) > self.window:
+                        break
+                self._queue.popleft()
+                self._in_flight.append(request)
+                self._out += request.frame
+                in_flight += len(request.frame)
+                self._line_free = max(now, self._line_free) + len(request.frame) * self.byte_time
+                reply_time = (request.reply_len or 0) * self.byte_time
+                request.deadline = self._line_free + reply_time + self.timeout
+        if len(self._in_flight) > self.stats['max_in_flight']:
+            self.stats['max_in_flight'] = len(self._in_flight)
+
+    def _feed(self, data, now):
+        """Hands received bytes to the in-flight requests in order."""
+        self.stats['bytes_in'] += len(data)
+        view = memoryview(data)
+        while view and self._in_flight:
+            request = self._in_flight[0]
+            if request.reply_len is None:
+                take = min(len(view), p.INFO_MAX - len(request.reply))
+                request.reply += view[:take]
+                request.deadline = now + self.info_idle
+                view = view[take:]
+                if len(request.reply) >= p.INFO_MAX:
+                    self._finish(True)
+                continue
+            take = min(len(view), request.reply_len - len(request.reply))
+            request.reply += view[:take]
+            view = view[take:]
+            if len(request.reply) == request.reply_len:
+                self._finish(True)
+        if view:
+            # Late replies to failed requests, or noise
+            self.stats['discarded'] += len(view)
+            self._quiet_until = now + self.info_idle
+
+    def _finish(self, ok):
+        request = self._in_flight.popleft()
+        request.ok = ok
+        request.done.set()
+
+    def _expire(self, now):
+        if not self._in_flight or now < self._in_flight[0].deadline:
+            return
+        head = self._in_flight[0]
+        if head.reply_len is None and head.reply:
+            self._finish(True)
+            return
+        self.stats['timeouts'] += 1
+        while self._in_flight:
+            self._finish(False)
+        self._out.clear()
+        self._quiet_until = now + self.info_idle
+
+    def _run(self):
+        fd = self.fd
+        try:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    closed = self._closed
+                if closed:
+                    break
+                self._schedule(now)
+                waits = [self._in_flight[0].deadline] if self._in_flight else []
+                if self._queue and now < self._quiet_until:
+                    waits.append(self._quiet_until)
+                wait = max(0.0, min(waits) - now) if waits else None
+                readable, writable, _ = select.select([fd, self._wake_r], [fd] if self._out else [], [], wait)
+                now = time.monotonic()
+                if self._wake_r in readable:
+                    os.read(self._wake_r, 4096)
+                if fd in readable:
+                    try:
+                        data = os.read(fd, 4096)
+                    except BlockingIOError:
+                        data = b''
+                    if data:
+                        self._feed(data, now)
+                if writable and self._out:
+                    n = os.write(fd, self._out)
+                    del self._out[:n]
+                    self.stats['writes'] += 1
+                    self.stats['bytes_out'] += n
+                self._expire(now)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._closed = True
+                pending = list(self._in_flight) + list(self._queue)
+                self._in_flight.clear()
+                self._queue.clear()
+            for request in pending:
+                request.done.set()
+
+
+def _speed(baud_rate):
+    return getattr(termios, 'B{}'.format(baud_rate), None)
+
+
+class SerialTransport:
+    """
+    Speaks the PM-D-4TE/8TE protocol over a POSIX serial port (/dev/tty*)
+    with termios, without RseeController.dll.
+
+    Like SocketTransport it exposes the DLL's RseeController_* functions
+    with the same arguments and return codes, so it can be passed to
+    RseeController(transport=...); OpenCom takes a device path such as
+    '/dev/ttyUSB0' and returns the com handle. The port is non-blocking
+    and driven by one I/O thread, so calls from several threads to one
+    port are pipelined: their frames share the line and their replies are
+    matched in order, within a window of unanswered bytes.
+
+    Wrapper families that work over it: pmd_8te (all functions) and pmd
+    (channel set and read, which use the same frames). PM_D_SetOnoff and
+    PM_D_ChangeMode are separate DLL exports whose frames protocol.py does
+    not define, so they return RC_BAD_ARGUMENT. The DPS2, DPS3, MDPS, AHC,
+    PM-C and SPS frames are not documented either; exchange() sends raw
+    frames to those controllers through the same pipeline.
+    """
+    def __init__(self, timeout=0.5, window=64, info_idle=0.05):
+        """
+        Args:
+            timeout (float): Seconds to wait for a reply beyond its time on the wire.
+            window (int): Most unanswered bytes on the line per port, to stay
+                          within the controller's receive buffer.
+            info_idle (float): ReadInfo stops once the reply has been quiet this long.
+        """
+        if termios is None:
+            raise OSError('SerialTransport needs termios (Linux or macOS)')
+        self.timeout = timeout
+        self.window = window
+        self.info_idle = info_idle
+        self._ports = {}
+
+    def _port(self, com_handle):
+        return self._ports.get(com_handle) if com_handle else None
+
+    def exchange(self, com_handle, frame, reply_len):
+        """
+        Sends a raw frame and returns its reply of reply_len bytes (free text
+        if None), or None on timeout or a bad handle.
+        """
+        port = self._port(com_handle)
+        return None if port is None else port.request(frame, reply_len)
+
+    def stats(self, com_handle):
+        """Counters of one port: requests, writes, bytes, timeouts and the deepest pipeline."""
+        return dict(self._ports[com_handle].stats)
+
+    # --- Communication ---
+    def RseeController_OpenCom(self, port_name, baud_rate, overlapped=False):
+        """Opens the port in raw 8N1 mode. overlapped is ignored; I/O is always non-blocking."""
+        if isinstance(port_name, bytes):
+            port_name = port_name.decode()
+        speed = _speed(baud_rate)
+        if speed is None:
+            return 0
+        try:
+            fd = os.open(port_name, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError:
+            return 0
+        try:
+            attrs = termios.tcgetattr(fd)
+            attrs[0] = 0                                                # iflag: no flow control or CR mapping
+            attrs[1] = 0                                                # oflag: raw output
+            attrs[2] = termios.CS8 | termios.CREAD | termios.CLOCAL     # cflag: 8N1
+            attrs[3] = 0                                                # lflag: no echo, not canonical
+            attrs[4] = attrs[5] = speed
+            attrs[6][termios.VMIN] = 0
+            attrs[6][termios.VTIME] = 0
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+            termios.tcflush(fd, termios.TCIOFLUSH)
+        except termios.error:
+            os.close(fd)
+            return 0
+        self._ports[fd] = _Port(fd, port_name, baud_rate, self.timeout, self.window, self.info_idle)
+        return fd
+
+    def RseeController_CloseCom(self, port_name, com_handle):
+        port = self._ports.pop(com_handle, None)
+        if port is None:
+            return False
+        port.close()
+        return True
+
+    # --- PM-D-8TE Series ---
+    def _set(self, com_handle, frame, reply_len):
+        port = self._port(com_handle)
+        if port is None:
+            return p.RC_BAD_HANDLE
+        reply = port.request(frame, reply_len)
+        return p.RC_OK if reply is not None and reply[0] == p.ACK else p.RC_NO_REPLY
+
+    def _set_all(self, com_handle, frame, frame_len, reply_len):
+        port = self._port(com_handle)
+        if port is None:
+            return p.RC_BAD_HANDLE
+        reply = port.request(frame, reply_len * p.CHANNELS)
+        if reply is None:
+            return p.RC_NO_REPLY
+        return p.check_set_all(reply, frame, frame_len, reply_len)
+
+    def _read(self, com_handle, frame, reply_len, limit):
+        port = self._port(com_handle)
+        if port is None:
+            return p.RC_BAD_HANDLE
+        reply = port.request(frame, reply_len)
+        if reply is None or reply[0] != p.ACK:
+            return p.RC_BAD_REPLY
+        value = p.parse_digits(reply, reply_len - 3)
+        return value if 0 <= value <= limit else p.RC_BAD_REPLY
+
+    def RseeController_PM_D_8TE_BRTSetChannel(self, com_handle, socket_handle, channel, value):
+        if not 1 <= channel <= p.CHANNELS or not 0 <= value <= p.BRT_MAX:
+            return p.RC_BAD_ARGUMENT
+        return self._set(com_handle, p.brt_set_frame(channel, value), p.BRT_SET_REPLY)
+
+    def RseeController_PM_D_8TE_BRTSetAll(self, com_handle, socket_handle, values):
+        values = values[:p.CHANNELS]
+        if len(values) < p.CHANNELS or not all(0 <= v <= p.BRT_MAX for v in values):
+            return p.RC_BAD_ARGUMENT
+        frame = b''.join(p.brt_set_frame(ch, v) for ch, v in enumerate(values, start=1))
+        return self._set_all(com_handle, frame, p.BRT_SET_LEN, p.BRT_SET_REPLY)
+
+    def RseeController_PM_D_8TE_BRTReadChannel(self, com_handle, socket_handle, channel):
+        if not 1 <= channel <= p.CHANNELS:
+            return p.RC_BAD_ARGUMENT
+        return self._read(com_handle, p.brt_read_frame(channel), p.BRT_READ_REPLY, p.BRT_MAX)
+
+    def RseeController_PM_D_8TE_PLSSetChannel(self, com_handle, socket_handle, channel, value):
+        if not 1 <= channel <= p.CHANNELS or not 0 <= value <= p.PLS_MAX:
+            return p.RC_BAD_ARGUMENT
+        return self._set(com_handle, p.pls_set_frame(channel, value), p.PLS_SET_REPLY)
+
+    def RseeController_PM_D_8TE_PLSSetAll(self, com_handle, socket_handle, values):
+        values = values[:p.CHANNELS]
+        if len(values) < p.CHANNELS or not all(0 <= v <= p.PLS_MAX for v in values):
+            return p.RC_BAD_ARGUMENT
+        frame = b''.join(p.pls_set_frame(ch, v) for ch, v in enumerate(values, start=1))
+        return self._set_all(com_handle, frame, p.PLS_SET_LEN, p.PLS_SET_REPLY)
+
+    def RseeController_PM_D_8TE_PLSReadChannel(self, com_handle, socket_handle, channel):
+        if not 1 <= channel <= p.CHANNELS:
+            return p.RC_BAD_ARGUMENT
+        return self._read(com_handle, p.pls_read_frame(channel), p.PLS_READ_REPLY, p.PLS_MAX)
+
+    def RseeController_PM_D_8TE_ChangeMode(self, com_handle, socket_handle, mode):
+        if not 1 <= mode <= len(p.MODE_LETTERS):
+            return p.RC_BAD_ARGUMENT
+        port = self._port(com_handle)
+        if port is None:
+            return p.RC_BAD_HANDLE
+        frame = p.mode_frame(mode)
+        reply = port.request(frame, 1)
+        return p.RC_OK if reply is not None and reply[0] == frame[1] else p.RC_NO_REPLY
+
+    def _read_all(self, com_handle, frame, reply_len, buff):
+        port = self._port(com_handle)
+        if port is None:
+            return p.RC_BAD_HANDLE
+        n = reply_len * p.CHANNELS
+        reply = port.request(frame, n)
+        if reply is None:
+            return p.RC_NO_REPLY
+        buff[:n] = bytes(reply)
+        return p.RC_OK
+
+    def RseeController_PM_D_8TE_BRTReadAll(self, com_handle, socket_handle, buff):
+        return self._read_all(com_handle, p.BRT_READ_ALL_FRAME, p.BRT_READ_REPLY, buff)
+
+    def RseeController_PM_D_8TE_PLSReadAll(self, com_handle, socket_handle, buff):
+        return self._read_all(com_handle, p.PLS_READ_ALL_FRAME, p.PLS_READ_REPLY, buff)
+
+    def RseeController_PM_D_8TE_ReadInfo(self, com_handle, socket_handle, buff):
+        """Copies the info text into buff and returns its length, like the DLL."""
+        port = self._port(com_handle)
+        if port is None:
+            return p.RC_BAD_HANDLE
+        data = port.request(p.INFO_FRAME, None) or b''
+        n = min(len(data), len(buff) - 1)
+        buff[:n + 1] = bytes(data[:n]) + b'\0'
+        return n
+
+    # --- PM-D Series ---
+    def RseeController_PM_D_BRTSetChannel(self, com_handle, channel, value):
+        return self.RseeController_PM_D_8TE_BRTSetChannel(com_handle, 0, channel, value)
+
+    def RseeController_PM_D_BRTReadChannel(self, com_handle, channel):
+        return self.RseeController_PM_D_8TE_BRTReadChannel(com_handle, 0, channel)
+
+    def RseeController_PM_D_PLSSetChannel(self, com_handle, channel, value):
+        return self.RseeController_PM_D_8TE_PLSSetChannel(com_handle, 0, channel, value)
+
+    def RseeController_PM_D_PLSReadChannel(self, com_handle, channel):
+        return self.RseeController_PM_D_8TE_PLSReadChannel(com_handle, 0, channel)
+
+    def RseeController_PM_D_SetOnoff(self, com_handle, state):
+        """The DLL's PM-D on/off frame is not documented in protocol.py, so it cannot be emulated."""
+        return p.RC_BAD_ARGUMENT
+
+    def RseeController_PM_D_ChangeMode(self, com_handle, mode):
+        """The DLL's PM-D mode frame is not documented in protocol.py, so it cannot be emulated."""
+        return p.RC_BAD_ARGUMENT
@@ -0,0 +1,143 @@
+import time
+from concurrent.futures import wait
+
+from . import protocol as p
+from .fleet import DeviceResult, FleetResult
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Marks a cell whose value on the device is not known, so it always differs
+_UNKNOWN = -1
+
+
+class SetpointMatrix:
+    """
+    Applies a (devices x 8) matrix of brightness or pulse setpoints to a
+    fleet, sending only the cells that changed since the last apply.
+
+    Change detection is one vectorized comparison with the last applied
+    matrix; Python only loops over the controllers with changed cells. A
+    PM-D-8TE row with several changed channels is sent as one SetAll frame,
+    a single changed channel as a per-channel frame; PM-S rows are always
+    sent per channel. The controllers are written in parallel on the
+    fleet's thread pool. Cells of a row that failed or missed the deadline
+    are resent on the next apply. Requires NumPy.
+
+        setpoints = SetpointMatrix(fleet)
+        result = setpoints.apply(corrections.astype(np.int32), deadline=0.05)
+    """
+    def __init__(self, fleet, kind='brt', current=None, set_all_min=2):
+        """
+        Args:
+            fleet (Fleet): The devices, one matrix row each in fleet order.
+            kind (str): 'brt' for brightness or 'pls' for pulse width (PM-D-8TE only).
+            current (optional): The values now on the devices, as a (devices x 8)
+                                array. If None the first apply sends every cell.
+            set_all_min (int): Changed channels from which a PM-D-8TE row is sent as SetAll.
+        """
+        if np is None:
+            raise ImportError('SetpointMatrix needs NumPy (pip install numpy)')
+        if kind not in ('brt', 'pls'):
+            raise ValueError("kind must be 'brt' or 'pls'")
+        if kind == 'pls' and any(d.family == 'pms' for d in fleet.devices):
+            raise ValueError('PM-S devices have no pulse width setting')
+        self.fleet = fleet
+        self.kind = kind
+        self.limit = p.BRT_MAX if kind == 'brt' else p.PLS_MAX
+        self.set_all_min = set_all_min
+        self.shape = (len(fleet.devices), p.CHANNELS)
+        self._applied = np.full(self.shape, _UNKNOWN, dtype=np.int32)
+        if current is not None:
+            self._applied[...] = self._check(current)
+        self.cycles = 0
+        self.cells_sent = 0
+        self.set_all_frames = 0
+        self.channel_frames = 0
+
+    @property
+    def applied(self):
+        """A copy of the last applied matrix; -1 marks cells not known to be set."""
+        return self._applied.copy()
+
+    def forget(self, rows=None):
+        """Marks rows (default: all) as unknown, so the next apply resends them."""
+        if rows is None:
+            self._applied.fill(_UNKNOWN)
+        else:
+            self._applied[rows] = _UNKNOWN
+
+    def _check(self, setpoints):
+        matrix = np.array(setpoints, dtype=np.int32)
+        if matrix.shape != self.shape:
+            raise ValueError('setpoints must have shape {}, got {}'.format(self.shape, matrix.shape))
+        if ((matrix < 0) | (matrix > self.limit)).any():
+            raise ValueError('setpoints must be within 0-{}'.format(self.limit))
+        return matrix
+
+    def _steps(self, device, row, channels):
+        """The calls that bring one device to `row`, given its changed channel indexes."""
+        ctl, com, net = self.fleet.controller, device.com_handle, device.socket_handle
+        if device.family == 'pms':
+            return [lambda c=c: ctl.pms_set_channel(net, c + 1, int(row[c]), com) for c in channels]
+        if len(channels) >= self.set_all_min:
+            set_all = ctl.pmd_8te_brt_set_all if self.kind == 'brt' else ctl.pmd_8te_pls_set_all
+            return [lambda: set_all(net, row, com)]
+        set_channel = ctl.pmd_8te_brt_set_channel if self.kind == 'brt' else ctl.pmd_8te_pls_set_channel
+        return [lambda c=c: set_channel(net, c + 1, int(row[c]), com) for c in channels]
+
+    def apply(self, setpoints, deadline=None):
+        """
+        Sends the cells of `setpoints` that differ from the last applied matrix.
+        Args:
+            setpoints: A (devices x 8) integer array, e.g. a NumPy int32 matrix.
+            deadline (float, optional): Seconds allowed for the whole fleet.
+        Returns a FleetResult for the devices that had changes, in fleet order.
+        """
+        start = time.monotonic()
+        target = self._check(setpoints)
+        changed = target != self._applied
+        rows = np.flatnonzero(changed.any(axis=1))
+        self.cycles += 1
+        if not len(rows):
+            return FleetResult([], time.monotonic() - start)
+
+        deadline_at = None if deadline is None else start + deadline
+        devices = self.fleet.devices
+        futures = {}
+        for r in rows.tolist():
+            channels = np.flatnonzero(changed[r]).tolist()
+            steps = self._steps(devices[r], target[r], channels)
+            if len(steps) == 1 and len(channels) > 1:
+                self.set_all_frames += 1
+            else:
+                self.channel_frames += len(steps)
+            self.cells_sent += len(channels)
+            futures[self.fleet.apply_steps(devices[r], steps, deadline_at)] = r
+        done, not_done = wait(futures, deadline)
+
+        results = {}
+        for future in done:
+            r = futures[future]
+            result = results[r] = future.result()
+            if result.ok:
+                self._applied[r] = target[r]
+            else:
+                self._applied[r] = _UNKNOWN
+        for future in not_done:
+            # Running calls cannot be interrupted; their rows are resent next time.
+            future.cancel()
+            r = futures[future]
+            results[r] = DeviceResult(devices[r].name, None, time.monotonic() - start, True)
+            self._applied[r] = _UNKNOWN
+        return FleetResult([results[r] for r in sorted(results)], time.monotonic() - start)
+
+    def stats(self):
+        return {
+            'cycles': self.cycles,
+            'cells_sent': self.cells_sent,
+            'set_all_frames': self.set_all_frames,
+            'channel_frames': self.channel_frames,
+        }
@@ -0,0 +1,365 @@
+"""
+Local stand-in for PM-D-4TE/8TE controllers.
+
+Each SimulatedController is an asyncio TCP server that answers the same
+frames as the real controller (see protocol.py), keeps brightness, pulse
+width and mode state per channel, and can inject latency, jitter, dropped
+replies and connection resets. Run many on localhost ports to exercise a
+fleet without hardware:
+
+    python -m rsee_controller.simulator --count 40 --port 9000 --latency 0.002
+
+SerialSimulator does the same on a pseudo-terminal, standing in for a
+controller on a serial port (see serialport.py):
+
+    python -m rsee_controller.simulator --serial --baud 19200
+"""
+import argparse
+import asyncio
+import os
+import random
+import select
+import threading
+import time
+
+from . import protocol as p
+
+
+class ControllerState:
+    """
+    Register state of one simulated controller.
+
+    `mode` is the last ChangeMode value (1=L, 2=H, 3=P). The wrapper's
+    pmd_8te_set_onoff_mode and pmd_8te_set_strobe_mode both write it.
+    """
+    def __init__(self, channels=p.CHANNELS, model=None):
+        self.channels = channels
+        self.model = model or 'PM-D-{}TE'.format(channels)
+        self.brightness = [0] * channels
+        self.pulse = [0] * channels
+        self.mode = 1
+
+    def info(self):
+        return '{} V1.5 CH{} MODE{}'.format(self.model, self.channels, self.mode).encode('ascii')
+
+    def handle(self, frame):
+        """Applies one frame (without its '#') and returns the reply bytes, or None."""
+        n = len(frame)
+        if frame == b'SV':
+            return self.info()
+        if n == 2 and frame[:1] == b'S' and frame[1:] in (b'L', b'H', b'P'):
+            self.mode = p.MODE_LETTERS.index(frame[1]) + 1
+            return frame[1:]
+        if frame[:3] == b'SP0' and n in (4, 7):
+            channel = frame[3] - 0x30
+            if not 1 <= channel <= p.CHANNELS:
+                return None
+            if n == 7:
+                value = p.parse_digits(frame, 4)
+                if not 0 <= value <= p.PLS_MAX:
+                    return None
+                if channel <= self.channels:
+                    self.pulse[channel - 1] = value
+                return b'_' + frame[1:4]
+            value = self.pulse[channel - 1] if channel <= self.channels else 0
+            return b'_' + frame[1:4] + p.DIGITS[value]
+        if frame[:2] == b'S0' and n in (3, 6):
+            channel = frame[2] - 0x30
+            if not 1 <= channel <= p.CHANNELS:
+                return None
+            if n == 6:
+                value = p.parse_digits(frame, 3)
+                if not 0 <= value <= p.BRT_MAX:
+                    return None
+                if channel <= self.channels:
+                    self.brightness[channel - 1] = value
+                return b'_' + frame[1:3]
+            value = self.brightness[channel - 1] if channel <= self.channels else 0
+            return b'_' + frame[1:3] + p.DIGITS[value]
+        return None
+
+
+class SimulatedController:
+    """
+    An asyncio TCP server emulating one PM-D-4TE/8TE controller.
+
+    Faults are drawn per request, i.e. per write from the client, so a
+    whole SetAll frame shares one delay and fails or succeeds as a unit.
+    """
+    def __init__(self, host='127.0.0.1', port=0, channels=p.CHANNELS, latency=0.0, jitter=0.0,
+                 drop_rate=0.0, reset_rate=0.0, seed=None):
+        """
+        Args:
+            host (str): Address to listen on.
+            port (int): TCP port; 0 picks a free one.
+            channels (int): 8 for a PM-D-8TE, 4 for a PM-D-4TE.
+            latency (float): Seconds added before every reply.
+            jitter (float): Up to this many extra seconds, uniformly distributed.
+            drop_rate (float): Probability that a request is applied but not answered.
+            reset_rate (float): Probability that the connection is reset instead of answered.
+            seed (int, optional): Seed for the fault generator, for repeatable runs.
+        """
+        self.host = host
+        self.port = port
+        self.state = ControllerState(channels)
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.reset_rate = reset_rate
+        self.stats = {'connections': 0, 'requests': 0, 'frames': 0, 'dropped': 0, 'resets': 0}
+        self._random = random.Random(seed)
+        self._server = None
+        self._writers = set()
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.transport.abort()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _serve(self, reader, writer):
+        self.stats['connections'] += 1
+        self._writers.add(writer)
+        buf = b''
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                buf += data
+                if b'#' not in buf:
+                    continue
+                *frames, buf = buf.split(b'#')
+                reply = b''.join(r for r in map(self.state.handle, frames) if r is not None)
+                self.stats['requests'] += 1
+                self.stats['frames'] += len(frames)
+
+                delay = self.latency
+                if self.jitter:
+                    delay += self._random.uniform(0.0, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                roll = self._random.random()
+                if roll < self.reset_rate:
+                    self.stats['resets'] += 1
+                    writer.transport.abort()
+                    break
+                if roll < self.reset_rate + self.drop_rate:
+                    self.stats['dropped'] += 1
+                    continue
+                if reply:
+                    writer.write(reply)
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def stop_all(controllers):
+    for sim in controllers:
+        await sim.stop()
+
+
+async def start_many(count, host='127.0.0.1', port=0, **kwargs):
+    """
+    Starts `count` simulated controllers on consecutive ports from `port`,
+    or on free ports if `port` is 0. A `seed` is offset by each controller's
+    index, so their fault sequences are repeatable but not identical.
+    """
+    seed = kwargs.pop('seed', None)
+    controllers = []
+    for i in range(count):
+        sim = SimulatedController(host, port + i if port else 0,
+                                  seed=None if seed is None else seed + i, **kwargs)
+        controllers.append(await sim.start())
+    return controllers
+
+
+class SimulatorThread:
+    """
+    Runs simulated controllers on an event loop in a background thread, for
+    tests and benchmarks that drive the blocking RseeController API.
+
+        with SimulatorThread(count=8, latency=0.001) as sims:
+            for ip, port in sims.addresses:
+                ...
+    """
+    def __init__(self, count=1, host='127.0.0.1', port=0, **kwargs):
+        self.loop = asyncio.new_event_loop()
+        self.controllers = []
+        self._args = (count, host, port)
+        self._kwargs = kwargs
+        self._thread = threading.Thread(target=self.loop.run_forever, name='rsee-simulator', daemon=True)
+
+    @property
+    def addresses(self):
+        return [sim.address for sim in self.controllers]
+
+    def start(self):
+        self._thread.start()
+        future = asyncio.run_coroutine_threadsafe(start_many(*self._args, **self._kwargs), self.loop)
+        self.controllers = future.result()
+        return self
+
+    def stop(self):
+        if not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(stop_all(self.controllers), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class SerialSimulator:
+    """
+    A controller on a pseudo-terminal. Open `port` (e.g. /dev/pts/5) with
+    SerialTransport as if it were the controller's serial port.
+
+    Frames arriving in one read are answered together, in order, after
+    `latency` plus the replies' time on the wire at `baud_rate` (10 bits
+    per byte). The latency thus stands for the per-transfer turnaround of
+    a USB serial adapter, which pipelined requests share.
+
+        with SerialSimulator(baud_rate=19200) as sim:
+            com = controller.open_com(sim.port, 19200)
+    """
+    def __init__(self, channels=p.CHANNELS, baud_rate=None, latency=0.0, drop_rate=0.0, seed=None):
+        """
+        Args:
+            channels (int): 8 for a PM-D-8TE, 4 for a PM-D-4TE.
+            baud_rate (int, optional): Emulated line rate; None replies at once.
+            latency (float): Seconds added before every reply.
+            drop_rate (float): Probability that a frame is applied but not answered.
+            seed (int, optional): Seed for the fault generator, for repeatable runs.
+        """
+        import pty  # POSIX only
+        import tty
+        self.state = ControllerState(channels)
+        self.byte_time = 10.0 / baud_rate if baud_rate else 0.0
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.stats = {'reads': 0, 'frames': 0, 'dropped': 0}
+        self._random = random.Random(seed)
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = threading.Thread(target=self._serve, name='rsee-serial-simulator', daemon=True)
+
+    def _serve(self):
+        buf = b''
+        while True:
+            readable = select.select([self._master, self._stop_r], [], [])[0]
+            if self._stop_r in readable:
+                return
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                return
+            self.stats['reads'] += 1
+            buf += data
+            if b'#' not in buf:
+                continue
+            *frames, buf = buf.split(b'#')
+            replies = []
+            for frame in frames:
+                self.stats['frames'] += 1
+                reply = self.state.handle(frame)
+                if reply is None:
+                    continue
+                if self._random.random() < self.drop_rate:
+                    self.stats['dropped'] += 1
+                    continue
+                replies.append(reply)
+            reply = b''.join(replies)
+            delay = self.latency + len(reply) * self.byte_time
+            if delay > 0:
+                time.sleep(delay)
+            if reply:
+                os.write(self._master, reply)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread.is_alive():
+            os.write(self._stop_w, b'\0')
+            self._thread.join()
+        for fd in (self._master, self._slave, self._stop_r, self._stop_w):
+            os.close(fd)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate PM-D-4TE/8TE light controllers on local TCP ports.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899, help='first port; 0 picks free ports')
+    parser.add_argument('--count', type=int, default=1, help='number of controllers')
+    parser.add_argument('--channels', type=int, default=p.CHANNELS, choices=(4, 8))
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before each reply')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay, seconds')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='probability of a lost reply')
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='probability of a connection reset')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--serial', action='store_true', help='simulate serial controllers on pseudo-terminals')
+    parser.add_argument('--baud', type=int, default=None, help='emulated serial line rate')
+    args = parser.parse_args(argv)
+
+    if args.serial:
+        sims = [SerialSimulator(args.channels, args.baud, args.latency, args.drop_rate,
+                                None if args.seed is None else args.seed + i).start()
+                for i in range(args.count)]
+        for sim in sims:
+            print('PM-D-{}TE serial simulator on {}'.format(args.channels, sim.port), flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for sim in sims:
+                sim.stop()
+        return
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    controllers = loop.run_until_complete(start_many(
+        args.count, args.host, args.port, channels=args.channels, latency=args.latency,
+        jitter=args.jitter, drop_rate=args.drop_rate, reset_rate=args.reset_rate, seed=args.seed))
+    for sim in controllers:
+        print('PM-D-{}TE simulator listening on {}:{}'.format(args.channels, *sim.address), flush=True)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(stop_all(controllers))
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
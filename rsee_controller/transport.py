@@ -0,0 +1,286 @@
+import select
+import socket
+import threading
+
+from . import protocol as p
+
+
+class TransportLayer:
+    """
+    Base for objects stacked over a transport (the DLL or SocketTransport)
+    that intercept some of its RseeController_* functions.
+
+    Functions a layer does not define pass straight through to the layer
+    below. The first lookup caches them on the instance, so later calls cost
+    a plain attribute access.
+    """
+    inner = None
+
+    def bind(self, inner):
+        """Stacks this layer over `inner`, dropping cached pass-throughs."""
+        for name in [n for n in self.__dict__ if n.startswith('RseeController_')]:
+            del self.__dict__[name]
+        self.inner = inner
+
+    def __getattr__(self, name):
+        if not name.startswith('RseeController_') or self.inner is None:
+            raise AttributeError(name)
+        func = getattr(self.inner, name)
+        self.__dict__[name] = func
+        return func
+
+
+class _Connection:
+    """A persistent controller socket with its preallocated frame buffers."""
+
+    __slots__ = ('sock', 'lock', 'stale', 'brt_set', 'brt_read', 'pls_set', 'pls_read',
+                 'brt_all', 'pls_all', 'reply', 'view')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.stale = False
+        self.brt_set = bytearray(p.brt_set_frame(1, 0))
+        self.brt_read = bytearray(p.brt_read_frame(1))
+        self.pls_set = bytearray(p.pls_set_frame(1, 0))
+        self.pls_read = bytearray(p.pls_read_frame(1))
+        self.brt_all = bytearray(b''.join(p.brt_set_frame(ch, 0) for ch in range(1, p.CHANNELS + 1)))
+        self.pls_all = bytearray(b''.join(p.pls_set_frame(ch, 0) for ch in range(1, p.CHANNELS + 1)))
+        self.reply = bytearray(p.PLS_READ_REPLY * p.CHANNELS)
+        self.view = memoryview(self.reply)
+
+
+class SocketTransport:
+    """
+    Speaks the PM-D-4TE/8TE protocol over plain TCP sockets, without
+    RseeController.dll.
+
+    Exposes the same RseeController_* functions, arguments and return codes
+    as the DLL, so it can be passed to RseeController(transport=...) and
+    all pmd_8te_* methods keep working. Sockets stay open between calls
+    with TCP_NODELAY set, and each connection reuses its own frame buffers.
+    """
+    def __init__(self, timeout=0.5, connect_timeout=1.0, info_idle=0.05):
+        """
+        Args:
+            timeout (float): Seconds to wait for a reply before a command fails.
+            connect_timeout (float): Seconds to wait for ConnectNet.
+            info_idle (float): ReadInfo stops once the reply has been quiet this long.
+        """
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.info_idle = info_idle
+        self._connections = {}
+
+    def _connection(self, com_handle, socket_handle):
+        if com_handle:
+            return None
+        return self._connections.get(socket_handle)
+
+    def _exchange(self, conn, frame, reply_len):
+        """
+        Sends a frame and reads exactly reply_len bytes into conn.reply.
+        The caller holds conn.lock.
+        """
+        sock = conn.sock
+        view = conn.view
+        try:
+            if conn.stale:
+                self._drain(conn)
+            sock.sendall(frame)
+            got = 0
+            while got < reply_len:
+                n = sock.recv_into(view[got:reply_len])
+                if n == 0:
+                    raise ConnectionResetError('connection closed by controller')
+                got += n
+        except OSError:
+            # A late reply would answer the next command; drop it first.
+            conn.stale = True
+            return False
+        return True
+
+    @staticmethod
+    def _drain(conn):
+        sock = conn.sock
+        while select.select([sock], [], [], 0)[0]:
+            if not sock.recv(4096):
+                break
+        conn.stale = False
+
+    # --- Communication ---
+    def RseeController_ConnectNet(self, ip_address, port):
+        if isinstance(ip_address, bytes):
+            ip_address = ip_address.decode('ascii')
+        try:
+            sock = socket.create_connection((ip_address, port), timeout=self.connect_timeout)
+        except OSError:
+            return 0
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        handle = sock.fileno()
+        self._connections[handle] = _Connection(sock)
+        return handle
+
+    def RseeController_CloseNet(self, net_handle):
+        conn = self._connections.pop(net_handle, None)
+        if conn is None:
+            return False
+        with conn.lock:
+            conn.sock.close()
+        return True
+
+    # --- PM-D-8TE Series ---
+    def RseeController_PM_D_8TE_BRTSetChannel(self, com_handle, socket_handle, channel, value):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        if not 1 <= channel <= p.CHANNELS or not 0 <= value <= p.BRT_MAX:
+            return p.RC_BAD_ARGUMENT
+        with conn.lock:
+            frame = conn.brt_set
+            frame[2] = 0x30 + channel
+            frame[3:6] = p.DIGITS[value]
+            if self._exchange(conn, frame, p.BRT_SET_REPLY) and conn.reply[0] == p.ACK:
+                return p.RC_OK
+        return p.RC_NO_REPLY
+
+    def RseeController_PM_D_8TE_BRTSetAll(self, com_handle, socket_handle, values):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        if len(values) < p.CHANNELS:
+            return p.RC_BAD_ARGUMENT
+        for value in values[:p.CHANNELS]:
+            if not 0 <= value <= p.BRT_MAX:
+                return p.RC_BAD_ARGUMENT
+        with conn.lock:
+            frame = conn.brt_all
+            offset = 3
+            for value in values[:p.CHANNELS]:
+                frame[offset:offset + 3] = p.DIGITS[value]
+                offset += p.BRT_SET_LEN
+            if not self._exchange(conn, frame, p.BRT_SET_REPLY * p.CHANNELS):
+                return p.RC_NO_REPLY
+            return p.check_set_all(conn.reply, frame, p.BRT_SET_LEN, p.BRT_SET_REPLY)
+
+    def RseeController_PM_D_8TE_BRTReadChannel(self, com_handle, socket_handle, channel):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        if not 1 <= channel <= p.CHANNELS:
+            return p.RC_BAD_ARGUMENT
+        with conn.lock:
+            frame = conn.brt_read
+            frame[2] = 0x30 + channel
+            if not self._exchange(conn, frame, p.BRT_READ_REPLY) or conn.reply[0] != p.ACK:
+                return p.RC_BAD_REPLY
+            value = p.parse_digits(conn.reply, 3)
+        return value if 0 <= value <= p.BRT_MAX else p.RC_BAD_REPLY
+
+    def RseeController_PM_D_8TE_PLSSetChannel(self, com_handle, socket_handle, channel, value):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        if not 1 <= channel <= p.CHANNELS or not 0 <= value <= p.PLS_MAX:
+            return p.RC_BAD_ARGUMENT
+        with conn.lock:
+            frame = conn.pls_set
+            frame[3] = 0x30 + channel
+            frame[4:7] = p.DIGITS[value]
+            if self._exchange(conn, frame, p.PLS_SET_REPLY) and conn.reply[0] == p.ACK:
+                return p.RC_OK
+        return p.RC_NO_REPLY
+
+    def RseeController_PM_D_8TE_PLSSetAll(self, com_handle, socket_handle, values):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        if len(values) < p.CHANNELS:
+            return p.RC_BAD_ARGUMENT
+        for value in values[:p.CHANNELS]:
+            if not 0 <= value <= p.PLS_MAX:
+                return p.RC_BAD_ARGUMENT
+        with conn.lock:
+            frame = conn.pls_all
+            offset = 4
+            for value in values[:p.CHANNELS]:
+                frame[offset:offset + 3] = p.DIGITS[value]
+                offset += p.PLS_SET_LEN
+            if not self._exchange(conn, frame, p.PLS_SET_REPLY * p.CHANNELS):
+                return p.RC_NO_REPLY
+            return p.check_set_all(conn.reply, frame, p.PLS_SET_LEN, p.PLS_SET_REPLY)
+
+    def RseeController_PM_D_8TE_PLSReadChannel(self, com_handle, socket_handle, channel):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        if not 1 <= channel <= p.CHANNELS:
+            return p.RC_BAD_ARGUMENT
+        with conn.lock:
+            frame = conn.pls_read
+            frame[3] = 0x30 + channel
+            if not self._exchange(conn, frame, p.PLS_READ_REPLY) or conn.reply[0] != p.ACK:
+                return p.RC_BAD_REPLY
+            value = p.parse_digits(conn.reply, 4)
+        return value if 0 <= value <= p.PLS_MAX else p.RC_BAD_REPLY
+
+    def RseeController_PM_D_8TE_ChangeMode(self, com_handle, socket_handle, mode):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        if not 1 <= mode <= len(p.MODE_LETTERS):
+            return p.RC_BAD_ARGUMENT
+        frame = p.mode_frame(mode)
+        with conn.lock:
+            if self._exchange(conn, frame, 1) and conn.reply[0] == frame[1]:
+                return p.RC_OK
+        return p.RC_NO_REPLY
+
+    def _read_all(self, com_handle, socket_handle, frame, reply_len, buff):
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        n = reply_len * p.CHANNELS
+        with conn.lock:
+            if not self._exchange(conn, frame, n):
+                return p.RC_NO_REPLY
+            buff[:n] = bytes(conn.view[:n])
+        return p.RC_OK
+
+    def RseeController_PM_D_8TE_BRTReadAll(self, com_handle, socket_handle, buff):
+        """Reads all eight brightness replies into buff in one round trip, like the DLL."""
+        return self._read_all(com_handle, socket_handle, p.BRT_READ_ALL_FRAME, p.BRT_READ_REPLY, buff)
+
+    def RseeController_PM_D_8TE_PLSReadAll(self, com_handle, socket_handle, buff):
+        """
+        Pulse counterpart of BRTReadAll, which the DLL lacks: the eight reads
+        are pipelined in one frame and the replies copied into buff.
+        """
+        return self._read_all(com_handle, socket_handle, p.PLS_READ_ALL_FRAME, p.PLS_READ_REPLY, buff)
+
+    def RseeController_PM_D_8TE_ReadInfo(self, com_handle, socket_handle, buff):
+        """Copies the info text into buff and returns its length, like the DLL."""
+        conn = self._connection(com_handle, socket_handle)
+        if conn is None:
+            return p.RC_BAD_HANDLE
+        sock = conn.sock
+        data = b''
+        with conn.lock:
+            try:
+                if conn.stale:
+                    self._drain(conn)
+                sock.sendall(p.INFO_FRAME)
+                # The reply has no terminator; it ends when the line goes quiet.
+                wait = self.timeout
+                while len(data) < p.INFO_MAX and select.select([sock], [], [], wait)[0]:
+                    chunk = sock.recv(p.INFO_MAX - len(data))
+                    if not chunk:
+                        break
+                    data += chunk
+                    wait = self.info_idle
+            except OSError:
+                conn.stale = True
+        n = min(len(data), len(buff) - 1)
+        buff[:n + 1] = data[:n] + b'\0'
+        return n
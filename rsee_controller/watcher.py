@@ -0,0 +1,310 @@
+import asyncio
+import heapq
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .hotpath import STUB_CLASSES
+
+# Python 3.6 has no get_running_loop; there get_event_loop returns the running loop in a coroutine
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+class Point:
+    """One watched reading: a read stub of a family, on one controller, for one channel."""
+
+    __slots__ = ('name', 'family', 'socket_handle', 'com_handle', 'channel', 'function',
+                 'read', 'dll', 'value', 'interval', 'due', 'polls', 'changes')
+
+    def __init__(self, name, family, socket_handle, com_handle, channel, function, interval, read=None, dll=None):
+        self.name = name
+        self.family = family
+        self.socket_handle = socket_handle
+        self.com_handle = com_handle
+        self.channel = channel
+        self.function = function
+        # The bound read stub and the transport stack it was bound to
+        self.read = read
+        self.dll = dll
+        self.value = None
+        self.interval = interval
+        self.due = 0.0
+        self.polls = 0
+        self.changes = 0
+
+    @property
+    def device(self):
+        return self.com_handle or 0, self.socket_handle
+
+    def __repr__(self):
+        return 'Point({!r}, value={!r}, interval={:.3f})'.format(self.name, self.value, self.interval)
+
+
+class Change:
+    """A reading that differs from the previous one. old is None for a first reading."""
+
+    __slots__ = ('point', 'old', 'new', 'time')
+
+    def __init__(self, point, old, new, time):
+        self.point = point
+        self.old = old
+        self.new = new
+        self.time = time
+
+    def __repr__(self):
+        return 'Change({!r}, {!r} -> {!r})'.format(self.point.name, self.old, self.new)
+
+
+class _Device:
+    __slots__ = ('next_allowed', 'busy', 'parked')
+
+    def __init__(self):
+        self.next_allowed = 0.0
+        self.busy = False
+        self.parked = []
+
+
+class Watcher:
+    """
+    Polls registered readings and reports only the ones that changed.
+
+    Each point has its own polling interval: it drops to `min_interval`
+    when the reading changes and grows by `backoff` on every unchanged
+    poll, up to `max_interval`, so settled readings cost little. At most
+    `budget` polls per second go to one controller, spaced evenly and one
+    at a time, leaving the rest of its bandwidth to control commands.
+    Failed reads (negative return codes) are not reported and count as
+    unchanged.
+
+        with Watcher(controller, budget=10) as watcher:
+            watcher.watch('pmd_8te', net_handle, channel=1, function='brt_read_channel')
+            watcher.watch('pms', pms_handle, function='read_int')
+            for change in watcher.changes():
+                print(change.point.name, change.old, change.new)
+
+    `async for change in watcher` does the same in a coroutine.
+    """
+    def __init__(self, controller, min_interval=0.05, max_interval=2.0, backoff=1.5, budget=20.0,
+                 report_initial=False, max_workers=16):
+        """
+        Args:
+            controller (RseeController): The controller used for the reads.
+            min_interval (float): Seconds between polls of a reading that just changed.
+            max_interval (float): Longest time between polls of a stable reading.
+            backoff (float): Interval growth factor per unchanged poll.
+            budget (float): Most polls per second sent to one controller.
+            report_initial (bool): Also report each point's first reading, with old None.
+            max_workers (int): Controllers polled at once.
+        """
+        self.controller = controller
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.budget = budget
+        self.report_initial = report_initial
+        self.stats = {'polls': 0, 'changes': 0, 'errors': 0, 'throttled': 0}
+        self._points = {}
+        self._devices = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._subscribers = []
+        self._cond = threading.Condition()
+        self.max_workers = max_workers
+        self._executor = None
+        self._stop = False
+        self._thread = None
+
+    def watch(self, family, socket_handle=None, channel=None, com_handle=None, function=None, name=None):
+        """
+        Registers a reading to watch.
+        Args:
+            family (str): A device family from prototypes.PROTOTYPES, e.g. 'pmd_8te', 'pms', 'cpl_8t'.
+            socket_handle (int, optional): The net handle, for network families.
+            channel (int, optional): The channel, for per-channel reads.
+            com_handle (int, optional): The com handle, for serial families.
+            function (str, optional): The family's read stub, e.g. 'brt_read_channel' or
+                                      'read_int'. Defaults to the channel read, or read_int
+                                      without a channel.
+            name (str, optional): A label for the point; defaults to e.g. 'pmd_8te:5:brt_read_channel:1'.
+        Returns the Point.
+        """
+        stubs = self.controller.stubs(family, socket_handle, com_handle)
+        if function is None:
+            if channel is None:
+                function = 'read_int'
+            else:
+                function = 'read_channel' if hasattr(stubs, 'read_channel') else 'brt_read_channel'
+        if not hasattr(stubs, function):
+            raise ValueError('{} has no read function {!r}'.format(family, function))
+        if name is None:
+            name = '{}:{}:{}{}'.format(family, com_handle or socket_handle, function,
+                                       '' if channel is None else ':{}'.format(channel))
+        point = Point(name, family, socket_handle, com_handle, channel, function, self.min_interval,
+                      getattr(stubs, function), self.controller.dll)
+        with self._cond:
+            if name in self._points:
+                raise ValueError('Point {!r} is already watched'.format(name))
+            self._points[name] = point
+            self._devices.setdefault(point.device, _Device())
+            self._push(point, time.monotonic())
+            self._cond.notify()
+        return point
+
+    def unwatch(self, name):
+        with self._cond:
+            # Its heap entry is dropped when it comes due
+            self._points.pop(name, None)
+
+    @property
+    def points(self):
+        return list(self._points.values())
+
+    # --- Polling ---
+    def _push(self, point, due):
+        point.due = due
+        heapq.heappush(self._heap, (due, next(self._seq), point))
+
+    def _run(self):
+        spacing = 1.0 / self.budget
+        with self._cond:
+            while not self._stop:
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, point = heapq.heappop(self._heap)
+                    if self._points.get(point.name) is not point:
+                        continue
+                    device = self._devices[point.device]
+                    if device.busy:
+                        # Requeued when the device's running poll finishes
+                        device.parked.append(point)
+                        continue
+                    if now < device.next_allowed:
+                        self.stats['throttled'] += 1
+                        self._push(point, device.next_allowed)
+                        continue
+                    device.busy = True
+                    device.next_allowed = now + spacing
+                    self._executor.submit(self._poll, point, device)
+                wait = self._heap[0][0] - now if self._heap else None
+                self._cond.wait(wait)
+
+    def _poll(self, point, device):
+        try:
+            dll = self.controller.dll
+            if point.dll is not dll:
+                # Transport layers changed since watch(). Bind to the new stack
+                # without going through the controller's shared stub cache.
+                stubs = STUB_CLASSES[point.family](dll, point.socket_handle, point.com_handle)
+                point.read, point.dll = getattr(stubs, point.function), dll
+            read = point.read
+            value = read() if point.channel is None else read(point.channel)
+        except Exception:
+            value = None
+        now = time.monotonic()
+        change = None
+        with self._cond:
+            self.stats['polls'] += 1
+            point.polls += 1
+            if value is None or value is False or value < 0:
+                self.stats['errors'] += 1
+                changed = False
+            else:
+                changed = value != point.value
+                if changed and (point.value is not None or self.report_initial):
+                    change = Change(point, point.value, value, time.time())
+                    point.changes += 1
+                    self.stats['changes'] += 1
+                point.value = value
+            if change is not None:
+                point.interval = self.min_interval
+            else:
+                point.interval = min(self.max_interval, point.interval * self.backoff)
+            device.busy = False
+            if self._points.get(point.name) is point:
+                self._push(point, now + point.interval)
+            for parked in device.parked:
+                self._push(parked, max(now, parked.due))
+            del device.parked[:]
+            subscribers = list(self._subscribers) if change is not None else ()
+            self._cond.notify()
+        for deliver in subscribers:
+            deliver(change)
+
+    # --- Consumers ---
+    def changes(self, timeout=None):
+        """
+        Yields Change objects as readings change, starting the watcher if needed.
+        Args:
+            timeout (float, optional): Stop after this many seconds without a change.
+        """
+        changes = queue.Queue()
+        # Subscribe first so the first polls' changes are not missed
+        with self._cond:
+            self._subscribers.append(changes.put)
+        self.start()
+        try:
+            while True:
+                try:
+                    change = changes.get(timeout=timeout)
+                except queue.Empty:
+                    return
+                if change is None:
+                    return
+                yield change
+        finally:
+            with self._cond:
+                self._subscribers.remove(changes.put)
+
+    async def achanges(self):
+        """Async generator of Change objects, for `async for`."""
+        loop = _running_loop()
+        changes = asyncio.Queue()
+
+        def deliver(change):
+            loop.call_soon_threadsafe(changes.put_nowait, change)
+        with self._cond:
+            self._subscribers.append(deliver)
+        self.start()
+        try:
+            while True:
+                change = await changes.get()
+                if change is None:
+                    return
+                yield change
+        finally:
+            with self._cond:
+                self._subscribers.remove(deliver)
+
+    def __aiter__(self):
+        return self.achanges()
+
+    # --- Lifecycle ---
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._stop = False
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='rsee-watch')
+                self._thread = threading.Thread(target=self._run, name='rsee-watcher', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops polling and ends every changes() iteration."""
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stop = True
+            subscribers = list(self._subscribers)
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+            self._executor.shutdown(wait=True)
+        for deliver in subscribers:
+            deliver(None)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,23 +1,61 @@
 
 import ctypes
 import os
-import platform
+import sys
+import threading
+from array import array
+
+from . import protocol as p
+from .batch import WriteBatch
+from .breaker import CallBreaker
+from .cache import ShadowCache
+from .hotpath import STUB_CLASSES, as_int_array
+from .journal import Journal
+from .metrics import Instrumentation
+from .prototypes import INT_ARRAY_8, LazyDll
 
 class RseeController:
     """
     Python wrapper for the RseeController.dll library, providing an interface
     to control various Rsee light controllers.
     """
-    def __init__(self, dll_path=None):
+    # Optional transport layers, outermost first
+    _LAYER_ORDER = ('cache', 'breaker', 'metrics', 'journal')
+
+    def __init__(self, dll_path=None, transport=None, bulk_read=False):
         """
-        Initializes the controller and loads the DLL.
+        Initializes the controller and loads the DLL. Function prototypes are
+        bound per device family on first use (see prototypes.py).
         Args:
             dll_path (str, optional): The path to RseeController.dll. 
                                       If None, it searches within the package directory.
+            transport (object, optional): An object exposing the RseeController_* functions
+                                          in place of the DLL, e.g. SocketTransport().
+                                          If given, the DLL is not loaded.
+            bulk_read (bool): Let pmd_8te_read_all_brightness use the DLL's BRTReadAll
+                              export. It is not in the SDK header and its prototype is
+                              inferred, so enable it only after checking it against your
+                              DLL version. Transports always read all channels at once.
         """
+        # Generic Array Types
+        self.INT_ARRAY_8 = INT_ARRAY_8
+        # Open write batches, keyed by (com_handle, net_handle)
+        self._batches = {}
+        self._layers = {}
+        self._stubs = {}
+        # Per-thread output buffer for the char* functions
+        self._local = threading.local()
+        self.cache = None
+        self.breaker = None
+        self.metrics = None
+        self.journal = None
+
+        if transport is not None:
+            self.dll = self._transport = transport
+            return
+
         if dll_path is None:
-            arch = platform.architecture()[0]
-            if arch != '64bit':
+            if sys.maxsize <= 2**32:
                 raise Exception("Unsupported architecture. Only 64-bit is supported.")
             
             # The DLL is expected to be in the same directory as this wrapper
@@ -26,187 +64,202 @@ class RseeController:
         if not os.path.exists(dll_path):
             raise FileNotFoundError(f"RseeController.dll not found at the specified path: {dll_path}")
 
-        self.dll = ctypes.cdll.LoadLibrary(dll_path)
-        self._define_functions()
+        self.dll = self._transport = LazyDll(dll_path)
+        if bulk_read:
+            self.dll.bind_optional('RseeController_PM_D_8TE_BRTReadAll')
+
+    def _to_bytes(self, string):
+        return string.encode('ascii')
 
-    def _define_functions(self):
+    def _text(self):
+        """This thread's 1024-byte output buffer, emptied for the next call."""
+        buff = getattr(self._local, 'text', None)
+        if buff is None:
+            buff = self._local.text = ctypes.create_string_buffer(1024)
+        buff[0] = 0
+        return buff
+
+    def _set_layer(self, name, layer):
+        """Adds, replaces or (with None) removes a transport layer and restacks self.dll."""
+        if layer is None:
+            self._layers.pop(name, None)
+        else:
+            self._layers[name] = layer
+        dll = self._transport
+        for layer_name in reversed(self._LAYER_ORDER):
+            layer = self._layers.get(layer_name)
+            if layer is not None:
+                layer.bind(dll)
+                dll = layer
+        self.dll = dll
+        # Stubs are bound to the old stack
+        self._stubs.clear()
+
+    def _flush_deferred(self, com_handle, socket_handle):
+        batch = self._batches.get((com_handle or 0, socket_handle))
+        if batch is not None:
+            batch.flush()
+
+    # --- Shadow Cache ---
+    def enable_cache(self, ttl=1.0):
         """
-        Defines the function prototypes (argtypes and restype) for all functions
-        in the RseeController DLL.
+        Keeps shadow registers of PM-D-8TE brightness, pulse and mode per handle.
+        Writes that would not change a cached value are skipped, and reads are
+        answered locally while the cached value is younger than ttl seconds.
+        Args:
+            ttl (float, optional): Validity of a cached value. None never expires.
+        Returns the ShadowCache, whose stats() gives hit/miss/suppressed-write counts.
         """
-        # Helper types
-        HANDLE = ctypes.c_void_p
-        BOOL = ctypes.c_bool
-        INT = ctypes.c_int
-        UINT = ctypes.c_uint
-        CHAR_P = ctypes.c_char_p
-        
-        # Generic Array Types
-        self.INT_ARRAY_8 = INT * 8
-
-        # Communication Functions
-        self.dll.RseeController_OpenCom.argtypes = [CHAR_P, INT, BOOL]
-        self.dll.RseeController_OpenCom.restype = HANDLE
-        self.dll.RseeController_CloseCom.argtypes = [CHAR_P, HANDLE]
-        self.dll.RseeController_CloseCom.restype = BOOL
-        # Communication Functions based on the C# NPC Demo
-        self.dll.RseeController_OpenCom.argtypes = [CHAR_P, INT, BOOL]
-        self.dll.RseeController_OpenCom.restype = INT # Returns Com_Handle
-        self.dll.RseeController_CloseCom.argtypes = [CHAR_P, INT]
-        self.dll.RseeController_CloseCom.restype = BOOL
-        self.dll.RseeController_ConnectNet.argtypes = [CHAR_P, INT]
-        self.dll.RseeController_ConnectNet.restype = UINT # Returns Net_Handle
-        self.dll.RseeController_CloseNet.argtypes = [UINT]
-        self.dll.RseeController_CloseNet.restype = BOOL
-
-        # DPS2 Series
-        self.dll.RseeController_DPS2_SetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_DPS2_SetChannel.restype = INT
-        self.dll.RseeController_DPS2_6T_Setting.argtypes = [HANDLE, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL]
-        self.dll.RseeController_DPS2_6T_Setting.restype = INT
-        self.dll.RseeController_DPS2_8T_Setting.argtypes = [HANDLE, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL]
-        self.dll.RseeController_DPS2_8T_Setting.restype = INT
-        self.dll.RseeController_DPS2_8TE_Setting.argtypes = [UINT, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL, INT, BOOL]
-        self.dll.RseeController_DPS2_8TE_Setting.restype = INT
-        self.dll.RseeController_DPS2_ReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_DPS2_ReadChannel.restype = INT
-
-        # DPS3 Series
-        self.dll.RseeController_DPS3_BRTSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_DPS3_BRTSetChannel.restype = INT
-        self.dll.RseeController_DPS3_PLSSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_DPS3_PLSSetChannel.restype = INT
-        self.dll.RseeController_DPS3_BRTReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_DPS3_BRTReadChannel.restype = INT
-        self.dll.RseeController_DPS3_PLSReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_DPS3_PLSReadChannel.restype = INT
-
-        # PM-D Series
-        self.dll.RseeController_PM_D_BRTSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_PM_D_BRTSetChannel.restype = INT
-        self.dll.RseeController_PM_D_BRTReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_PM_D_BRTReadChannel.restype = INT
-        self.dll.RseeController_PM_D_PLSSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_PM_D_PLSSetChannel.restype = INT
-        self.dll.RseeController_PM_D_PLSReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_PM_D_PLSReadChannel.restype = INT
-        self.dll.RseeController_PM_D_SetOnoff.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_PM_D_SetOnoff.restype = INT
-        self.dll.RseeController_PM_D_ChangeMode.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_PM_D_ChangeMode.restype = INT
-
-        # PM-D-8TE Series
-        self.dll.RseeController_PM_D_8TE_BRTSetChannel.argtypes = [HANDLE, UINT, INT, INT]
-        self.dll.RseeController_PM_D_8TE_BRTSetChannel.restype = INT
-        self.dll.RseeController_PM_D_8TE_BRTSetAll.argtypes = [HANDLE, UINT, self.INT_ARRAY_8]
-        self.dll.RseeController_PM_D_8TE_BRTSetAll.restype = INT
-        self.dll.RseeController_PM_D_8TE_BRTReadChannel.argtypes = [HANDLE, UINT, INT]
-        self.dll.RseeController_PM_D_8TE_BRTReadChannel.restype = INT
-        self.dll.RseeController_PM_D_8TE_PLSSetChannel.argtypes = [HANDLE, UINT, INT, INT]
-        self.dll.RseeController_PM_D_8TE_PLSSetChannel.restype = INT
-        self.dll.RseeController_PM_D_8TE_PLSSetAll.argtypes = [HANDLE, UINT, self.INT_ARRAY_8]
-        self.dll.RseeController_PM_D_8TE_PLSSetAll.restype = INT
-        self.dll.RseeController_PM_D_8TE_PLSReadChannel.argtypes = [HANDLE, UINT, INT]
-        self.dll.RseeController_PM_D_8TE_PLSReadChannel.restype = INT
-        self.dll.RseeController_PM_D_8TE_SetIP.argtypes = [HANDLE, UINT, INT, INT, INT, INT, CHAR_P]
-        self.dll.RseeController_PM_D_8TE_SetIP.restype = INT
-        self.dll.RseeController_PM_D_8TE_SetPort.argtypes = [HANDLE, UINT, INT, CHAR_P]
-        self.dll.RseeController_PM_D_8TE_SetPort.restype = INT
-        self.dll.RseeController_PM_D_8TE_SetMac.argtypes = [HANDLE, UINT, INT, INT, INT, INT, INT, INT, CHAR_P]
-        self.dll.RseeController_PM_D_8TE_SetMac.restype = INT
-        self.dll.RseeController_PM_D_8TE_ChangeMode.argtypes = [HANDLE, UINT, INT]
-        self.dll.RseeController_PM_D_8TE_ChangeMode.restype = INT
-        self.dll.RseeController_PM_D_8TE_ReadInfo.argtypes = [HANDLE, UINT, CHAR_P]
-        self.dll.RseeController_PM_D_8TE_ReadInfo.restype = INT
-
-        # MDPS-24W75 Series
-        self.dll.RseeController_MDPS_24W75_BRTSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_MDPS_24W75_BRTSetChannel.restype = INT
-        self.dll.RseeController_MDPS_24W75_PLSSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_MDPS_24W75_PLSSetChannel.restype = INT
-        self.dll.RseeController_MDPS_24W75_BRTReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_MDPS_24W75_BRTReadChannel.restype = INT
-        self.dll.RseeController_MDPS_24W75_PLSReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_MDPS_24W75_PLSReadChannel.restype = INT
-        self.dll.RseeController_MDPS_24W75_SetOnoff.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_MDPS_24W75_SetOnoff.restype = INT
-        self.dll.RseeController_MDPS_24W75_ChangeMode.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_MDPS_24W75_ChangeMode.restype = INT
-
-        # MDPS-24W96 Series
-        self.dll.RseeController_MDPS_24W96_BRTSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_MDPS_24W96_BRTSetChannel.restype = INT
-        self.dll.RseeController_MDPS_24W96_PLSSetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_MDPS_24W96_PLSSetChannel.restype = INT
-        self.dll.RseeController_MDPS_24W96_BRTReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_MDPS_24W96_BRTReadChannel.restype = INT
-        self.dll.RseeController_MDPS_24W96_PLSReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_MDPS_24W96_PLSReadChannel.restype = INT
-        self.dll.RseeController_MDPS_24W96_SetOnoff.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_MDPS_24W96_SetOnoff.restype = INT
-        self.dll.RseeController_MDPS_24W96_ChangeMode.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_MDPS_24W96_ChangeMode.restype = INT
-
-        # NPC Series
-        self.dll.RseeController_NPC_SetChannel.argtypes = [HANDLE, UINT, INT, INT]
-        self.dll.RseeController_NPC_SetChannel.restype = INT
-        self.dll.RseeController_NPC_ReadChannel.argtypes = [HANDLE, UINT, INT]
-        self.dll.RseeController_NPC_ReadChannel.restype = INT
-        self.dll.RseeController_NPC_SetOnoff.argtypes = [HANDLE, UINT, INT, BOOL]
-        self.dll.RseeController_NPC_SetOnoff.restype = INT
-
-        # AHC Series
-        self.dll.RseeController_AHC_SetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_AHC_SetChannel.restype = INT
-        self.dll.RseeController_AHC_ReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_AHC_ReadChannel.restype = INT
-        self.dll.RseeController_AHC_SetOnoff.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_AHC_SetOnoff.restype = INT
-
-        # PM-C Series
-        self.dll.RseeController_PM_C_SetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_PM_C_SetChannel.restype = INT
-        self.dll.RseeController_PM_C_ReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_PM_C_ReadChannel.restype = INT
-        self.dll.RseeController_PM_C_SetOnoff.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_PM_C_SetOnoff.restype = INT
-
-        # SPS Series
-        self.dll.RseeController_SPS_SetChannel.argtypes = [HANDLE, INT, INT]
-        self.dll.RseeController_SPS_SetChannel.restype = INT
-        self.dll.RseeController_SPS_ReadChannel.argtypes = [HANDLE, INT]
-        self.dll.RseeController_SPS_ReadChannel.restype = INT
-        self.dll.RseeController_SPS_SetMode.argtypes = [HANDLE, BOOL]
-        self.dll.RseeController_SPS_SetMode.restype = INT
-        self.dll.RseeController_SPS_SetInt.argtypes = [HANDLE, INT]
-        self.dll.RseeController_SPS_SetInt.restype = INT
-        self.dll.RseeController_SPS_ReadInt.argtypes = [HANDLE]
-        self.dll.RseeController_SPS_ReadInt.restype = INT
-
-        # PM-S Series
-        self.dll.RseeController_PM_S_SetChannel.argtypes = [HANDLE, UINT, INT, INT]
-        self.dll.RseeController_PM_S_SetChannel.restype = INT
-        self.dll.RseeController_PM_S_SetInt.argtypes = [HANDLE, UINT, INT]
-        self.dll.RseeController_PM_S_SetInt.restype = INT
-        self.dll.RseeController_PM_S_SetMode.argtypes = [HANDLE, UINT, BOOL]
-        self.dll.RseeController_PM_S_SetMode.restype = INT
-        self.dll.RseeController_PM_S_ReadChannel.argtypes = [HANDLE, UINT, INT]
-        self.dll.RseeController_PM_S_ReadChannel.restype = INT
-        self.dll.RseeController_PM_S_ReadInt.argtypes = [HANDLE, UINT]
-        self.dll.RseeController_PM_S_ReadInt.restype = INT
-
-        # CPL-8T Series
-        self.dll.RseeController_CPL_8T_SetChannel.argtypes = [UINT, INT, INT]
-        self.dll.RseeController_CPL_8T_SetChannel.restype = INT
-        self.dll.RseeController_CPL_8T_ReadChannel.argtypes = [UINT, INT]
-        self.dll.RseeController_CPL_8T_ReadChannel.restype = INT
-        self.dll.RseeController_CPL_8T_SetOnoff.argtypes = [UINT, BOOL]
-        self.dll.RseeController_CPL_8T_SetOnoff.restype = INT
-        self.dll.RseeController_CPL_8T_SetCurrent.argtypes = [UINT, INT, INT]
-        self.dll.RseeController_CPL_8T_SetCurrent.restype = INT
+        self.cache = ShadowCache(ttl)
+        self._set_layer('cache', self.cache)
+        return self.cache
 
-    def _to_bytes(self, string):
-        return string.encode('ascii')
+    def disable_cache(self):
+        self.cache = None
+        self._set_layer('cache', None)
+
+    # --- Timeouts and Circuit Breaker ---
+    def enable_breaker(self, failure_threshold=3, reset_timeout=1.0, max_reset_timeout=30.0,
+                       min_timeout=0.05, max_timeout=2.0, enforce=True):
+        """
+        Bounds every call by a deadline adapted to the device's round trips and
+        opens a per-device circuit after repeated failures, so calls to a dead
+        controller fail fast (RC_TIMEOUT, RC_CIRCUIT_OPEN) instead of blocking.
+        An open circuit is probed with one call after reset_timeout seconds.
+        Args:
+            failure_threshold (int): Consecutive failures that open a circuit.
+            reset_timeout (float): Seconds before probing an open circuit; doubles
+                                   after a failed probe up to max_reset_timeout.
+            max_reset_timeout (float): Longest wait between probes.
+            min_timeout (float): Lower bound of the adaptive timeout.
+            max_timeout (float): Upper bound, and the timeout of a device not yet measured.
+            enforce (bool): Interrupt the caller at the deadline by running calls on
+                            worker threads. If False, slow calls only count as failures.
+        Returns the CallBreaker, whose states() and available() report each device.
+        """
+        self.disable_breaker()
+        self.breaker = CallBreaker(failure_threshold, reset_timeout, max_reset_timeout,
+                                   min_timeout, max_timeout, enforce)
+        self._set_layer('breaker', self.breaker)
+        return self.breaker
+
+    def disable_breaker(self):
+        if self.breaker is not None:
+            self.breaker.close()
+        self.breaker = None
+        self._set_layer('breaker', None)
+
+    # --- Instrumentation ---
+    def enable_instrumentation(self, hook=None):
+        """
+        Counts and times every call that reaches the DLL or transport, per
+        device and function, with a breakdown by return code and a latency
+        histogram (p50/p99/max). Cache hits are not counted.
+        Args:
+            hook (callable, optional): hook(device, function, result, seconds), called
+                                       after each call, e.g. for tracing.
+        Returns the Instrumentation, whose snapshot() and prometheus() export the metrics.
+        """
+        self.metrics = Instrumentation(hook)
+        self._set_layer('metrics', self.metrics)
+        return self.metrics
+
+    def disable_instrumentation(self):
+        self.metrics = None
+        self._set_layer('metrics', None)
+
+    # --- Journal ---
+    def enable_journal(self, path, capacity=65536):
+        """
+        Records every call that reaches the DLL or transport (time, function,
+        handles, arguments and return code) as fixed-size binary records in a
+        memory-mapped ring file. Read or replay it with journal.JournalReader.
+        Args:
+            path (str): The journal file; an existing journal is appended to, and
+                        any other existing file raises ValueError.
+            capacity (int): Records kept before the oldest are overwritten.
+        Returns the Journal.
+        """
+        self.disable_journal()
+        self.journal = Journal(path, capacity)
+        self._set_layer('journal', self.journal)
+        return self.journal
+
+    def disable_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = None
+        self._set_layer('journal', None)
+
+    # --- Write Coalescing ---
+    def batch(self, socket_handle, com_handle=None, max_pending=8, max_delay=None,
+              brightness=None, pulse=None):
+        """
+        Defers PM-D-8TE per-channel writes to one controller and sends them
+        as BRTSetAll/PLSSetAll frames.
+
+        Inside the `with` block, pmd_8te_brt_set_channel, pmd_8te_set_brightness,
+        pmd_8te_pls_set_channel and pmd_8te_set_pulse for this handle are buffered
+        and return 1. Pending writes are sent on exit, when max_pending channels
+        of one kind are pending, max_delay seconds after the first pending write
+        (by a timer thread), or by calling flush() on the batch.
+
+        Args:
+            socket_handle (int): The controller's net handle.
+            com_handle (int, optional): The com handle, for serial connections.
+            max_pending (int): Size threshold, in channels of one kind.
+            max_delay (float, optional): Time threshold, in seconds.
+            brightness (list, optional): Current brightness of all 8 channels, which
+                                         lets partial updates use SetAll too.
+            pulse (list, optional): Current pulse width of all 8 channels.
+        Returns a WriteBatch.
+        """
+        return WriteBatch(self, socket_handle, com_handle, max_pending, max_delay, brightness, pulse)
+
+    # --- Hot Path ---
+    def stubs(self, family, socket_handle=None, com_handle=None):
+        """
+        Returns pre-bound call stubs for one handle of one device family.
+
+        Each function of the family is available under its short name with the
+        handle arguments already applied, e.g. stubs('pmd_8te', h).brt_set_channel(1, 255)
+        or stubs('dps3', com_handle=c).brt_read_channel(2). The PM-D-8TE SetAll
+        stubs take any buffer of 8 int32 values without copying (see as_int_array).
+        Stubs are cached per handle and rebuilt when transport layers change;
+        they bypass write batching.
+        Args:
+            family (str): A device family from prototypes.PROTOTYPES, e.g. 'pmd_8te'.
+            socket_handle (int, optional): The net handle, for network families.
+            com_handle (int, optional): The com handle, for serial families.
+        """
+        key = (family, com_handle or 0, socket_handle or 0)
+        stubs = self._stubs.get(key)
+        if stubs is None:
+            if family not in STUB_CLASSES:
+                raise ValueError("Unknown device family: {!r}".format(family))
+            stubs = self._stubs[key] = STUB_CLASSES[family](self.dll, socket_handle, com_handle)
+        return stubs
+
+    # --- Bulk Readback ---
+    def read_all_channels(self, family, socket_handle=None, com_handle=None, function='read_channel',
+                          channels=8, out=None):
+        """
+        Reads every channel of one controller of any family with per-channel reads,
+        e.g. read_all_channels('npc', net_handle) or
+        read_all_channels('dps3', com_handle=c, function='pls_read_channel', channels=4).
+        For PM-D-8TE, pmd_8te_read_all_brightness/pulse need only one round trip.
+        Args:
+            family (str): A device family from prototypes.PROTOTYPES.
+            socket_handle (int, optional): The net handle, for network families.
+            com_handle (int, optional): The com handle, for serial families.
+            function (str): The family's read stub, e.g. 'read_channel' or 'brt_read_channel'.
+            channels (int): Number of channels to read.
+            out (optional): A writable int32 buffer of at least `channels` values.
+        Returns (rc, values) like pmd_8te_read_all_brightness.
+        """
+        read = getattr(self.stubs(family, socket_handle, com_handle), function)
+        values = array('i', bytes(4 * channels)) if out is None else out
+        return self._read_channels(read, channels, values)
 
     # --- Communication Methods ---
     def open_com(self, port_name, baud_rate=115200, overlapped=False):
@@ -226,13 +279,16 @@ class RseeController:
 
     def close_net(self, net_handle):
         """Closes a network connection."""
+        if self._batches:
+            self._flush_deferred(0, net_handle)
         return self.dll.RseeController_CloseNet(net_handle)
 
     def connect_serial(self, port_name, baud_rate=19200, overlapped=True):
         """
         Establishes a serial connection.
         Args:
-            port_name (str): The name of the COM port (e.g., "COM3").
+            port_name (str): The name of the COM port (e.g., "COM3"),
+                             or a device path such as "/dev/ttyUSB0" with SerialTransport.
         Returns a non-zero handle on success.
         """
         return self.dll.RseeController_OpenCom(self._to_bytes(port_name), baud_rate, overlapped)
@@ -303,52 +359,133 @@ class RseeController:
 
     # --- PM-D-8TE Series ---
     def pmd_8te_brt_set_channel(self, socket_handle, channel, value, com_handle=None):
+        if self._batches:
+            batch = self._batches.get((com_handle or 0, socket_handle))
+            if batch is not None:
+                return batch.brt_set_channel(channel, value)
         return self.dll.RseeController_PM_D_8TE_BRTSetChannel(com_handle, socket_handle, channel, value)
 
     def pmd_8te_brt_set_all(self, socket_handle, values, com_handle=None):
-        """ values: list of 8 integers """
-        arr = self.INT_ARRAY_8(*values)
+        """ values: 8 integers, as a list or a buffer such as array('i') """
+        if self._batches:
+            batch = self._batches.get((com_handle or 0, socket_handle))
+            if batch is not None:
+                return batch.brt_set_all(values)
+        arr = as_int_array(values)
         return self.dll.RseeController_PM_D_8TE_BRTSetAll(com_handle, socket_handle, arr)
 
     def pmd_8te_brt_read_channel(self, socket_handle, channel, com_handle=None):
+        if self._batches:
+            self._flush_deferred(com_handle, socket_handle)
         return self.dll.RseeController_PM_D_8TE_BRTReadChannel(com_handle, socket_handle, channel)
 
     def pmd_8te_pls_set_channel(self, socket_handle, channel, time, com_handle=None):
+        if self._batches:
+            batch = self._batches.get((com_handle or 0, socket_handle))
+            if batch is not None:
+                return batch.pls_set_channel(channel, time)
         return self.dll.RseeController_PM_D_8TE_PLSSetChannel(com_handle, socket_handle, channel, time)
 
     def pmd_8te_pls_set_all(self, socket_handle, values, com_handle=None):
-        """ values: list of 8 integers """
-        arr = self.INT_ARRAY_8(*values)
+        """ values: 8 integers, as a list or a buffer such as array('i') """
+        if self._batches:
+            batch = self._batches.get((com_handle or 0, socket_handle))
+            if batch is not None:
+                return batch.pls_set_all(values)
+        arr = as_int_array(values)
         return self.dll.RseeController_PM_D_8TE_PLSSetAll(com_handle, socket_handle, arr)
 
     def pmd_8te_pls_read_channel(self, socket_handle, channel, com_handle=None):
+        if self._batches:
+            self._flush_deferred(com_handle, socket_handle)
         return self.dll.RseeController_PM_D_8TE_PLSReadChannel(com_handle, socket_handle, channel)
 
     def pmd_8te_set_ip(self, socket_handle, ip_parts, com_handle=None):
         """ ip_parts: list of 4 integers """
-        buff = ctypes.create_string_buffer(1024)
+        buff = self._text()
         res = self.dll.RseeController_PM_D_8TE_SetIP(com_handle, socket_handle, *ip_parts, buff)
         return res, buff.value.decode('ascii', errors='ignore')
 
     def pmd_8te_set_port(self, socket_handle, port, com_handle=None):
-        buff = ctypes.create_string_buffer(1024)
+        buff = self._text()
         res = self.dll.RseeController_PM_D_8TE_SetPort(com_handle, socket_handle, port, buff)
         return res, buff.value.decode('ascii', errors='ignore')
 
     def pmd_8te_set_mac(self, socket_handle, mac_parts, com_handle=None):
         """ mac_parts: list of 6 integers """
-        buff = ctypes.create_string_buffer(1024)
+        buff = self._text()
         res = self.dll.RseeController_PM_D_8TE_SetMac(com_handle, socket_handle, *mac_parts, buff)
         return res, buff.value.decode('ascii', errors='ignore')
 
     def pmd_8te_change_mode(self, socket_handle, mode, com_handle=None):
+        if self._batches:
+            self._flush_deferred(com_handle, socket_handle)
         return self.dll.RseeController_PM_D_8TE_ChangeMode(com_handle, socket_handle, mode)
 
     def pmd_8te_read_info(self, socket_handle, com_handle=None):
-        buff = ctypes.create_string_buffer(1024)
+        if self._batches:
+            self._flush_deferred(com_handle, socket_handle)
+        buff = self._text()
         res = self.dll.RseeController_PM_D_8TE_ReadInfo(com_handle, socket_handle, buff)
         return res, buff.value.decode('ascii', errors='ignore')
 
+    def pmd_8te_read_all_brightness(self, socket_handle, out=None, com_handle=None):
+        """
+        Reads the brightness of all 8 channels. Transports send the eight reads in
+        one round trip; the DLL makes eight BRTReadChannel calls unless the
+        controller was created with bulk_read=True.
+        Args:
+            out (optional): A writable buffer of 8 int32 to fill, e.g. array('i')
+                            or a NumPy int32 row. A new array('i') if None.
+        Returns (rc, values). A channel whose reply was bad holds a negative code.
+        """
+        return self._pmd_8te_read_all(socket_handle, com_handle, out, 'RseeController_PM_D_8TE_BRTReadAll',
+                                      'RseeController_PM_D_8TE_BRTReadChannel', p.BRT_READ_REPLY, p.BRT_MAX)
+
+    def pmd_8te_read_all_pulse(self, socket_handle, out=None, com_handle=None):
+        """
+        Reads the pulse width of all 8 channels. The DLL has no native multi-read
+        for pulse, so this uses SocketTransport's pipelined read when available
+        and eight PLSReadChannel calls otherwise.
+        Args:
+            out (optional): A writable buffer of 8 int32 to fill. A new array('i') if None.
+        Returns (rc, values). A channel whose read failed holds a negative code.
+        """
+        return self._pmd_8te_read_all(socket_handle, com_handle, out, 'RseeController_PM_D_8TE_PLSReadAll',
+                                      'RseeController_PM_D_8TE_PLSReadChannel', p.PLS_READ_REPLY, p.PLS_MAX)
+
+    def _pmd_8te_read_all(self, socket_handle, com_handle, out, read_all_name, read_channel_name, reply_len, limit):
+        if self._batches:
+            self._flush_deferred(com_handle, socket_handle)
+        values = array('i', bytes(4 * p.CHANNELS)) if out is None else out
+        read_all = getattr(self.dll, read_all_name, None)
+        if read_all is None:
+            read_channel = getattr(self.dll, read_channel_name)
+            return self._read_channels(lambda channel: read_channel(com_handle, socket_handle, channel),
+                                       p.CHANNELS, values)
+        # Same size as the other char* outputs. The DLL's BRTReadAll is not in
+        # the SDK header, so its reply length is checked rather than assumed.
+        buff = self._text()
+        rc = read_all(com_handle, socket_handle, buff)
+        data = buff.value
+        if rc == p.RC_OK and len(data) < reply_len * p.CHANNELS:
+            rc = p.RC_BAD_REPLY
+        if rc != p.RC_OK:
+            for i in range(p.CHANNELS):
+                values[i] = rc if rc < 0 else p.RC_BAD_REPLY
+            return rc, values
+        return p.parse_read_all(data, reply_len, limit, values), values
+
+    @staticmethod
+    def _read_channels(read, channels, values):
+        """Fills values with read(1)..read(channels). Returns (first negative result or 1, values)."""
+        rc = p.RC_OK
+        for i in range(channels):
+            value = values[i] = read(i + 1)
+            if value < 0 and rc == p.RC_OK:
+                rc = value
+        return rc, values
+
     # --- MDPS-24W75 Series ---
     def mdps_24w75_brt_set_channel(self, com_handle, channel, value):
         return self.dll.RseeController_MDPS_24W75_BRTSetChannel(com_handle, channel, value)
@@ -390,27 +527,43 @@ class RseeController:
     # --- PM-D-8TE Series Methods ---
     def pmd_8te_set_brightness(self, com_handle, net_handle, channel, brightness):
         """Sets the brightness for a channel in constant light mode."""
+        if self._batches:
+            batch = self._batches.get((com_handle or 0, net_handle))
+            if batch is not None:
+                return batch.brt_set_channel(channel, brightness)
         return self.dll.RseeController_PM_D_8TE_BRTSetChannel(com_handle, net_handle, channel, brightness)
 
     def pmd_8te_read_brightness(self, com_handle, net_handle, channel):
         """Reads the brightness for a channel in constant light mode."""
+        if self._batches:
+            self._flush_deferred(com_handle, net_handle)
         return self.dll.RseeController_PM_D_8TE_BRTReadChannel(com_handle, net_handle, channel)
 
     def pmd_8te_set_pulse(self, com_handle, net_handle, channel, pulse_width):
         """Sets the pulse width for a channel in strobe mode."""
+        if self._batches:
+            batch = self._batches.get((com_handle or 0, net_handle))
+            if batch is not None:
+                return batch.pls_set_channel(channel, pulse_width)
         return self.dll.RseeController_PM_D_8TE_PLSSetChannel(com_handle, net_handle, channel, pulse_width)
 
     def pmd_8te_read_pulse(self, com_handle, net_handle, channel):
         """Reads the pulse width for a channel in strobe mode."""
+        if self._batches:
+            self._flush_deferred(com_handle, net_handle)
         return self.dll.RseeController_PM_D_8TE_PLSReadChannel(com_handle, net_handle, channel)
 
     def pmd_8te_set_onoff_mode(self, com_handle, net_handle, is_on):
         """Sets the overall output ON or OFF. 1=OFF, 2=ON."""
+        if self._batches:
+            self._flush_deferred(com_handle, net_handle)
         mode = 2 if is_on else 1
         return self.dll.RseeController_PM_D_8TE_ChangeMode(com_handle, net_handle, mode)
 
     def pmd_8te_set_strobe_mode(self, com_handle, net_handle, is_strobe):
         """Sets the controller to constant light or strobe mode. 1=Constant, 2=Strobe."""
+        if self._batches:
+            self._flush_deferred(com_handle, net_handle)
         mode = 2 if is_strobe else 1
         return self.dll.RseeController_PM_D_8TE_ChangeMode(com_handle, net_handle, mode)
 
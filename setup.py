@@ -6,15 +6,25 @@ setup(
     version="1.5.0",
     author="Rex Wu",
     description="A Python wrapper for the Rsee Light Controller SDK V1.5",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*", "tests", "tests.*"]),
     package_data={
         'rsee_controller': ['*.dll', '*.lib'],
     },
     include_package_data=True,
+    extras_require={
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': [
+            'rsee-simulator=rsee_controller.simulator:main',
+            'rsee-gateway=rsee_controller.gateway:main',
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: Microsoft :: Windows",
+        "Operating System :: POSIX :: Linux",
     ],
     python_requires='>=3.6',
 )
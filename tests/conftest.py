@@ -0,0 +1,25 @@
+import pytest
+
+from rsee_controller import RseeController, SocketTransport
+from rsee_controller.simulator import SimulatorThread
+
+
+@pytest.fixture
+def sims():
+    """Two simulated PM-D-8TE controllers on free localhost ports."""
+    with SimulatorThread(count=2) as sims:
+        yield sims
+
+
+@pytest.fixture
+def controller():
+    return RseeController(transport=SocketTransport(timeout=0.5))
+
+
+@pytest.fixture
+def handle(sims, controller):
+    ip, port = sims.addresses[0]
+    handle = controller.connect_net(ip, port)
+    assert handle
+    yield handle
+    controller.close_net(handle)
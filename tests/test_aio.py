@@ -0,0 +1,28 @@
+import asyncio
+import inspect
+
+from rsee_controller import SocketTransport
+from rsee_controller.aio import AsyncRseeController
+
+
+def test_async_controller_drives_several_controllers(sims):
+    async def run():
+        async with AsyncRseeController(transport=SocketTransport(timeout=0.5)) as ctl:
+            handles = await asyncio.gather(*(ctl.connect_net(ip, port) for ip, port in sims.addresses))
+            codes = await asyncio.gather(*(ctl.pmd_8te_brt_set_channel(h, 3, 99) for h in handles))
+            values = await asyncio.gather(*(ctl.pmd_8te_brt_read_channel(h, 3) for h in handles))
+            await asyncio.gather(*(ctl.close_net(h) for h in handles))
+        return codes, values
+    loop = asyncio.new_event_loop()
+    try:
+        codes, values = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert codes == [1, 1] and values == [99, 99]
+
+
+def test_only_device_commands_become_coroutines():
+    assert inspect.iscoroutinefunction(AsyncRseeController.pmd_8te_brt_set_all)
+    assert inspect.iscoroutinefunction(AsyncRseeController.connect_net)
+    for name in ('batch', 'stubs', 'enable_cache', 'disable_journal'):
+        assert not hasattr(AsyncRseeController, name)
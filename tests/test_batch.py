@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from rsee_controller import protocol as p
+
+
+def test_max_delay_flushes_without_another_write(sims, controller, handle):
+    state = sims.controllers[0].state
+    with controller.batch(handle, max_delay=0.05) as batch:
+        assert controller.pmd_8te_brt_set_channel(handle, 1, 77) == p.RC_OK
+        assert batch.pending == 1
+        time.sleep(0.3)
+        assert batch.pending == 0
+        assert batch.last_result == p.RC_OK
+        assert state.brightness[0] == 77
+
+
+def test_flush_on_exit_uses_set_all(sims, controller, handle):
+    frames = sims.controllers[0].stats
+    with controller.batch(handle, brightness=[0] * 8):
+        for ch in (2, 4, 6):
+            controller.pmd_8te_brt_set_channel(handle, ch, 100 + ch)
+        assert sims.controllers[0].state.brightness[1] == 0
+    assert sims.controllers[0].state.brightness == [0, 102, 0, 104, 0, 106, 0, 0]
+    assert frames['requests'] == 1
+
+
+def test_current_values_are_validated(controller, handle):
+    with pytest.raises(ValueError):
+        controller.batch(handle, brightness=[0] * 7)
+    with pytest.raises(ValueError):
+        controller.batch(handle, pulse=[1000] * 8)
+    with controller.batch(handle) as batch:
+        assert batch.brt_set_channel(9, 0) == p.RC_BAD_ARGUMENT
+        assert batch.pls_set_all([0] * 7) == p.RC_BAD_ARGUMENT
+        assert batch.pending == 0
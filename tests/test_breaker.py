@@ -0,0 +1,39 @@
+import time
+
+from rsee_controller import protocol as p
+
+
+def test_timeout_follows_a_latency_step_up(sims, controller, handle):
+    sim = sims.controllers[0]
+    sim.latency = 0.01
+    breaker = controller.enable_breaker(failure_threshold=3, reset_timeout=0.1, max_reset_timeout=0.5,
+                                        min_timeout=0.05, max_timeout=1.0)
+    try:
+        device = 'net:{}'.format(handle)
+        for _ in range(20):
+            assert controller.pmd_8te_brt_set_channel(handle, 1, 10) == p.RC_OK
+        assert breaker.timeout(device) < 0.1
+
+        sim.latency = 0.2
+        deadline = time.monotonic() + 10.0
+        recovered = 0
+        while recovered < 5 and time.monotonic() < deadline:
+            rc = controller.pmd_8te_brt_set_channel(handle, 1, 20)
+            recovered = recovered + 1 if rc == p.RC_OK else 0
+            if rc != p.RC_OK:
+                time.sleep(0.05)
+        assert recovered == 5
+        assert breaker.state(device) == 'closed'
+        assert breaker.timeout(device) > 0.2
+    finally:
+        controller.disable_breaker()
+
+
+def test_bad_handle_does_not_trip(controller):
+    breaker = controller.enable_breaker(failure_threshold=2, reset_timeout=10.0)
+    try:
+        assert controller.pmd_8te_brt_set_channel(12345, 1, 0) == p.RC_BAD_HANDLE
+        # A bad handle is an answer, not a timeout
+        assert breaker.state('net:12345') == 'closed'
+    finally:
+        controller.disable_breaker()
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from rsee_controller.bringup import bring_up
+from rsee_controller.simulator import SimulatedController
+
+
+def test_late_controllers_are_reported_and_closed(sims, controller):
+    slow = SimulatedController(latency=0.3)
+    asyncio.run_coroutine_threadsafe(slow.start(), sims.loop).result()
+    try:
+        config = {'defaults': {'on': True},
+                  'controllers': [{'name': 'fast', 'ip': sims.addresses[0][0], 'port': sims.addresses[0][1]},
+                                  {'name': 'slow', 'ip': slow.host, 'port': slow.port}]}
+        fleet, report = bring_up(controller, config, deadline=0.15)
+        with fleet:
+            assert [d.name for d in fleet.devices] == ['fast']
+            fast, late = report.results
+            assert fast.ok and late.timed_out and late.total == 0.0
+            assert report.summary()['timed_out'] == 1
+            for _ in range(100):
+                if report.late:
+                    break
+                time.sleep(0.02)
+            assert [r.name for r in report.late] == ['slow'] and report.late[0].ok
+            # The late controller's connection was closed; only the fast one is open
+            assert list(controller.dll._connections) == [fast.device.socket_handle]
+    finally:
+        asyncio.run_coroutine_threadsafe(slow.stop(), sims.loop).result()
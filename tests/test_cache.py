@@ -0,0 +1,42 @@
+from rsee_controller import RseeController
+from rsee_controller import protocol as p
+
+
+class Registers:
+    """A transport that accepts any channel, as the DLL may, and counts the calls it gets."""
+
+    def __init__(self):
+        self.values = {}
+        self.calls = 0
+
+    def RseeController_PM_D_8TE_BRTSetChannel(self, com, net, channel, value):
+        self.calls += 1
+        self.values[channel] = value
+        return p.RC_OK
+
+    def RseeController_PM_D_8TE_BRTReadChannel(self, com, net, channel):
+        self.calls += 1
+        return self.values.get(channel, 0)
+
+
+def test_repeated_writes_and_fresh_reads_skip_the_device():
+    transport = Registers()
+    controller = RseeController(transport=transport)
+    controller.enable_cache(ttl=None)
+    assert controller.pmd_8te_brt_set_channel(5, 1, 80) == p.RC_OK
+    assert controller.pmd_8te_brt_set_channel(5, 1, 80) == p.RC_OK
+    assert controller.pmd_8te_brt_read_channel(5, 1) == 80
+    assert transport.calls == 1
+    assert controller.cache.stats()['suppressed_writes'] == 1 and controller.cache.stats()['hits'] == 1
+
+
+def test_channel_zero_does_not_touch_channel_eight():
+    transport = Registers()
+    controller = RseeController(transport=transport)
+    controller.enable_cache(ttl=None)
+    controller.pmd_8te_brt_set_channel(5, 8, 10)
+    controller.pmd_8te_brt_set_channel(5, 0, 99)
+    assert controller.pmd_8te_brt_read_channel(5, 8) == 10
+    # Out-of-range channels always reach the device
+    controller.pmd_8te_brt_set_channel(5, 0, 99)
+    assert transport.calls == 3
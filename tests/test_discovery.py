@@ -0,0 +1,77 @@
+import asyncio
+import json
+import socket
+import threading
+
+from rsee_controller import discovery
+from rsee_controller.discovery import Registry, discover, find_controllers
+
+
+def banner_server():
+    """A TCP service that greets every connection with a banner."""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(8)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            conn.sendall(b'SSH-2.0-OpenSSH_9.6\r\n')
+            conn.close()
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def test_discover_ignores_other_services(sims):
+    server = banner_server()
+    try:
+        ports = [port for _, port in sims.addresses] + [server.getsockname()[1]]
+        found = discover(['127.0.0.1'], ports=ports)
+    finally:
+        server.close()
+    assert sorted(c.port for c in found) == sorted(port for _, port in sims.addresses)
+    assert all(c.family == 'pmd_8te' for c in found)
+
+
+def test_registry_keeps_controllers_that_are_down(sims, tmp_path):
+    path = str(tmp_path / 'controllers.json')
+    ports = [port for _, port in sims.addresses]
+    assert len(find_controllers(path, ['127.0.0.1'], ports=ports)) == 2
+    seen = {c.port: c.seen for c in Registry(path).load().controllers}
+
+    down = sims.controllers[1]
+    asyncio.run_coroutine_threadsafe(down.stop(), sims.loop).result()
+    found = find_controllers(path, ['127.0.0.1'], ports=ports)
+    assert [c.port for c in found] == [ports[0]]
+
+    registry = Registry(path).load()
+    assert sorted(c.port for c in registry.controllers) == sorted(ports)
+    stale = [c for c in registry.controllers if c.port == down.port][0]
+    assert stale.seen == seen[down.port]
+    with open(path) as f:
+        assert len(json.load(f)['controllers']) == 2
+
+    registry = Registry(path).load().merge([], forget_after=0.0)
+    assert registry.controllers == []
+
+
+def test_a_controller_that_stays_down_causes_one_rescan(sims, tmp_path, monkeypatch):
+    path = str(tmp_path / 'controllers.json')
+    ports = [port for _, port in sims.addresses]
+    scans = []
+    real_discover = discovery.discover
+    monkeypatch.setattr(discovery, 'discover', lambda *args: scans.append(1) or real_discover(*args))
+
+    assert len(find_controllers(path, ['127.0.0.1'], ports=ports)) == 2
+    assert len(scans) == 1
+    down = sims.controllers[1]
+    asyncio.run_coroutine_threadsafe(down.stop(), sims.loop).result()
+    assert [c.port for c in find_controllers(path, ['127.0.0.1'], ports=ports)] == [ports[0]]
+    assert len(scans) == 2
+    # The third startup trusts the cache: the one controller that answered last time still does
+    assert [c.port for c in find_controllers(path, ['127.0.0.1'], ports=ports)] == [ports[0]]
+    assert len(scans) == 2
+    assert len(Registry(path).load().controllers) == 2
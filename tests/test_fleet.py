@@ -0,0 +1,115 @@
+import threading
+import time
+from array import array
+
+import numpy as np
+import pytest
+
+from rsee_controller import RseeController, SocketTransport
+from rsee_controller import protocol as p
+from rsee_controller.fleet import Device, Fleet, Profile
+from rsee_controller.simulator import SimulatorThread
+
+
+class Gate:
+    """A controller stand-in whose PM-D-8TE reads block until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.finished = threading.Event()
+
+    def pmd_8te_read_all_brightness(self, net, row, com):
+        self.release.wait(5)
+        for i in range(p.CHANNELS):
+            row[i] = 77
+        self.finished.set()
+        return p.RC_OK, row
+
+
+def test_read_matrix_late_rows_never_touch_out():
+    gate = Gate()
+    with Fleet(gate, [Device('slow', 1)]) as fleet:
+        out = np.zeros((1, 8), np.int32)
+        result, matrix = fleet.read_matrix(out=out, deadline=0.05)
+        assert result.results[0].timed_out
+        gate.release.set()
+        gate.finished.wait(5)
+        assert (matrix == p.RC_TIMEOUT).all()
+
+
+@pytest.mark.parametrize('out', [np.zeros((1, 8), np.int64), np.zeros((1, 8), np.float32),
+                                 np.zeros((8, 2), np.int32).T, bytearray(32)])
+def test_read_matrix_rejects_non_int32_buffers(out):
+    with Fleet(Gate(), [Device('a', 1)]) as fleet:
+        with pytest.raises(ValueError):
+            fleet.read_matrix(out=out)
+
+
+def test_read_matrix_pulse_of_pms_rows_is_refused(sims, controller, handle):
+    with Fleet(controller, [Device('a', handle), Device('b', handle, family='pms')]) as fleet:
+        controller.pmd_8te_pls_set_all(handle, [100] * 8)
+        result, matrix = fleet.read_matrix('pls')
+    assert list(matrix[:8]) == [100] * 8
+    assert list(matrix[8:]) == [p.RC_BAD_ARGUMENT] * 8
+    assert result.results[1].code == p.RC_BAD_ARGUMENT
+    with pytest.raises(ValueError):
+        Fleet(controller, []).read_matrix('mode')
+
+
+class PmsRecorder:
+    def __init__(self):
+        self.calls = []
+
+    def pms_set_mode(self, net, strobe, com=None):
+        self.calls.append(('mode', net, strobe))
+        return p.RC_OK
+
+    def pms_set_channel(self, net, channel, value, com=None):
+        self.calls.append(('channel', net, channel, value))
+        return p.RC_OK if value <= p.BRT_MAX else p.RC_BAD_ARGUMENT
+
+
+def connected(controller, sims):
+    return [Device('d{}'.format(i), controller.connect_net(ip, port)) for i, (ip, port) in enumerate(sims.addresses)]
+
+
+def test_apply_runs_devices_in_parallel():
+    with SimulatorThread(count=4, latency=0.05) as sims:
+        controller = RseeController(transport=SocketTransport(timeout=0.5))
+        with Fleet(controller, connected(controller, sims)) as fleet:
+            result = fleet.apply(Profile(strobe=False, on=True, brightness=[40] * 8))
+        assert result.ok and len(result) == 4
+        # Three round trips per device: about 0.15 s in parallel, 0.6 s one after another
+        assert result.elapsed < 0.45
+        assert all(c.state.brightness == [40] * 8 for c in sims.controllers)
+
+
+def test_apply_retries_dropped_replies():
+    with SimulatorThread(count=3, drop_rate=0.3, seed=7) as sims:
+        controller = RseeController(transport=SocketTransport(timeout=0.05))
+        with Fleet(controller, connected(controller, sims)) as fleet:
+            result = fleet.apply(Profile(brightness=[99] * 8), retries=10, deadline=5.0)
+        assert result.ok
+        assert all(c.state.brightness == [99] * 8 for c in sims.controllers)
+        assert max(r.attempts for r in result) > 1
+        assert sum(c.stats['dropped'] for c in sims.controllers) > 0
+
+
+def test_apply_reports_devices_past_the_deadline():
+    with SimulatorThread(count=2, latency=0.3) as sims:
+        controller = RseeController(transport=SocketTransport(timeout=1.0))
+        with Fleet(controller, connected(controller, sims)) as fleet:
+            result = fleet.apply(Profile(brightness=[1] * 8), deadline=0.1, retries=3)
+            # Let the abandoned calls finish before the simulators stop
+            time.sleep(0.35)
+        assert [r.timed_out for r in result] == [True, True]
+        assert all(r.attempts == 1 and r.code is None for r in result)
+
+
+def test_apply_pms_steps():
+    ctl = PmsRecorder()
+    with Fleet(ctl, [Device('bar', 4, family='pms')]) as fleet:
+        result = fleet.apply(Profile(strobe=True, on=True, brightness=[1, 2, 3, 4, 5, 6, 7, 300]))
+    # PM-S has no on/off; the out-of-range channel fails the device
+    assert ctl.calls == [('mode', 4, True)] + [('channel', 4, c, c) for c in range(1, 8)] + [('channel', 4, 8, 300)]
+    assert result.results[0].code == p.RC_BAD_ARGUMENT
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import socket
+import stat
+from array import array
+
+import pytest
+
+from rsee_controller import protocol as p
+from rsee_controller.gateway import Gateway, GatewayClient, pack_value, unpack_value
+from rsee_controller.simulator import SimulatedController
+
+
+def restart(sims, index):
+    """Stops a simulator, dropping its connections, and starts a fresh one on the same port."""
+    old = sims.controllers[index]
+    asyncio.run_coroutine_threadsafe(old.stop(), sims.loop).result()
+    new = SimulatedController(port=old.port)
+    asyncio.run_coroutine_threadsafe(new.start(), sims.loop).result()
+    sims.controllers[index] = new
+
+
+def test_gateway_reconnects_after_controller_restart(sims, controller, tmp_path):
+    ip, port = sims.addresses[0]
+    with Gateway(controller, str(tmp_path / 'gw.sock')) as gateway, GatewayClient(gateway.path) as client:
+        handle = client.connect_net(ip, port)
+        assert handle and client.connect_net(ip, port) == handle
+        assert client.pmd_8te_brt_set_channel(handle, 1, 7) == 1
+        restart(sims, 0)
+        # The first call finds the connection dead, the next one reconnects
+        assert client.pmd_8te_brt_set_channel(handle, 1, 9) != 1
+        assert client.pmd_8te_brt_set_channel(handle, 1, 9) == 1
+        assert client.pmd_8te_brt_read_channel(handle, 1) == 9
+        assert gateway.links()[handle][1] == 2
+
+
+def test_gateway_close_drops_the_shared_connection(sims, controller, tmp_path):
+    ip, port = sims.addresses[0]
+    with Gateway(controller, str(tmp_path / 'gw.sock')) as gateway, GatewayClient(gateway.path) as client:
+        handle = client.connect_net(ip, port)
+        assert client.close_net(handle)
+        assert gateway.links()[handle][0] == 0
+        assert client.pmd_8te_brt_set_channel(handle, 2, 5) == 1
+        assert gateway.links()[handle][1] == 2
+
+
+def test_gateway_socket_is_private(controller, tmp_path):
+    path = str(tmp_path / 'gw.sock')
+    with Gateway(controller, path):
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_gateway_refuses_paths_in_use(controller, tmp_path):
+    path = tmp_path / 'gw.sock'
+    path.write_text('not a socket')
+    with pytest.raises(FileExistsError):
+        Gateway(controller, str(path)).start()
+    assert path.read_text() == 'not a socket'
+
+    path.unlink()
+    with Gateway(controller, str(path)):
+        with pytest.raises(FileExistsError):
+            Gateway(controller, str(path)).start()
+        with GatewayClient(str(path)) as client:
+            assert client.methods
+
+
+def test_gateway_replaces_a_stale_socket(controller, tmp_path):
+    path = str(tmp_path / 'gw.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    with Gateway(controller, path), GatewayClient(path) as client:
+        assert client.methods
+
+
+def test_values_keep_their_types_across_the_gateway():
+    for value, expected in [((1, 5), (1, 5)), ((1, 2 ** 40), (1, 2 ** 40)), ([2 ** 40, 1], (2 ** 40, 1)),
+                            ((p.RC_OK, array('i', [1, 2])), (p.RC_OK, array('i', [1, 2]))),
+                            ([1, 2, 3], array('i', [1, 2, 3])), (('a', None), ('a', None))]:
+        buf = bytearray()
+        pack_value(value, buf)
+        assert unpack_value(buf) == (expected, len(buf))
+
+
+def test_stop_leaves_a_replacement_socket_alone(controller, tmp_path):
+    path = str(tmp_path / 'gw.sock')
+    gateway = Gateway(controller, path).start()
+    os.unlink(path)
+    other = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    other.bind(path)
+    try:
+        gateway.stop()
+        assert os.path.exists(path)
+    finally:
+        other.close()
+
+
+def test_failed_submit_does_not_leak_its_request(controller, tmp_path):
+    with Gateway(controller, str(tmp_path / 'gw.sock')) as gateway:
+        client = GatewayClient(gateway.path)
+        client._sock.shutdown(socket.SHUT_WR)
+        with pytest.raises(OSError):
+            client.submit('pmd_8te_brt_read_channel', 1, 1)
+        assert client._pending == {}
+        client.close()
@@ -0,0 +1,77 @@
+import struct
+import threading
+from array import array
+
+import numpy as np
+import pytest
+
+from rsee_controller import protocol as p
+from rsee_controller.hotpath import as_int_array
+from rsee_controller.prototypes import INT_ARRAY_8
+
+
+def test_as_int_array_shares_int32_buffers():
+    values = array('i', range(8))
+    shared = as_int_array(values)
+    values[3] = 42
+    assert shared[3] == 42
+    matrix = np.zeros((2, 8), np.int32)
+    as_int_array(matrix[1])[0] = 7
+    assert matrix[1, 0] == 7
+
+
+def test_as_int_array_copies_sequences_into_scratch():
+    scratch = INT_ARRAY_8()
+    assert as_int_array([1, 2, 3], scratch) is scratch
+    assert list(scratch) == [1, 2, 3, 0, 0, 0, 0, 0]
+    assert list(as_int_array(tuple(range(8)))) == list(range(8))
+    assert list(as_int_array(np.arange(8, dtype=np.int64))) == list(range(8))
+
+
+def test_as_int_array_takes_bytes_as_raw_memory():
+    raw = struct.pack('8i', *range(10, 18))
+    assert list(as_int_array(raw)) == list(range(10, 18))
+    assert list(as_int_array(bytearray(raw))) == list(range(10, 18))
+    with pytest.raises(ValueError):
+        as_int_array(bytes(range(8)))
+
+
+def test_stubs_round_trip(sims, controller, handle):
+    stubs = controller.stubs('pmd_8te', handle)
+    assert controller.stubs('pmd_8te', handle) is stubs
+    assert stubs.brt_set_all([5] * 8) == p.RC_OK
+    assert stubs.brt_set_channel(2, 200) == p.RC_OK
+    assert stubs.brt_read_channel(2) == 200
+    stubs.pls_values[:] = list(range(100, 108))
+    assert stubs.pls_set_all() == p.RC_OK
+    assert stubs.pls_read_channel(8) == 107
+    rc, info = stubs.read_info()
+    assert rc > 0 and info.startswith('PM-D-8TE')
+
+
+def test_stubs_are_rebuilt_after_layer_changes(sims, controller, handle):
+    stubs = controller.stubs('pmd_8te', handle)
+    controller.enable_instrumentation()
+    assert controller.stubs('pmd_8te', handle) is not stubs
+    controller.stubs('pmd_8te', handle).brt_read_channel(1)
+    assert controller.metrics.snapshot()
+
+
+def test_text_buffers_are_per_thread(sims, controller):
+    handles = [controller.connect_net(*address) for address in sims.addresses]
+    results = []
+
+    def worker(handle):
+        for _ in range(5):
+            results.append(controller.pmd_8te_read_info(handle)[1])
+    threads = [threading.Thread(target=worker, args=(h,)) for h in handles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 10 and all(info.startswith('PM-D-8TE') for info in results)
+    other = []
+    thread = threading.Thread(target=lambda: other.append(controller._text()))
+    thread.start()
+    thread.join()
+    assert controller._text() is controller._text() and other[0] is not controller._text()
@@ -0,0 +1,100 @@
+import ctypes
+import time
+
+import pytest
+
+from rsee_controller import protocol as p
+from rsee_controller.journal import Journal, JournalReader
+from rsee_controller.prototypes import HANDLE, INT, INT_ARRAY_8, PROTOTYPES, UINT
+
+
+def test_record_and_replay(sims, controller, handle, tmp_path):
+    path = str(tmp_path / 'lights.journal')
+    controller.enable_journal(path, capacity=64)
+    t0 = time.time()
+    controller.pmd_8te_brt_set_all(handle, [10] * 8)
+    controller.pmd_8te_brt_set_channel(handle, 2, 99)
+    controller.pmd_8te_brt_read_channel(handle, 2)
+    controller.disable_journal()
+
+    reader = JournalReader(path)
+    records = list(reader.records(device='net:{}'.format(handle), start=t0 - 1))
+    assert [r.function for r in records] == ['PM_D_8TE_BRTSetAll', 'PM_D_8TE_BRTSetChannel',
+                                             'PM_D_8TE_BRTReadChannel']
+    assert records[0].args[2] == [10] * 8
+    assert records[2].result == 99
+
+    sims.controllers[1].state.brightness = [0] * 8
+    other = controller.connect_net(*sims.addresses[1])
+    report = JournalReader.replay(controller, records, speed=None, handles={handle: other})
+    assert report == {'calls': 2, 'skipped': 1, 'mismatches': 0, 'max_lag': 0.0}
+    assert sims.controllers[1].state.brightness == [10, 99] + [10] * 6
+
+
+def test_existing_files_are_not_overwritten(tmp_path):
+    text = tmp_path / 'notes.txt'
+    text.write_text('keep me')
+    with pytest.raises(ValueError):
+        Journal(str(text))
+    assert text.read_text() == 'keep me'
+    empty = tmp_path / 'empty.journal'
+    empty.write_bytes(b'')
+    Journal(str(empty), capacity=8).close()
+    assert JournalReader(str(empty)).capacity == 8
+
+
+class Echo:
+    def RseeController_PM_D_8TE_ChangeMode(self, com, net, mode):
+        return p.RC_OK
+
+
+def _journal(path, count):
+    journal = Journal(path, capacity=16)
+    journal.bind(Echo())
+    for i in range(count):
+        journal.RseeController_PM_D_8TE_ChangeMode(0, 5, 1)
+    journal.close()
+
+
+def test_records_keep_their_own_session_anchor(tmp_path, monkeypatch):
+    path = str(tmp_path / 'ring.journal')
+    monkeypatch.setattr(time, 'time', lambda: 1000.0)
+    _journal(path, 30)
+    monkeypatch.setattr(time, 'time', lambda: 5000.0)
+    _journal(path, 6)
+    records = list(JournalReader(path).records())
+    times = [r.time for r in records]
+    old = [t for t in times if t is not None and t < 3000]
+    new = [t for t in times if t is not None and t >= 3000]
+    # The ring still holds the tail of the first session, under its own anchor
+    assert old and new
+    assert times.index(new[0]) > max(times.index(t) for t in old)
+    assert all(abs(t - 1000.0) < 60 for t in old)
+    assert all(abs(t - 5000.0) < 60 for t in new)
+
+
+class PrototypedDll:
+    """SetAll exports as ctypes functions with the DLL's prototypes, like LazyDll's."""
+
+    def __init__(self):
+        self.calls = []
+
+        def set_all(com, net, values):
+            self.calls.append((net, ctypes.cast(values, ctypes.POINTER(ctypes.c_int))[:8]))
+            return p.RC_OK
+        self._callback = ctypes.CFUNCTYPE(INT, HANDLE, UINT, ctypes.POINTER(ctypes.c_int))(set_all)
+        self._callback.argtypes = PROTOTYPES['pmd_8te']['RseeController_PM_D_8TE_BRTSetAll'][1]
+        self.RseeController_PM_D_8TE_BRTSetAll = self._callback
+
+
+def test_replay_against_ctypes_prototypes(tmp_path):
+    path = str(tmp_path / 'dll.journal')
+    journal = Journal(path, capacity=16)
+    journal.bind(PrototypedDll())
+    journal.RseeController_PM_D_8TE_BRTSetAll(None, 5, INT_ARRAY_8(*range(8)))
+    journal.close()
+
+    dll = PrototypedDll()
+    report = JournalReader.replay(dll, JournalReader(path).records(), speed=None, handles={5: 6})
+    assert report['calls'] == 1 and report['mismatches'] == 0
+    assert dll.calls == [(6, list(range(8)))]
@@ -0,0 +1,85 @@
+import socket
+import threading
+
+import pytest
+
+from rsee_controller import ConnectionPool
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_lease_shares_one_connection(sims, controller):
+    pool = ConnectionPool(controller)
+    with pool.lease(sims.addresses[0]) as (com, net):
+        assert com == 0 and net
+        assert controller.pmd_8te_set_brightness(com, net, 1, 30) == 1
+    with pool.lease(sims.addresses[0]) as handles:
+        assert handles == (0, net)
+    stats = pool.stats()
+    assert stats['connections'] == 1 and stats['leases'] == 2 and stats['reconnects'] == 0
+    pool.close()
+
+
+def test_invalidate_inside_a_lease_reconnects(sims, controller):
+    pool = ConnectionPool(controller)
+    with pool.lease(sims.addresses[0]) as (com, net):
+        pool.invalidate(sims.addresses[0])
+    with pool.lease(sims.addresses[0]) as (com, net):
+        assert controller.pmd_8te_read_brightness(com, net, 1) >= 0
+    assert pool.stats()['reconnects'] == 1
+    pool.close()
+
+
+def test_failed_connects_back_off(controller):
+    pool = ConnectionPool(controller, backoff=0.5, max_backoff=1.0)
+    address = ('127.0.0.1', closed_port())
+    with pytest.raises(ConnectionError):
+        with pool.lease(address):
+            pass
+    entry = pool._entry(address)
+    assert entry.backoff == 0.5 and entry.retry_at > 0
+    # Within the backoff no connect is attempted
+    with pytest.raises(ConnectionError, match='next attempt'):
+        with pool.lease(address):
+            pass
+    assert entry.backoff == 0.5
+    pool.close()
+
+
+def test_check_reconnects_connections_that_fail_the_probe(sims, controller):
+    results = [False]
+    pool = ConnectionPool(controller, probe=lambda *args: results.pop() if results else True)
+    with pool.lease(sims.addresses[0]):
+        pass
+    pool.check()
+    assert pool.stats()['reconnects'] == 1 and pool.stats()['dead'] == 0
+    pool.check()
+    assert pool.stats()['reconnects'] == 1
+    pool.close()
+
+
+def test_lease_timeout(sims, controller):
+    pool = ConnectionPool(controller)
+    leased, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool.lease(sims.addresses[0]):
+            leased.set()
+            release.wait(5)
+    thread = threading.Thread(target=hold)
+    thread.start()
+    leased.wait(5)
+    try:
+        with pytest.raises(TimeoutError):
+            with pool.lease(sims.addresses[0], timeout=0.05):
+                pass
+    finally:
+        release.set()
+        thread.join()
+    pool.close()
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from rsee_controller import protocol as p
+from rsee_controller.ramp import RampEngine
+
+
+class Controller:
+    """Records brightness writes per handle. Writes to `hung` block until released."""
+
+    def __init__(self, hung=None):
+        self.hung = hung
+        self.release = threading.Event()
+        self.writes = {}
+
+    def pmd_8te_brt_set_channel(self, handle, channel, value, com_handle=None):
+        if handle == self.hung:
+            self.release.wait()
+        self.writes.setdefault(handle, []).append((channel, value))
+        return p.RC_OK
+
+    def pmd_8te_brt_set_all(self, handle, values, com_handle=None):
+        self.writes.setdefault(handle, []).append(tuple(values))
+        return p.RC_OK
+
+
+def test_hung_controller_does_not_delay_others():
+    ctl = Controller(hung=1)
+    ramp = RampEngine(ctl, rate=1000, tick=0.01, values={1: [0] * 8, 2: [0] * 8}).start()
+    try:
+        ramp.set_target(1, 1, 255)
+        ramp.set_target(2, 1, 255)
+        deadline = time.monotonic() + 2.0
+        while (ctl.writes.get(2) or [(0, 0)])[-1] != (1, 255) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ctl.writes[2][-1] == (1, 255)
+        assert len(ctl.writes[2]) > 5
+        assert 1 not in ctl.writes
+        assert ramp.stats()['late'] > 0
+    finally:
+        ctl.release.set()
+        ramp.stop()
+
+
+def test_initial_values_must_cover_every_channel():
+    with pytest.raises(ValueError):
+        RampEngine(Controller(), values={1: [0] * 7})
+
+
+def test_ramp_reaches_target_on_simulator(sims, controller, handle):
+    state = sims.controllers[0].state
+    with RampEngine(controller, rate=2000, tick=0.005, values={handle: [0] * 8}) as ramp:
+        ramp.set_target(handle, 1, 200)
+        ramp.set_target(handle, 2, 100)
+        deadline = time.monotonic() + 2.0
+        while state.brightness[:2] != [200, 100] and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert state.brightness[:2] == [200, 100]
+    assert ramp.stats()['set_all_frames'] > 0
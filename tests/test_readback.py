@@ -0,0 +1,42 @@
+import ctypes
+import ctypes.util
+
+import pytest
+
+from rsee_controller import RseeController
+from rsee_controller import protocol as p
+from rsee_controller.prototypes import LazyDll
+
+
+class ShortReply:
+    """A transport whose BRTReadAll answers with too few bytes."""
+
+    def RseeController_PM_D_8TE_BRTReadAll(self, com_handle, socket_handle, buff):
+        buff[:6] = b'_01123'
+        return p.RC_OK
+
+
+def test_read_all_round_trip(sims, controller, handle):
+    values = [5, 6, 7, 8, 9, 10, 11, 255]
+    controller.pmd_8te_brt_set_all(handle, values)
+    rc, read = controller.pmd_8te_read_all_brightness(handle)
+    assert rc == p.RC_OK and list(read) == values
+    rc, rows = controller.read_all_channels('pmd_8te', handle, function='brt_read_channel')
+    assert rc == p.RC_OK and list(rows) == values
+
+
+def test_short_read_all_reply_is_rejected():
+    rc, values = RseeController(transport=ShortReply()).pmd_8te_read_all_brightness(1)
+    assert rc == p.RC_BAD_REPLY
+    assert list(values) == [p.RC_BAD_REPLY] * 8
+
+
+def test_undocumented_exports_need_an_explicit_bind():
+    libc = ctypes.util.find_library('c')
+    if libc is None:
+        pytest.skip('no C library to load')
+    dll = LazyDll(libc)
+    name = 'RseeController_PM_D_8TE_BRTReadAll'
+    assert getattr(dll, name, None) is None
+    assert dll.bind_optional(name) is False
+    assert getattr(dll, name, None) is None
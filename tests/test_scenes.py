@@ -0,0 +1,34 @@
+from rsee_controller import protocol as p
+from rsee_controller.scenes import Scene, SceneCompiler
+
+
+def test_switch_sends_only_the_difference(sims, controller, handle):
+    day = Scene('day', pmd_8te={'mode': 1, 'brightness': [200] * 8})
+    dim = Scene('dim', pmd_8te={'mode': 1, 'brightness': [200] * 7 + [10]})
+    compiler = SceneCompiler([day, dim])
+    assert compiler.apply(controller, 'pmd_8te', 'day', handle) == p.RC_OK
+    assert compiler.plan('pmd_8te', 'day', 'dim').ops == (('pmd_8te_brt_set_channel', (8, 10)),)
+    assert compiler.apply(controller, 'pmd_8te', 'dim', handle) == p.RC_OK
+    assert sims.controllers[0].state.brightness == [200] * 7 + [10]
+    assert compiler.current('pmd_8te', handle) == 'dim'
+
+
+def test_redefined_scene_is_resent(sims, controller, handle):
+    compiler = SceneCompiler([Scene('work', pmd_8te={'brightness': [100] * 8})])
+    assert compiler.apply(controller, 'pmd_8te', 'work', handle) == p.RC_OK
+    compiler.add(Scene('work', pmd_8te={'brightness': [50] * 8}))
+    assert compiler.current('pmd_8te', handle) is None
+    assert compiler.apply(controller, 'pmd_8te', 'work', handle) == p.RC_OK
+    assert sims.controllers[0].state.brightness == [50] * 8
+
+
+def test_redefined_from_scene_is_not_diffed_against(sims, controller, handle):
+    a = Scene('a', pmd_8te={'brightness': [1] * 8})
+    b = Scene('b', pmd_8te={'brightness': [2] * 8})
+    compiler = SceneCompiler([a, b])
+    compiler.warm()
+    compiler.apply(controller, 'pmd_8te', 'a', handle)
+    # 'a' now equals 'b', but the device still has the old 'a' values
+    compiler.add(Scene('a', pmd_8te={'brightness': [2] * 8}))
+    assert compiler.apply(controller, 'pmd_8te', 'b', handle) == p.RC_OK
+    assert sims.controllers[0].state.brightness == [2] * 8
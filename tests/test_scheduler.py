@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from rsee_controller import protocol as p
+from rsee_controller.scheduler import StrobeScheduler
+
+
+class SlowController:
+    """Records pulse writes; each takes `delay` seconds."""
+
+    def __init__(self, delay=0.005, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+
+    def pmd_8te_pls_set_channel(self, handle, channel, value, com_handle=None):
+        if handle == self.fail_on:
+            raise OSError('controller gone')
+        time.sleep(self.delay)
+        self.calls.append((handle, channel, value))
+        return p.RC_OK
+
+
+def test_each_send_is_timed_on_its_own():
+    ctl = SlowController(delay=0.005)
+    scheduler = StrobeScheduler(ctl, window=0.001)
+    # Three handles in one window, sent one after another
+    report = scheduler.run([(0.0, 1, 1, 10), (0.0, 2, 1, 10), (0.0, 3, 1, 10)])
+    errors = report.errors_ns
+    assert len(errors) == 3 and report.groups == 1
+    assert errors[1] - errors[0] >= 4e6
+    assert errors[2] - errors[1] >= 4e6
+
+
+def test_send_errors_are_recorded():
+    ctl = SlowController(delay=0.0, fail_on=2)
+    report = StrobeScheduler(ctl).run([(0.0, 1, 1, 10), (0.0, 2, 1, 10), (0.01, 1, 1, 20)])
+    assert report.failures == 1
+    assert [event[1] for event, _ in report.exceptions] == [2]
+    assert ctl.calls == [(1, 1, 10), (1, 1, 20)]
+
+
+def test_join_reraises_scheduler_errors():
+    class Broken(StrobeScheduler):
+        def _send(self, events, start_ns, report):
+            raise RuntimeError('scheduler bug')
+    scheduler = Broken(SlowController()).start([(0.0, 1, 1, 10)])
+    with pytest.raises(RuntimeError):
+        scheduler.join()
+
+
+def test_pulse_set_all_against_simulator(sims, controller, handle):
+    state = sims.controllers[0].state
+    scheduler = StrobeScheduler(controller, pulse={handle: [0] * 8})
+    report = scheduler.run([(0.0, handle, 1, 200), (0.0, handle, 2, 300), (0.01, handle, 1, 5)])
+    assert report.failures == 0 and report.stats()['events'] == 3
+    assert state.pulse[:2] == [5, 300]
+
+
+def test_join_timeout_is_not_completion():
+    scheduler = StrobeScheduler(SlowController(delay=0.0)).start([(0.0, 1, 1, 10), (0.3, 1, 1, 20)])
+    with pytest.raises(TimeoutError):
+        scheduler.join(0.01)
+    report = scheduler.join()
+    assert report.stats()['events'] == 2
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from rsee_controller import RseeController
+from rsee_controller import protocol as p
+
+serialport = pytest.importorskip('rsee_controller.serialport')
+if serialport.termios is None:
+    pytest.skip('SerialTransport needs termios', allow_module_level=True)
+
+from rsee_controller.simulator import SerialSimulator  # noqa: E402
+
+
+@pytest.fixture
+def serial():
+    transport = serialport.SerialTransport(timeout=0.2)
+    controller = RseeController(transport=transport)
+    with SerialSimulator(baud_rate=115200) as sim:
+        com = controller.connect_serial(sim.port, 115200)
+        assert com
+        yield controller, transport, sim, com
+        controller.close_serial(sim.port, com)
+
+
+def test_pmd_8te_over_serial(serial):
+    controller, transport, sim, com = serial
+    values = [1, 2, 3, 4, 5, 6, 7, 8]
+    assert controller.pmd_8te_brt_set_all(0, values, com_handle=com) == p.RC_OK
+    assert controller.pmd_8te_pls_set_channel(0, 3, 999, com_handle=com) == p.RC_OK
+    assert sim.state.brightness == values
+    assert controller.pmd_8te_brt_read_channel(0, 8, com_handle=com) == 8
+    assert controller.pmd_8te_pls_read_channel(0, 3, com_handle=com) == 999
+    rc, read = controller.pmd_8te_read_all_brightness(0, com_handle=com)
+    assert rc == p.RC_OK and list(read) == values
+    rc, info = controller.pmd_8te_read_info(0, com_handle=com)
+    assert info.startswith('PM-D-8TE')
+
+
+def test_pmd_serial_family(serial):
+    controller, transport, sim, com = serial
+    assert controller.pmd_brt_set_channel(com, 2, 200) == p.RC_OK
+    assert controller.pmd_pls_set_channel(com, 2, 300) == p.RC_OK
+    assert controller.pmd_brt_read_channel(com, 2) == 200
+    assert controller.pmd_pls_read_channel(com, 2) == 300
+    mode = sim.state.mode
+    # Exports without a documented frame are refused rather than guessed
+    assert controller.pmd_change_mode(com, True) == p.RC_BAD_ARGUMENT
+    assert controller.pmd_set_onoff(com, False) == p.RC_BAD_ARGUMENT
+    assert sim.state.mode == mode
+    assert controller.stubs('pmd', com_handle=com).brt_read_channel(2) == 200
+
+
+def test_requests_from_threads_are_pipelined(serial):
+    controller, transport, sim, com = serial
+    results = []
+
+    def worker(channel):
+        for value in range(20):
+            results.append(controller.pmd_8te_brt_set_channel(0, channel, value, com_handle=com))
+    threads = [threading.Thread(target=worker, args=(ch,)) for ch in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [p.RC_OK] * 160
+    assert sim.state.brightness == [19] * 8
+    assert transport.stats(com)['max_in_flight'] > 1
+
+
+def test_lost_reply_times_out_and_resyncs(serial):
+    controller, transport, sim, com = serial
+    sim.drop_rate = 1.0
+    assert controller.pmd_8te_brt_set_channel(0, 1, 10, com_handle=com) == p.RC_NO_REPLY
+    sim.drop_rate = 0.0
+    assert controller.pmd_8te_brt_set_channel(0, 1, 11, com_handle=com) == p.RC_OK
+    assert transport.stats(com)['timeouts'] == 1
+    assert transport.exchange(com, b'S01#', 6) == b'_01011'
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from rsee_controller import protocol as p
+from rsee_controller.fleet import Device, Fleet
+from rsee_controller.setpoints import SetpointMatrix
+
+
+class Recorder:
+    """A controller stand-in that records the frames it is asked to send."""
+
+    def __init__(self, hang=()):
+        self.calls = []
+        self.hang = hang
+        self.release = threading.Event()
+
+    def _call(self, name, net, *args):
+        if net in self.hang:
+            self.release.wait(5)
+        self.calls.append((name, net) + args)
+        return p.RC_OK
+
+    def pmd_8te_brt_set_all(self, net, values, com=None):
+        return self._call('set_all', net, [int(v) for v in values])
+
+    def pmd_8te_brt_set_channel(self, net, channel, value, com=None):
+        return self._call('set_channel', net, channel, value)
+
+    def pms_set_channel(self, net, channel, value, com=None):
+        return self._call('pms_set_channel', net, channel, value)
+
+
+def fleet_of(controller):
+    return Fleet(controller, [Device('a', 1), Device('b', 2), Device('c', 3, family='pms')])
+
+
+def test_only_changed_cells_are_sent():
+    ctl = Recorder()
+    with fleet_of(ctl) as fleet:
+        setpoints = SetpointMatrix(fleet, current=np.zeros((3, 8), np.int32))
+        target = np.zeros((3, 8), np.int32)
+        assert setpoints.apply(target).results == []
+        target[1, 4] = 50
+        target[2, [0, 7]] = 9
+        result = setpoints.apply(target)
+    assert result.ok and [r.name for r in result] == ['b', 'c']
+    assert sorted(ctl.calls) == [('pms_set_channel', 3, 1, 9), ('pms_set_channel', 3, 8, 9),
+                                 ('set_channel', 2, 5, 50)]
+    assert setpoints.stats()['cells_sent'] == 3
+    assert (setpoints.applied == target).all()
+
+
+def test_several_changes_are_one_set_all(sims, controller, handle):
+    other = controller.connect_net(*sims.addresses[1])
+    with Fleet(controller, [Device('a', handle), Device('b', other)]) as fleet:
+        setpoints = SetpointMatrix(fleet, current=np.zeros((2, 8), np.int32), set_all_min=2)
+        target = np.zeros((2, 8), np.int32)
+        target[0] = np.arange(8) * 10
+        target[1, 3] = 33
+        assert setpoints.apply(target).ok
+    assert sims.controllers[0].state.brightness == list(range(0, 80, 10))
+    assert sims.controllers[1].state.brightness[3] == 33
+    assert setpoints.stats()['set_all_frames'] == 1 and setpoints.stats()['channel_frames'] == 1
+
+
+def test_rows_that_miss_the_deadline_are_resent():
+    ctl = Recorder(hang=(2,))
+    with fleet_of(ctl) as fleet:
+        setpoints = SetpointMatrix(fleet, current=np.zeros((3, 8), np.int32))
+        target = np.zeros((3, 8), np.int32)
+        target[0, 0] = target[1, 0] = 5
+        result = setpoints.apply(target, deadline=0.05)
+        assert [(r.name, r.timed_out) for r in result] == [('a', False), ('b', True)]
+        assert (setpoints.applied[1] == -1).all() and (setpoints.applied[0] == target[0]).all()
+        ctl.hang = ()
+        ctl.release.set()
+        for _ in range(100):
+            if len(ctl.calls) == 2:
+                break
+            time.sleep(0.01)
+        # The late write finished in the background
+        assert ('set_channel', 2, 1, 5) in ctl.calls
+        del ctl.calls[:]
+        assert setpoints.apply(target).ok
+        # Only the timed-out row goes out again, as a full SetAll since its state is unknown
+        assert ctl.calls == [('set_all', 2, [5, 0, 0, 0, 0, 0, 0, 0])]
+
+
+def test_out_of_range_setpoints_are_refused():
+    with fleet_of(Recorder()) as fleet:
+        with pytest.raises(ValueError):
+            SetpointMatrix(fleet).apply(np.full((3, 8), 256))
@@ -0,0 +1,57 @@
+import asyncio
+
+from rsee_controller import protocol as p
+from rsee_controller.simulator import ControllerState, start_many, stop_all
+
+
+def test_set_all_round_trip(sims, controller, handle):
+    brightness = [0, 1, 32, 64, 128, 200, 254, 255]
+    pulse = [999, 500, 0, 1, 2, 3, 4, 5]
+    assert controller.pmd_8te_brt_set_all(handle, brightness) == p.RC_OK
+    assert controller.pmd_8te_pls_set_all(handle, pulse) == p.RC_OK
+    assert sims.controllers[0].state.brightness == brightness
+    assert sims.controllers[0].state.pulse == pulse
+    assert [controller.pmd_8te_brt_read_channel(handle, ch) for ch in range(1, 9)] == brightness
+    assert list(controller.pmd_8te_read_all_pulse(handle)[1]) == pulse
+    # One request per SetAll frame
+    assert sims.controllers[0].stats['frames'] >= 16
+
+
+def test_set_all_rejects_out_of_range(controller, handle):
+    assert controller.pmd_8te_brt_set_all(handle, [256] + [0] * 7) == p.RC_BAD_ARGUMENT
+    assert controller.pmd_8te_pls_set_all(handle, [1000] * 8) == p.RC_BAD_ARGUMENT
+
+
+def test_mode_and_info(sims, controller, handle):
+    assert controller.pmd_8te_set_strobe_mode(None, handle, True) == p.RC_OK
+    assert sims.controllers[0].state.mode == 2
+    rc, info = controller.pmd_8te_read_info(handle)
+    assert rc == len(info)
+    assert info.startswith('PM-D-8TE')
+
+
+def test_state_ignores_bad_frames():
+    state = ControllerState()
+    assert state.handle(b'S09123') is None
+    assert state.handle(b'S01999') is None
+    assert state.handle(b'SP011000') is None
+    assert state.handle(b'XX') is None
+    assert state.handle(b'S01128') == b'_01'
+    assert state.brightness[0] == 128
+
+
+def test_start_many_seeds_each_controller():
+    async def rolls():
+        controllers = await start_many(3, seed=7)
+        try:
+            return [[sim._random.random() for _ in range(4)] for sim in controllers]
+        finally:
+            await stop_all(controllers)
+    loop = asyncio.new_event_loop()
+    try:
+        first = loop.run_until_complete(rolls())
+        second = loop.run_until_complete(rolls())
+    finally:
+        loop.close()
+    assert first == second
+    assert len({tuple(r) for r in first}) == 3
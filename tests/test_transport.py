@@ -0,0 +1,29 @@
+from rsee_controller import protocol as p
+
+
+def test_set_all_checks_every_ack(sims, controller, handle):
+    state = sims.controllers[0].state
+    handle_frame = state.handle
+
+    def mangle_channel_3(frame):
+        reply = handle_frame(frame)
+        return b'_0X' if frame.startswith(b'S03') else reply
+    state.handle = mangle_channel_3
+    assert controller.pmd_8te_brt_set_all(handle, [10] * 8) == p.RC_BAD_REPLY
+    assert controller.pmd_8te_pls_set_all(handle, [10] * 8) == p.RC_OK
+
+
+def test_check_set_all():
+    frame = b''.join(p.pls_set_frame(ch, 5) for ch in range(1, 9))
+    reply = b''.join(b'_P0%d' % ch for ch in range(1, 9))
+    assert p.check_set_all(reply, frame, p.PLS_SET_LEN, p.PLS_SET_REPLY) == p.RC_OK
+    swapped = reply[:4] + reply[8:12] + reply[4:8] + reply[12:]
+    assert p.check_set_all(swapped, frame, p.PLS_SET_LEN, p.PLS_SET_REPLY) == p.RC_BAD_REPLY
+    rejected = reply[:-4] + b'?P08'
+    assert p.check_set_all(rejected, frame, p.PLS_SET_LEN, p.PLS_SET_REPLY) == p.RC_BAD_REPLY
+
+
+def test_bad_handle_and_closed_connection(controller, handle):
+    assert controller.pmd_8te_brt_set_all(handle + 1000, [0] * 8) == p.RC_BAD_HANDLE
+    assert controller.close_net(handle)
+    assert controller.pmd_8te_brt_read_channel(handle, 1) == p.RC_BAD_HANDLE
@@ -0,0 +1,44 @@
+import asyncio
+
+from rsee_controller.watcher import Watcher
+
+
+def test_polls_do_not_touch_the_stub_cache(controller, handle, monkeypatch):
+    watcher = Watcher(controller, min_interval=0.01, report_initial=True)
+    point = watcher.watch('pmd_8te', handle, channel=1)
+
+    def stubs(*args):
+        raise AssertionError('stubs() called from a poll')
+    monkeypatch.setattr(controller, 'stubs', stubs)
+    controller.pmd_8te_brt_set_channel(handle, 1, 42)
+    with watcher:
+        change = next(watcher.changes(timeout=2))
+    assert (change.point, change.new) == (point, 42)
+
+
+def test_points_follow_transport_layer_changes(controller, handle):
+    watcher = Watcher(controller, min_interval=0.01, report_initial=True)
+    point = watcher.watch('pmd_8te', handle, channel=1)
+    controller.enable_instrumentation()
+    controller.pmd_8te_brt_set_channel(handle, 1, 7)
+    with watcher:
+        assert next(watcher.changes(timeout=2)).new == 7
+        controller.pmd_8te_brt_set_channel(handle, 1, 8)
+        change = next(watcher.changes(timeout=2))
+    assert change.new == 8
+    assert point.dll is controller.dll
+
+
+def test_async_changes(controller, handle):
+    async def first_change():
+        async for change in watcher:
+            return change
+    watcher = Watcher(controller, min_interval=0.01, report_initial=True)
+    watcher.watch('pmd_8te', handle, channel=2)
+    try:
+        loop = asyncio.new_event_loop()
+        change = loop.run_until_complete(asyncio.wait_for(first_change(), 2))
+        loop.close()
+    finally:
+        watcher.stop()
+    assert change.new == 0